@@ -0,0 +1,25 @@
+"""
+Customer Churn Analysis - shared library code.
+
+Modules:
+    segments  - single-pass segment aggregation engine
+    cleaning  - chunked, vectorized cleaning engine with an incremental validation report
+    data      - streamed cleaning + typed columnar (Feather) cache (python -m churn.data)
+    store     - indexed SQLite store, incremental upserts and trigger-maintained
+                segment summaries (python -m churn.store)
+    queries   - named queries from sql/churn_analysis_queries.sql, concurrent
+                cached CSV export with query plans (python -m churn.queries)
+    charts    - incremental, parallel rendering of visualizations/ (python -m churn.charts)
+    pipeline  - content-hash incremental runner for all stages (python -m churn.pipeline)
+    synth     - synthetic customers at any scale, fitted to the raw CSV (python -m churn.synth)
+    bench     - per-stage benchmarks on synthetic data, run comparison (python -m churn.bench)
+    features  - versioned, memory-mapped encoded feature matrix with appends
+                (python -m churn.features)
+    train     - parallel, cached hyperparameter search (python -m churn.train)
+    score     - chunked batch scoring of customer files (python -m churn.score)
+    retention - Monte Carlo retention-policy simulation on scored customers
+                (python -m churn.retention)
+    scorer    - low-latency in-process ChurnScorer
+"""
+
+from churn.segments import aggregate_segments, SegmentSummary
@@ -0,0 +1,290 @@
+"""
+Benchmarks for every pipeline stage on synthetic data of several sizes.
+
+For each size a synthetic raw CSV is generated with churn.synth into a
+scratch directory, then the stages run on it in order, each reading the
+previous stage's output:
+
+    generate -> clean -> store -> queries -> score -> excel
+
+Every stage runs in a freshly spawned process, so its peak RSS is its
+own (interpreter and imports included) and nothing is cached between
+stages. Wall time, peak RSS and rows per second are recorded per stage
+and size and written as JSON.
+
+`compare` reads two result files and flags every stage whose time or
+peak RSS grew by more than a threshold; it exits with status 1 when
+there is a regression.
+
+Usage:
+    python -m churn.bench run --sizes 100k 1M
+    python -m churn.bench run --sizes 10M --stages generate clean store queries
+    python -m churn.bench compare .cache/bench/before.json .cache/bench/after.json --threshold 0.1
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from churn.data import RAW_PATH
+from churn.synth import parse_size, size_label
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = PROJECT_ROOT / ".cache" / "bench"
+DEFAULT_SIZES = [100_000, 1_000_000]
+DEFAULT_THRESHOLD = 0.10
+COMPARED_METRICS = ['seconds', 'peak_rss_mb']
+
+# Rows a worksheet holds, header included
+EXCEL_MAX_ROWS = 1_048_576
+
+
+# ----------------------------------------------------------------------
+# Stages (each runs in its own process and returns the rows it handled)
+# ----------------------------------------------------------------------
+
+def _paths(work_dir):
+    work_dir = Path(work_dir)
+    return {
+        'raw': work_dir / "raw.csv",
+        'csv': work_dir / "customers_cleaned.csv",
+        'feather': work_dir / "customers_cleaned.feather",
+        'report': work_dir / "cleaning_report.json",
+        'db': work_dir / "churn_analysis.db",
+        'sql': work_dir / "sql",
+        'scored': work_dir / "customers_scored.csv",
+        'xlsx': work_dir / "churn_analysis_dynamic.xlsx",
+    }
+
+
+def stage_generate(paths, n_rows):
+    from churn.synth import write_synthetic
+
+    write_synthetic(paths['raw'], n_rows)
+    return n_rows
+
+
+def stage_clean(paths, n_rows):
+    from churn.data import clean_file
+
+    report = clean_file(paths['raw'], paths['csv'], paths['feather'],
+                        report_path=paths['report'])
+    return report.rows_written
+
+
+def stage_store(paths, n_rows):
+    from churn.data import read_cleaned
+    from churn.store import load_store
+
+    df = read_cleaned(paths['feather'])
+    load_store(df, paths['db'])
+    return len(df)
+
+
+def stage_queries(paths, n_rows):
+    from churn.queries import export_query, load_queries
+    from churn.store import connect
+
+    conn = connect(paths['db'], read_only=True)
+    try:
+        for name, sql in load_queries().items():
+            export_query(conn, name, sql, paths['sql'])
+        return conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def stage_score(paths, n_rows):
+    from churn.score import MODEL_PATH, score_file
+
+    if not MODEL_PATH.exists():
+        return None
+    return score_file(paths['csv'], paths['scored'], workers=os.cpu_count() or 1)
+
+
+def stage_excel(paths, n_rows):
+    from churn.data import read_cleaned
+
+    sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+    from create_enhanced_excel import create_assembled_workbook
+
+    df = read_cleaned(paths['feather'])
+    if len(df) >= EXCEL_MAX_ROWS:
+        return None
+    with ProcessPoolExecutor() as pool:
+        create_assembled_workbook(df, paths['xlsx'], pool=pool, verbose=False)
+    return len(df)
+
+
+STAGES = {
+    'generate': stage_generate,
+    'clean': stage_clean,
+    'store': stage_store,
+    'queries': stage_queries,
+    'score': stage_score,
+    'excel': stage_excel,
+}
+
+# Stage whose output each stage reads
+REQUIRES = {'clean': 'generate', 'store': 'clean', 'queries': 'store',
+            'score': 'clean', 'excel': 'clean'}
+
+
+def _with_requirements(stages):
+    needed = set()
+    for stage in stages:
+        while stage and stage not in needed:
+            needed.add(stage)
+            stage = REQUIRES.get(stage)
+    return [stage for stage in STAGES if stage in needed]
+
+
+def _measure(stage, work_dir, n_rows):
+    """Worker: run one stage and report (rows, seconds, peak RSS in bytes)."""
+    paths = _paths(work_dir)
+    start = time.perf_counter()
+    rows = STAGES[stage](paths, n_rows)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux and bytes on macOS; the stage's own
+    # process pools show up under RUSAGE_CHILDREN
+    unit = 1 if sys.platform == 'darwin' else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * unit
+    return rows, seconds, peak
+
+
+# ----------------------------------------------------------------------
+# Runs and comparisons
+# ----------------------------------------------------------------------
+
+def run_benchmarks(sizes, stages=None, work_dir=None, keep=False):
+    """
+    Run `stages` (default: all) at every size.
+
+    Stages run in pipeline order; the stages they read from run too but
+    are not recorded. Returns the list of result records. A stage that
+    cannot run at a size (no saved model, more rows than a worksheet
+    holds) is recorded as skipped.
+    """
+    timed = set(stages or STAGES)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for n_rows in sizes:
+        scratch = Path(tempfile.mkdtemp(prefix=f"bench_{size_label(n_rows)}_", dir=work_dir))
+        try:
+            for stage in _with_requirements(timed):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    rows, seconds, peak = pool.submit(_measure, stage, str(scratch), n_rows).result()
+                if stage not in timed:
+                    continue
+                record = {'stage': stage, 'size': n_rows, 'rows': rows,
+                          'seconds': round(seconds, 4),
+                          'peak_rss_mb': round(peak / 2 ** 20, 1),
+                          'rows_per_s': round(rows / seconds) if rows and seconds else None,
+                          'skipped': rows is None}
+                results.append(record)
+                status = '[--]' if record['skipped'] else '[OK]'
+                print(f"   {status} {stage:<9} {size_label(n_rows):>6}: {seconds:8.2f}s  "
+                      f"{record['peak_rss_mb']:8.1f} MB  {record['rows_per_s'] or 0:>12,} rows/s")
+        finally:
+            if keep:
+                print(f"   kept {scratch}")
+            else:
+                shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def save_results(path, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'source': str(RAW_PATH),
+                'environment': environment(), 'results': results}
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Changes of every (stage, size) measured in both runs.
+
+    Returns a list of (stage, size, metric, old, new, relative change,
+    regressed); skipped measurements are left out.
+    """
+    old = {(r['stage'], r['size']): r for r in baseline if not r.get('skipped')}
+    changes = []
+    for record in current:
+        key = (record['stage'], record['size'])
+        if record.get('skipped') or key not in old:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = old[key][metric], record[metric]
+            change = (after - before) / before if before else 0.0
+            changes.append((*key, metric, before, after, change, change > threshold))
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages at several sizes.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Run the benchmarks")
+    run.add_argument("--sizes", nargs='+', type=parse_size, default=DEFAULT_SIZES,
+                     metavar="SIZE", help="Customer counts, e.g. 100k 1M 10M (default: 100k 1M)")
+    run.add_argument("--stages", nargs='+', choices=list(STAGES), default=None,
+                     help="Stages to time (default: all)")
+    run.add_argument("-o", "--output", type=Path, default=None,
+                     help="Results JSON (default: .cache/bench/<timestamp>.json)")
+    run.add_argument("--work-dir", type=Path, default=None,
+                     help="Where the scratch data is written (default: the system temp dir)")
+    run.add_argument("--keep", action="store_true", help="Keep the scratch data")
+
+    compare = commands.add_parser('compare', help="Compare two result files")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="Relative increase counted as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+        results = run_benchmarks(args.sizes, args.stages, args.work_dir, args.keep)
+        print(f"Results: {save_results(output, results)}")
+        return
+
+    changes = compare_results(load_results(args.baseline), load_results(args.current),
+                              args.threshold)
+    for stage, size, metric, before, after, change, regressed in changes:
+        status = '[!!]' if regressed else '[OK]'
+        print(f"   {status} {stage:<9} {size_label(size):>6} {metric:<12} "
+              f"{before:>10} -> {after:<10} ({change:+.1%})")
+    regressions = sum(change[-1] for change in changes)
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Chart rendering for the visualizations/ directory.
+
+Each chart is drawn from a small aggregate table (a few rows per
+segment) rather than from the customer table. All aggregates come from
+one churn.segments pass plus two small groupbys, so the customer data is
+scanned once per run.
+
+A chart is redrawn only when the hash of its aggregate (and the chart
+version and dpi) differs from the one recorded for its PNG in the
+manifest, or the PNG is missing. The charts that do need drawing are
+rendered in a process pool on object-oriented Agg figures; the pyplot
+state machine is never used. Matplotlib is imported inside the workers,
+so a run with nothing to redraw does not load it at all.
+
+Usage:
+    python -m churn.charts                                 # redraw what changed
+    python -m churn.charts 04_churn_by_tenure_line --force
+    python -m churn.charts --list
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from churn.data import load_customers, read_cleaned
+from churn.segments import CHARGES_COL, CHURN_COL, TENURE_COL, aggregate_segments, flag_mask
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+VISUALIZATIONS_DIR = PROJECT_ROOT / "visualizations"
+MANIFEST_NAME = "charts_manifest.json"
+DEFAULT_DPI = 300
+
+# Part of every chart hash; bump when a drawing function changes so all
+# charts are redrawn
+CHART_VERSION = 1
+
+# matplotlib's copy of the seaborn "whitegrid" look the notebooks used
+STYLE = 'seaborn-v0_8-whitegrid'
+
+TENURE_MONTHS = 24
+TOP_SEGMENTS = 10
+SERVICES = [('OnlineSecurity', 'Online Security'), ('TechSupport', 'Tech Support'),
+            ('OnlineBackup', 'Online Backup')]
+# (label, lower TotalCharges bound), highest segment first
+CLV_SEGMENTS = [('5K+ (Very High)', 5000), ('3K-5K (High)', 3000), ('1.5K-3K (Medium)', 1500),
+                ('500-1.5K (Low)', 500), ('0-500 (Very Low)', 0)]
+
+
+# ----------------------------------------------------------------------
+# Aggregates
+# ----------------------------------------------------------------------
+
+def _churn_rates(table):
+    """churned, customers and churn_rate_pct columns of a segment table."""
+    return pd.DataFrame({
+        'customers': table['customers'],
+        'churned': table['churned'],
+        'churn_rate_pct': 100.0 * table['churned'] / table['customers'],
+    })
+
+
+def revenue_at_risk(df, top=TOP_SEGMENTS):
+    """Monthly charges of churned customers per Contract x PaymentMethod, largest first."""
+    churned = df[flag_mask(df[CHURN_COL])]
+    return (churned.groupby(['Contract', 'PaymentMethod'], observed=True)[CHARGES_COL]
+            .sum().nlargest(top).rename('revenue_lost').reset_index())
+
+
+def clv_segments(df):
+    """Customers per lifetime value (TotalCharges) segment, highest segment first."""
+    bounds = np.array([low for _, low in reversed(CLV_SEGMENTS)], dtype='float64')
+    charges = pd.to_numeric(df['TotalCharges'], errors='coerce').to_numpy(dtype='float64')
+    codes = np.searchsorted(bounds, charges[~np.isnan(charges)], side='right') - 1
+    counts = np.bincount(codes[codes >= 0], minlength=len(bounds))[::-1]
+    return pd.DataFrame({'segment': [label for label, _ in CLV_SEGMENTS],
+                         'customers': counts.astype('int64')})
+
+
+def chart_aggregates(df):
+    """{chart name: aggregate table} for every chart in CHARTS."""
+    summary = aggregate_segments(
+        df, ['Contract', 'PaymentMethod', TENURE_COL] + [column for column, _ in SERVICES])
+
+    contract = _churn_rates(summary.table('Contract'))
+    payment = _churn_rates(summary.table('PaymentMethod')).sort_values('churned', ascending=False)
+    tenure = _churn_rates(summary.table(TENURE_COL))
+    tenure = tenure[tenure.index < TENURE_MONTHS]
+
+    services = pd.DataFrame(
+        [(label,
+          summary.value(column, 'Yes', 'churned') / summary.value(column, 'Yes', 'customers') * 100,
+          summary.value(column, 'No', 'churned') / summary.value(column, 'No', 'customers') * 100)
+         for column, label in SERVICES],
+        columns=['service', 'with_service_pct', 'without_service_pct'])
+
+    tables = {
+        '01_churn_by_contract_pie': contract,
+        '02_churn_by_payment_pie': payment,
+        '03_revenue_at_risk_bar': revenue_at_risk(df),
+        '04_churn_by_tenure_line': tenure,
+        '05_clv_segments_bar': clv_segments(df),
+        '06_service_impact_comparison_bar': services,
+    }
+    # Plain str labels so the hashes do not depend on categorical dtypes
+    for name, table in tables.items():
+        table = table.reset_index() if table.index.name else table.reset_index(drop=True)
+        labels = table.select_dtypes(exclude='number').columns
+        tables[name] = table.astype({column: str for column in labels})
+    return tables
+
+
+def aggregate_hash(table, dpi):
+    """Hash of one aggregate table plus everything else that changes its PNG."""
+    header = json.dumps([CHART_VERSION, dpi, list(map(str, table.columns))]).encode()
+    digest = hashlib.sha256(header)
+    digest.update(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Drawing (runs in the workers; matplotlib objects only)
+# ----------------------------------------------------------------------
+
+def _title(ax, text):
+    ax.set_title(text, fontsize=20, fontweight='bold', pad=20)
+
+
+def _bar_labels(ax, bars, fmt, **kwargs):
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height, fmt.format(height),
+                ha='center', va='bottom', fontweight='bold', **kwargs)
+
+
+def _pie(fig, table, label_col, colors, legend_fmt, title, label_kwargs):
+    ax = fig.add_subplot()
+    explode = [0.1] + [0] * (len(table) - 1)
+    _, texts, autotexts = ax.pie(table['churned'], labels=table[label_col], autopct='%1.1f%%',
+                                 startangle=90, colors=colors[:len(table)], explode=explode,
+                                 wedgeprops={'edgecolor': 'white', 'linewidth': 1})
+    for text in texts:
+        text.set(**label_kwargs)
+    for text in autotexts:
+        text.set(color='white', fontsize=13, fontweight='bold')
+    ax.legend([legend_fmt.format(row) for row in table.itertuples()],
+              loc='upper left', bbox_to_anchor=(1, 1), fontsize=11)
+    _title(ax, title)
+
+
+def draw_contract_pie(fig, table):
+    fig.set_size_inches(12, 8)
+    _pie(fig, table, 'Contract', ['#FF6B6B', '#4ECDC4', '#45B7D1'],
+         '{0.Contract}: {0.churned} customers ({0.churn_rate_pct:.2f}%)',
+         'Churned Customers by Contract Type', {'fontsize': 14, 'fontweight': 'bold'})
+
+
+def draw_payment_pie(fig, table):
+    fig.set_size_inches(14, 8)
+    _pie(fig, table, 'PaymentMethod', ['#e74c3c', '#3498db', '#2ecc71', '#f39c12'],
+         '{0.PaymentMethod}: {0.churned} ({0.churn_rate_pct:.2f}%)',
+         'Churned Customers by Payment Method', {'fontsize': 13})
+
+
+def draw_revenue_at_risk(fig, table):
+    from matplotlib.ticker import StrMethodFormatter
+
+    fig.set_size_inches(12, 8)
+    ax = fig.add_subplot()
+    labels = table['Contract'] + '\n' + table['PaymentMethod']
+    bars = ax.barh(labels, table['revenue_lost'], color='#e74c3c', edgecolor='darkred',
+                   linewidth=1.5)
+    ax.invert_yaxis()
+    for bar in bars:
+        width = bar.get_width()
+        ax.text(width, bar.get_y() + bar.get_height() / 2., f'  ${width:,.0f}',
+                ha='left', va='center', fontweight='bold')
+    ax.xaxis.set_major_formatter(StrMethodFormatter('${x:,.0f}'))
+    ax.set_xlabel('Monthly Revenue Lost ($)', fontsize=13, fontweight='bold')
+    ax.set_ylabel('Customer Segment', fontsize=13, fontweight='bold')
+    _title(ax, 'Top 10 Revenue at Risk by Customer Segment')
+
+
+def draw_tenure_line(fig, table):
+    fig.set_size_inches(14, 8)
+    ax = fig.add_subplot()
+    ax.plot(table[TENURE_COL], table['churn_rate_pct'], marker='o', linewidth=3,
+            color='#e74c3c', label='Churn Rate')
+    ax.axhline(20, color='gray', linestyle='--', linewidth=1, label='20% Threshold')
+    ax.axvspan(0, 6, alpha=0.15, color='#FF6B6B')
+    if len(table):
+        ax.text(3, table['churn_rate_pct'].max() * 0.9, 'Critical\nPeriod', ha='center',
+                color='darkred', fontsize=11, fontweight='bold')
+    ax.set_xlabel('Tenure (Months)', fontsize=13, fontweight='bold')
+    ax.set_ylabel('Churn Rate (%)', fontsize=13, fontweight='bold')
+    ax.legend(fontsize=11)
+    _title(ax, f'Customer Churn Rate by Tenure (First {TENURE_MONTHS} Months)')
+
+
+def draw_clv_segments(fig, table):
+    from matplotlib.ticker import StrMethodFormatter
+
+    fig.set_size_inches(12, 7)
+    ax = fig.add_subplot()
+    bars = ax.bar(table['segment'], table['customers'], color='#95a5a6', edgecolor='black',
+                  linewidth=1.5)
+    _bar_labels(ax, bars, '{:,.0f}', fontsize=11)
+    ax.yaxis.set_major_formatter(StrMethodFormatter('{x:,.0f}'))
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    ax.set_xlabel('Customer Lifetime Value Segment', fontsize=13, fontweight='bold')
+    ax.set_ylabel('Number of Customers', fontsize=13, fontweight='bold')
+    _title(ax, 'Customer Distribution by Lifetime Value Segments')
+
+
+def draw_service_impact(fig, table):
+    fig.set_size_inches(11, 8)
+    ax = fig.add_subplot()
+    x = np.arange(len(table))
+    width = 0.35
+    with_bars = ax.bar(x - width / 2, table['with_service_pct'], width, label='With Service',
+                       color='#2ecc71', edgecolor='darkgreen', linewidth=1.5)
+    without_bars = ax.bar(x + width / 2, table['without_service_pct'], width,
+                          label='Without Service', color='#e74c3c', edgecolor='darkred',
+                          linewidth=1.5)
+    _bar_labels(ax, with_bars, '{:.1f}%', fontsize=11)
+    _bar_labels(ax, without_bars, '{:.1f}%', fontsize=11)
+    ax.set_xticks(x, table['service'], fontsize=12)
+    ax.set_xlabel('Service Type', fontsize=13, fontweight='bold')
+    ax.set_ylabel('Churn Rate (%)', fontsize=13, fontweight='bold')
+    ax.legend(loc='upper left', fontsize=12)
+    _title(ax, 'Impact of Services on Customer Churn Rate')
+
+
+# Chart name (the PNG's file name) -> drawing function
+CHARTS = {
+    '01_churn_by_contract_pie': draw_contract_pie,
+    '02_churn_by_payment_pie': draw_payment_pie,
+    '03_revenue_at_risk_bar': draw_revenue_at_risk,
+    '04_churn_by_tenure_line': draw_tenure_line,
+    '05_clv_segments_bar': draw_clv_segments,
+    '06_service_impact_comparison_bar': draw_service_impact,
+}
+
+
+def render_chart(name, table, path, dpi=DEFAULT_DPI):
+    """Draw chart `name` from its aggregate table into the PNG at `path`."""
+    import matplotlib
+
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from matplotlib.style import context
+
+    started = time.perf_counter()
+    with context(STYLE):
+        fig = Figure()
+        CHARTS[name](fig, table)
+        fig.tight_layout()
+        # Write next to the target and rename, so a failed render never
+        # leaves a truncated PNG behind
+        tmp_path = Path(path).with_suffix('.tmp.png')
+        fig.savefig(tmp_path, dpi=dpi, bbox_inches='tight')
+    tmp_path.replace(path)
+    return path, time.perf_counter() - started
+
+
+# ----------------------------------------------------------------------
+# Incremental runs
+# ----------------------------------------------------------------------
+
+def load_manifest(output_dir):
+    path = Path(output_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    path = Path(output_dir) / MANIFEST_NAME
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def render_charts(df, names=None, output_dir=VISUALIZATIONS_DIR, workers=None,
+                  dpi=DEFAULT_DPI, force=False):
+    """
+    Redraw the charts in `names` (default: all) whose aggregates changed.
+
+    Returns (charts drawn, charts skipped as unchanged).
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    tables = chart_aggregates(df)
+
+    jobs = []
+    for name in names or CHARTS:
+        digest = aggregate_hash(tables[name], dpi)
+        path = output_dir / f"{name}.png"
+        if not force and manifest.get(name) == digest and path.exists():
+            continue
+        jobs.append((name, digest, path))
+
+    skipped = len(names or CHARTS) - len(jobs)
+    if not jobs:
+        return 0, skipped
+
+    drawn = 0
+    with ProcessPoolExecutor(max_workers=min(workers or len(jobs), len(jobs))) as pool:
+        futures = {pool.submit(render_chart, name, tables[name], path, dpi): (name, digest)
+                   for name, digest, path in jobs}
+        try:
+            for future in as_completed(futures):
+                name, digest = futures[future]
+                path, seconds = future.result()
+                manifest[name] = digest
+                drawn += 1
+                print(f"   [OK] {path.name} ({seconds:.2f}s)")
+        finally:
+            # Keep the charts that did finish if one of them fails
+            save_manifest(output_dir, manifest)
+    return drawn, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Redraw the charts in visualizations/.")
+    parser.add_argument("names", nargs="*",
+                        help="Charts to draw (default: all; see --list)")
+    parser.add_argument("--input", type=Path, default=None,
+                        help="Cleaned customer file (default: the churn.data columnar cache)")
+    parser.add_argument("--output-dir", type=Path, default=VISUALIZATIONS_DIR,
+                        help="Directory for the PNGs and manifest (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per chart to draw)")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI,
+                        help="PNG resolution (default: %(default)s)")
+    parser.add_argument("--force", action="store_true",
+                        help="Redraw every chart, even if its aggregate is unchanged")
+    parser.add_argument("--list", action="store_true",
+                        help="Only list the chart names")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CHARTS))
+        return
+    unknown = [name for name in args.names if name not in CHARTS]
+    if unknown:
+        parser.error(f"unknown charts: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    df = load_customers() if args.input is None else read_cleaned(args.input)
+    drawn, skipped = render_charts(df, args.names, args.output_dir, args.workers,
+                                   args.dpi, args.force)
+    print(f"Charts drawn: {drawn}, unchanged: {skipped} "
+          f"({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Cleaned customer data with a typed columnar cache.
+
+The cleaning from 01_data_exploration.ipynb (strip text, TotalCharges to
+numeric, Yes/No -> 1/0, drop the handful of rows without TotalCharges)
+runs through the chunked engine in churn.cleaning, and the result is
+written both as the familiar customers_cleaned.csv and as an
+uncompressed Feather (Arrow IPC) file:
+
+- Yes/No flags, SeniorCitizen and tenure are downcast to the smallest
+  integer type (int8 for this dataset; flags are still 1/0),
+- charges stay float64,
+- every other text column except customerID as a categorical.
+
+`load_customers()` memory-maps the Feather file, so consumers get typed
+columns without re-parsing CSV text or re-inferring dtypes. The file
+records a SHA-256 of the raw CSV it was built from; when the raw file
+changes, cleaning is re-run and the cache rewritten.
+
+`clean_file` streams the raw CSV chunk by chunk, so extracts larger than
+memory can be cleaned: chunks are cleaned into a scratch directory
+first, and once the whole file has been seen (the TotalCharges
+drop-or-fill decision needs the total count) they are written to the CSV
+and the Feather file with one set of categories and integer types. The
+validation report is written next to them as cleaning_report.json.
+
+Usage:
+    python -m churn.data                        # rebuild the cache if the raw CSV changed
+    python -m churn.data --force                # always rebuild
+    python -m churn.data --chunk-size 1000000   # rows cleaned per chunk
+"""
+
+import argparse
+import hashlib
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from churn.cleaning import (DEFAULT_CHUNK_SIZE, ID_COL, ValidationReport,
+                            apply_totalcharges_policy, clean_chunk, read_raw_chunks,
+                            totalcharges_policy)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RAW_PATH = PROJECT_ROOT / "data" / "raw" / "telco_customer_churn.csv"
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+CLEANED_CSV = PROCESSED_DIR / "customers_cleaned.csv"
+CLEANED_FEATHER = PROCESSED_DIR / "customers_cleaned.feather"
+REPORT_PATH = PROCESSED_DIR / "cleaning_report.json"
+
+# Bump when clean_data changes so existing caches are rebuilt
+CLEANING_VERSION = 2
+
+# Schema metadata keys stored in the Feather file
+_HASH_KEY = b'churn.raw_sha256'
+_VERSION_KEY = b'churn.cleaning_version'
+
+_INT_TYPES = ['int8', 'int16', 'int32', 'int64']
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def clean_data(df):
+    """
+    Clean the raw telco table exactly like 01_data_exploration.ipynb.
+
+    In-memory version of `clean_file`, with the same engine. Returns a
+    new DataFrame: 1/0 int8 flags, categorical text columns, customerID
+    as text.
+    """
+    cleaned = clean_chunk(df)
+    n_missing = int(cleaned['TotalCharges'].isna().sum()) if 'TotalCharges' in cleaned else 0
+    return apply_totalcharges_policy(cleaned, totalcharges_policy(n_missing)).reset_index(drop=True)
+
+
+def to_columnar(df):
+    """Compact dtypes for the columnar cache (flags int8, text categorical)."""
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if col == ID_COL:
+            continue
+        if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            df[col] = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+    return df
+
+
+def _smallest_int(low, high):
+    """The smallest signed integer type holding [low, high], like to_numeric's downcast."""
+    return next(dtype for dtype in _INT_TYPES
+                if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max)
+
+
+def clean_file(raw_path=RAW_PATH, csv_path=CLEANED_CSV, feather_path=CLEANED_FEATHER,
+               raw_hash=None, chunk_size=DEFAULT_CHUNK_SIZE, report_path=REPORT_PATH):
+    """
+    Clean the raw CSV chunk by chunk into the cleaned CSV and Feather cache.
+
+    Only one chunk is in memory at a time. The outputs are written under
+    temporary names and replaced at the end. Returns the ValidationReport
+    (also saved to `report_path` when given).
+    """
+    import pyarrow as pa
+
+    csv_path, feather_path = Path(csv_path), Path(feather_path)
+    feather_path.parent.mkdir(parents=True, exist_ok=True)
+    raw_hash = raw_hash or file_sha256(raw_path)
+    report = ValidationReport(raw_path)
+
+    scratch = Path(tempfile.mkdtemp(prefix='.cleaning_', dir=feather_path.parent))
+    try:
+        # Pass 1: clean every chunk, collecting categories and integer ranges
+        parts, categories, ranges = [], {}, {}
+        for index, chunk in enumerate(read_raw_chunks(raw_path, chunk_size)):
+            cleaned = clean_chunk(chunk, report).reset_index(drop=True)
+            for column in cleaned.columns:
+                series = cleaned[column]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    categories.setdefault(column, set()).update(series.cat.categories)
+                elif pd.api.types.is_integer_dtype(series) and len(series):
+                    low, high = ranges.get(column, (series.min(), series.max()))
+                    ranges[column] = (min(low, series.min()), max(high, series.max()))
+            part = scratch / f"{index:05d}.feather"
+            cleaned.to_feather(part, compression='uncompressed')
+            parts.append(part)
+        if not parts:
+            raise ValueError(f"{raw_path} has no rows")
+        report.policy = totalcharges_policy(report.totalcharges_missing)
+
+        # Pass 2: apply the TotalCharges decision and write with the final types
+        dtypes = {column: pd.CategoricalDtype(sorted(values))
+                  for column, values in categories.items()}
+        dtypes.update({column: _smallest_int(low, high) for column, (low, high) in ranges.items()})
+        csv_tmp = csv_path.with_name(csv_path.name + '.tmp')
+        feather_tmp = feather_path.with_name(feather_path.name + '.tmp')
+        writer = schema = None
+        try:
+            for index, part in enumerate(parts):
+                df = apply_totalcharges_policy(pd.read_feather(part), report.policy)
+                report.add_final(df)
+                df.to_csv(csv_tmp, mode='a' if index else 'w', header=not index, index=False)
+                columnar = df.astype(dtypes)
+                if writer is None:
+                    schema = pa.Schema.from_pandas(columnar, preserve_index=False)
+                    metadata = dict(schema.metadata or {})
+                    metadata[_HASH_KEY] = raw_hash.encode()
+                    metadata[_VERSION_KEY] = str(CLEANING_VERSION).encode()
+                    schema = schema.with_metadata(metadata)
+                    # Uncompressed so the file can be memory-mapped without decoding
+                    writer = pa.ipc.new_file(str(feather_tmp), schema)
+                writer.write_table(pa.Table.from_pandas(columnar, schema=schema,
+                                                        preserve_index=False))
+        finally:
+            if writer is not None:
+                writer.close()
+        csv_tmp.replace(csv_path)
+        feather_tmp.replace(feather_path)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if report_path:
+        report.save(report_path)
+    return report
+
+
+def cache_is_fresh(raw_path=RAW_PATH, feather_path=CLEANED_FEATHER, raw_hash=None):
+    """True when the Feather cache exists and was built from the current raw file."""
+    import pyarrow as pa
+
+    feather_path = Path(feather_path)
+    if not feather_path.exists():
+        return False
+    try:
+        with pa.memory_map(str(feather_path)) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except pa.ArrowInvalid:
+        return False
+    if metadata.get(_VERSION_KEY) != str(CLEANING_VERSION).encode():
+        return False
+    raw_hash = raw_hash or file_sha256(raw_path)
+    return metadata.get(_HASH_KEY) == raw_hash.encode()
+
+
+def refresh_cache(raw_path=RAW_PATH, csv_path=CLEANED_CSV, feather_path=CLEANED_FEATHER,
+                  force=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Re-run cleaning when the raw file changed (or `force`).
+
+    Returns the ValidationReport when the cache was rebuilt, else None.
+    """
+    raw_hash = file_sha256(raw_path)
+    if not force and cache_is_fresh(raw_path, feather_path, raw_hash):
+        return None
+    report_path = Path(feather_path).parent / REPORT_PATH.name
+    return clean_file(raw_path, csv_path, feather_path, raw_hash, chunk_size, report_path)
+
+
+def read_cleaned(path):
+    """
+    Read a cleaned customer file by extension.
+
+    .feather / .arrow files are memory-mapped, .parquet goes through
+    pyarrow, anything else is parsed as CSV.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in ('.feather', '.arrow'):
+        import pyarrow.feather as feather
+
+        return feather.read_table(path, memory_map=True).to_pandas()
+    if suffix in ('.parquet', '.pq'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def load_customers(raw_path=RAW_PATH, feather_path=CLEANED_FEATHER, csv_path=CLEANED_CSV,
+                   refresh=True):
+    """
+    Cleaned customers from the columnar cache.
+
+    With `refresh` the raw file's hash is checked first and cleaning is
+    re-run only if it changed. Without the raw file (or with
+    refresh=False) the existing cache is used, falling back to the
+    cleaned CSV when there is no cache at all.
+    """
+    feather_path = Path(feather_path)
+    if refresh and Path(raw_path).exists():
+        refresh_cache(raw_path, csv_path, feather_path)
+    if feather_path.exists():
+        return read_cleaned(feather_path)
+    return read_cleaned(csv_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the cleaned customer cache.")
+    parser.add_argument("--raw", type=Path, default=RAW_PATH,
+                        help="Raw telco CSV (default: %(default)s)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild even if the cache matches the raw file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Raw rows cleaned per chunk (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = refresh_cache(args.raw, force=args.force, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    status = "Rebuilt" if report else "Up to date:"
+    print(f"{status} {CLEANED_FEATHER} ({elapsed:.2f}s)")
+    if report:
+        for line in report.summary():
+            print(f"   {line}")
+        print(f"   Report: {REPORT_PATH}")
+
+    start = time.perf_counter()
+    df = read_cleaned(CLEANED_FEATHER)
+    feather_time = time.perf_counter() - start
+    start = time.perf_counter()
+    pd.read_csv(CLEANED_CSV)
+    csv_time = time.perf_counter() - start
+    print(f"Loaded {len(df):,} rows: feather {feather_time * 1000:.1f}ms, "
+          f"csv {csv_time * 1000:.1f}ms")
+    print(df.dtypes.astype(str).value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
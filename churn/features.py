@@ -0,0 +1,344 @@
+"""
+Encoded feature matrix shared by training and scoring.
+
+03_modeling.ipynb and 04_dashboard_prep.ipynb each rebuild the model
+features from the customer frame (impute + StandardScaler on the numeric
+columns, OneHotEncoder on the text columns), and the scoring cell picks
+its feature columns on its own. Here the encoding is fitted once into a
+frozen FeatureSchema, and the cleaned customers are encoded once into a
+CSR matrix on disk (data/processed/features):
+
+- schema.json  the frozen schema: numeric medians/means/scales,
+               categories per text column, feature names; its hash is
+               the schema version models are tied to
+- meta.json    rows, non-zeros and the revision of the stored matrix
+- data.bin, indices.bin, indptr.bin   the CSR arrays
+- labels.bin, ids.bin                 Churn and customerID per row
+
+The arrays are raw binary files, so `FeatureStore.load()` memory-maps
+them and wraps them in a scipy CSR matrix without copying. New
+customers are appended to the end of the files; meta.json is replaced
+last, so readers never see a half-written append. Customers already in
+the store are not re-encoded (use --rebuild after changing history).
+
+The columns match the notebook's ColumnTransformer, which is fitted on
+X_train only: the schema is fitted on the training side of the
+notebook's stratified split (`split_rows`), so the medians, scales and
+categories never see the held-out rows. meta.json records how many rows
+that split covered (fit_rows); churn.train holds out the same test rows,
+and customers appended later only ever join the training side.
+
+Usage:
+    python -m churn.features              # build, or append new customers
+    python -m churn.features --rebuild    # refit the schema and re-encode all rows
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from churn.data import ID_COL, PROCESSED_DIR, load_customers, read_cleaned
+
+FEATURES_DIR = PROCESSED_DIR / "features"
+STORE_FORMAT = 2
+
+TARGET_COL = 'Churn'
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+NUMERIC_FEATURES = ['tenure', 'MonthlyCharges', 'TotalCharges']
+MISSING = 'missing'
+
+ID_WIDTH = 32
+VALUE_DTYPE = np.dtype('float64')
+LABEL_DTYPE = np.dtype('int8')
+ID_DTYPE = np.dtype(f'S{ID_WIDTH}')
+
+SCHEMA_NAME = 'schema.json'
+META_NAME = 'meta.json'
+ARRAY_FILES = ['data.bin', 'indices.bin', 'indptr.bin', 'labels.bin', 'ids.bin']
+
+
+class FeatureSchema:
+    """
+    Frozen encoding of customers into model features.
+
+    Numeric columns are median-imputed and standardized with the stored
+    statistics; every other column except customerID and Churn is
+    one-hot encoded over the stored categories (unknown values encode as
+    all zeros, like handle_unknown='ignore').
+    """
+
+    def __init__(self, numeric, categorical):
+        self.numeric = numeric            # [(column, median, mean, scale)]
+        self.categorical = categorical    # [(column, [categories])]
+
+    @classmethod
+    def fit(cls, df):
+        numeric = []
+        for column in NUMERIC_FEATURES:
+            values = pd.to_numeric(df[column], errors='coerce').astype('float64')
+            median = float(values.median())
+            values = values.fillna(median)
+            mean, std = float(values.mean()), float(values.std(ddof=0))
+            numeric.append((column, median, mean, std if std > 0 else 1.0))
+        categorical = []
+        for column in df.columns:
+            if column in (ID_COL, TARGET_COL) or pd.api.types.is_numeric_dtype(df[column]):
+                continue
+            values = _text(df[column])
+            categorical.append((column, sorted(pd.unique(values).tolist())))
+        return cls(numeric, categorical)
+
+    @property
+    def feature_names(self):
+        return ([f"num__{column}" for column, *_ in self.numeric]
+                + [f"cat__{column}_{value}" for column, values in self.categorical
+                   for value in values])
+
+    @property
+    def version(self):
+        """Hash identifying this exact encoding."""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()[:16]
+
+    def to_dict(self):
+        return {'numeric': self.numeric, 'categorical': self.categorical}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([tuple(item) for item in data['numeric']],
+                   [(column, list(values)) for column, values in data['categorical']])
+
+    def transform(self, df):
+        """Encode `df` as a CSR matrix with one row per customer."""
+        n_rows = len(df)
+        width = len(self.numeric) + len(self.categorical)
+        values = np.ones((n_rows, width), dtype=VALUE_DTYPE)
+        columns = np.empty((n_rows, width), dtype='int64')
+
+        for j, (column, median, mean, scale) in enumerate(self.numeric):
+            raw = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64')
+            values[:, j] = (np.where(np.isnan(raw), median, raw) - mean) / scale
+            columns[:, j] = j
+
+        offset = len(self.numeric)
+        for j, (column, categories) in enumerate(self.categorical, start=len(self.numeric)):
+            codes = pd.Categorical(_text(df[column]), categories=categories).codes
+            columns[:, j] = np.where(codes >= 0, offset + codes, -1)
+            offset += len(categories)
+
+        # Columns increase along each row by construction, so the
+        # row-major flattening is already in CSR order
+        present = columns >= 0
+        indptr = np.concatenate([[0], np.cumsum(present.sum(axis=1))])
+        return sp.csr_matrix((values[present], columns[present], indptr),
+                             shape=(n_rows, offset))
+
+
+def labels_of(df):
+    """Churn per row as LABEL_DTYPE, -1 where unknown."""
+    if TARGET_COL not in df.columns:
+        return np.full(len(df), -1, dtype=LABEL_DTYPE)
+    return pd.to_numeric(df[TARGET_COL], errors='coerce').fillna(-1).to_numpy().astype(LABEL_DTYPE)
+
+
+def split_rows(labels):
+    """
+    (train_rows, test_rows): the notebook's stratified split of the labelled rows.
+
+    Positions index into `labels`; rows with an unknown label (-1) are
+    on neither side.
+    """
+    from sklearn.model_selection import train_test_split
+
+    labels = np.asarray(labels)
+    labelled = np.flatnonzero(labels >= 0)
+    return train_test_split(labelled, test_size=TEST_SIZE, random_state=RANDOM_STATE,
+                            stratify=labels[labelled])
+
+
+def _text(series):
+    """Text values with missing entries as MISSING (the notebook's constant imputer)."""
+    return series.astype(object).where(series.notna(), MISSING).astype(str).to_numpy()
+
+
+def _write_json(path, data):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    tmp_path.replace(path)
+
+
+class FeatureStore:
+    """The encoded customers on disk; see the module docstring."""
+
+    def __init__(self, root=FEATURES_DIR):
+        self.root = Path(root)
+
+    def exists(self):
+        return (self.root / SCHEMA_NAME).exists() and (self.root / META_NAME).exists()
+
+    @property
+    def schema(self):
+        with open(self.root / SCHEMA_NAME) as f:
+            return FeatureSchema.from_dict(json.load(f))
+
+    @property
+    def meta(self):
+        with open(self.root / META_NAME) as f:
+            return json.load(f)
+
+    def build(self, df, schema=None):
+        """
+        Write every row of `df`, replacing the store.
+
+        Unless `schema` is given it is fitted on the training rows of
+        `split_rows`, so the held-out rows do not leak into the encoding.
+        """
+        if schema is None:
+            train_rows, _ = split_rows(labels_of(df))
+            schema = FeatureSchema.fit(df.iloc[train_rows])
+        self.root.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_FILES:
+            open(self.root / name, 'wb').close()
+        _write_json(self.root / SCHEMA_NAME, schema.to_dict())
+        meta = {'format': STORE_FORMAT, 'schema_version': schema.version,
+                'rows': 0, 'nnz': 0, 'revision': 0, 'fit_rows': len(df)}
+        # An empty indptr still holds the leading 0
+        np.zeros(1, dtype=self._index_dtype(meta)).tofile(self.root / 'indptr.bin')
+        _write_json(self.root / META_NAME, meta)
+        return self._append(df, schema, meta)
+
+    def append(self, df):
+        """
+        Encode and append the customers of `df` not yet in the store.
+
+        Returns the number of rows added.
+        """
+        meta = self.meta
+        ids = self._array('ids.bin', ID_DTYPE, meta['rows'])
+        new = ~np.isin(_ids(df), ids)
+        return self._append(df[new], self.schema, meta)
+
+    @staticmethod
+    def _index_dtype(meta):
+        return np.dtype(meta.get('index_dtype', 'int32'))
+
+    def _append(self, df, schema, meta):
+        if df.empty:
+            return 0
+        X = schema.transform(df)
+        index_dtype = self._index_dtype(meta)
+        if meta['nnz'] + X.nnz > np.iinfo(index_dtype).max:
+            raise ValueError("Feature store is full for 32-bit indices; rebuild it")
+
+        # Drop anything a failed append may have left past the committed sizes
+        sizes = {'data.bin': meta['nnz'] * VALUE_DTYPE.itemsize,
+                 'indices.bin': meta['nnz'] * index_dtype.itemsize,
+                 'indptr.bin': (meta['rows'] + 1) * index_dtype.itemsize,
+                 'labels.bin': meta['rows'] * LABEL_DTYPE.itemsize,
+                 'ids.bin': meta['rows'] * ID_DTYPE.itemsize}
+        for name, size in sizes.items():
+            os.truncate(self.root / name, size)
+
+        arrays = {
+            'data.bin': X.data.astype(VALUE_DTYPE, copy=False),
+            'indices.bin': X.indices.astype(index_dtype),
+            'indptr.bin': (X.indptr[1:] + meta['nnz']).astype(index_dtype),
+            'labels.bin': labels_of(df),
+            'ids.bin': _ids(df),
+        }
+        for name, array in arrays.items():
+            with open(self.root / name, 'ab') as f:
+                array.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+
+        meta = dict(meta, rows=meta['rows'] + X.shape[0], nnz=meta['nnz'] + X.nnz,
+                    revision=meta['revision'] + 1)
+        _write_json(self.root / META_NAME, meta)
+        return X.shape[0]
+
+    def _array(self, name, dtype, length):
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.root / name, dtype=dtype, mode='r', shape=(length,))
+
+    def load(self):
+        """
+        (X, y, ids) memory-mapped from disk.
+
+        X is a read-only CSR matrix over the mapped arrays (no copy), y
+        the Churn labels (-1 where unknown) and ids the customerIDs as
+        bytes.
+        """
+        meta, schema = self.meta, self.schema
+        index_dtype = self._index_dtype(meta)
+        data = self._array('data.bin', VALUE_DTYPE, meta['nnz'])
+        indices = self._array('indices.bin', index_dtype, meta['nnz'])
+        indptr = np.memmap(self.root / 'indptr.bin', dtype=index_dtype, mode='r',
+                           shape=(meta['rows'] + 1,))
+        X = sp.csr_matrix((data, indices, indptr),
+                          shape=(meta['rows'], len(schema.feature_names)), copy=False)
+        return (X, self._array('labels.bin', LABEL_DTYPE, meta['rows']),
+                self._array('ids.bin', ID_DTYPE, meta['rows']))
+
+    def split(self):
+        """
+        (train_rows, test_rows) over the stored rows.
+
+        The test rows are the held-out side of `split_rows` over the
+        first fit_rows rows, the ones the schema was fitted around;
+        labelled rows appended since are training rows.
+        """
+        meta = self.meta
+        labels = np.asarray(self._array('labels.bin', LABEL_DTYPE, meta['rows']))
+        fit_rows = meta['fit_rows']
+        train_rows, test_rows = split_rows(labels[:fit_rows])
+        appended = fit_rows + np.flatnonzero(labels[fit_rows:] >= 0)
+        return np.concatenate([train_rows, appended]), test_rows
+
+
+def _ids(df):
+    ids = df[ID_COL].astype(str)
+    if len(ids) and ids.str.len().max() > ID_WIDTH:
+        raise ValueError(f"customerID longer than {ID_WIDTH} characters")
+    return ids.to_numpy().astype(ID_DTYPE)
+
+
+def update_store(df, root=FEATURES_DIR, rebuild=False):
+    """Build the store from `df`, or append its new customers. Returns (rows added, store)."""
+    store = FeatureStore(root)
+    if rebuild or not store.exists() or store.meta.get('format') != STORE_FORMAT:
+        return store.build(df), store
+    return store.append(df), store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encode the cleaned customers into the feature store.")
+    parser.add_argument("--input", type=Path, default=None,
+                        help="Cleaned customer file (default: the churn.data columnar cache)")
+    parser.add_argument("--store", type=Path, default=FEATURES_DIR,
+                        help="Feature store directory (default: %(default)s)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Refit the schema and re-encode every customer")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = load_customers() if args.input is None else read_cleaned(args.input)
+    added, store = update_store(df, args.store, args.rebuild)
+    meta = store.meta
+    print(f"Added {added:,} rows: {meta['rows']:,} customers x "
+          f"{len(store.schema.feature_names)} features, {meta['nnz']:,} non-zeros, "
+          f"schema {meta['schema_version']}, revision {meta['revision']} "
+          f"({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
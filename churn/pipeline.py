@@ -0,0 +1,399 @@
+"""
+Incremental runner for the analysis pipeline.
+
+The scripted stages form a DAG:
+
+    raw CSV -> clean -> store -> one stage per query in sql/churn_analysis_queries.sql
+                     -> features (encoded feature store, data/processed/features)
+                     -> train (grid search models)
+                     -> score (customers_scored.csv, with the saved baseline model)
+                     -> excel (excel/churn_analysis_dynamic.xlsx, after score for the
+                              retention simulation)
+                     -> charts (visualizations/*.png)
+
+Every stage has a key: a SHA-256 over its command, its code files, its
+input files (including the outputs of the stages it depends on) and any
+parameters. A query stage's parameter is the text of that one query, so
+editing one query re-runs one export. A stage runs only when its key
+differs from the last successful run or its outputs were changed.
+
+Outputs of each run are copied into an artifact cache under
+.cache/pipeline, keyed by the stage key. Going back to a previous state
+restores outputs from the cache instead of recomputing them. The cache
+is bounded in size and evicts least recently used entries.
+
+File hashes are remembered with the file's size and mtime, so an
+up-to-date pipeline is checked without reading any data. Independent
+stages run in parallel. The notebooks themselves are not stages: they
+mount Google Drive and are run interactively.
+
+Usage:
+    python -m churn.pipeline                 # bring everything up to date
+    python -m churn.pipeline excel queries   # only these stages (and what they need)
+    python -m churn.pipeline --dry-run       # show what would run
+    python -m churn.pipeline --list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from churn.charts import CHARTS, MANIFEST_NAME, VISUALIZATIONS_DIR
+from churn.data import CLEANED_CSV, CLEANED_FEATHER, PROCESSED_DIR, RAW_PATH, REPORT_PATH
+from churn.queries import EXPORT_DIR, QUERIES_PATH, load_queries
+from churn.retention import SCORED_CSV
+from churn.store import DB_PATH
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STATE_DIR = PROJECT_ROOT / ".cache" / "pipeline"
+DEFAULT_CACHE_MB = 1024
+
+MODELS_DIR = PROJECT_ROOT / "models"
+BASELINE_MODEL = MODELS_DIR / "logreg_baseline.joblib"
+WORKBOOK_PATH = PROJECT_ROOT / "excel" / "churn_analysis_dynamic.xlsx"
+# File names churn.train --save uses for the grid search; spelled out so
+# the runner does not import scikit-learn just to check for staleness
+TRAINED_MODELS = [MODELS_DIR / f"{name}_grid.joblib" for name in ('random_forest', 'svm', 'knn')]
+# churn.features files, for the same reason (scipy)
+FEATURE_STORE = [PROCESSED_DIR / "features" / name for name in
+                 ('schema.json', 'meta.json', 'data.bin', 'indices.bin', 'indptr.bin',
+                  'labels.bin', 'ids.bin')]
+
+# Stage groups usable as targets on the command line
+QUERY_GROUP = 'queries'
+
+
+class Stage:
+    """
+    One step of the pipeline: a command and the files it reads and writes.
+
+    `command` is run as ``python <command...>`` from the project root.
+    `inputs` are data files, `code` the source files whose changes make
+    the stage stale, `params` any other text that is part of the key.
+    The outputs of `deps` are implicit inputs.
+    """
+
+    def __init__(self, name, command, outputs, inputs=(), code=(), deps=(), params=''):
+        self.name = name
+        self.command = list(command)
+        self.outputs = [Path(p) for p in outputs]
+        self.inputs = [Path(p) for p in inputs]
+        self.code = [PROJECT_ROOT / p for p in code]
+        self.deps = list(deps)
+        self.params = params
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def default_stages(queries_path=QUERIES_PATH):
+    """The pipeline's stages in dependency order, keyed by name."""
+    stages = [
+        Stage('clean', ['-m', 'churn.data'],
+              outputs=[CLEANED_CSV, CLEANED_FEATHER, REPORT_PATH], inputs=[RAW_PATH],
+              code=['churn/data.py', 'churn/cleaning.py']),
+        Stage('store', ['-m', 'churn.store'],
+              outputs=[DB_PATH], code=['churn/store.py'], deps=['clean']),
+        Stage('features', ['-m', 'churn.features'],
+              outputs=FEATURE_STORE, code=['churn/features.py'], deps=['clean']),
+        Stage('train', ['-m', 'churn.train', '--save'],
+              outputs=TRAINED_MODELS, code=['churn/train.py'], deps=['clean']),
+        Stage('score', ['-m', 'churn.score', _relative(CLEANED_CSV), _relative(SCORED_CSV)],
+              outputs=[SCORED_CSV], inputs=[BASELINE_MODEL], code=['churn/score.py'],
+              deps=['clean']),
+        Stage('excel', ['scripts/create_enhanced_excel.py'],
+              outputs=[WORKBOOK_PATH],
+              code=['scripts/create_enhanced_excel.py', 'churn/segments.py', 'churn/retention.py'],
+              deps=['clean', 'score']),
+        Stage('charts', ['-m', 'churn.charts'],
+              outputs=[VISUALIZATIONS_DIR / f"{name}.png" for name in CHARTS]
+              + [VISUALIZATIONS_DIR / MANIFEST_NAME],
+              code=['churn/charts.py', 'churn/segments.py'], deps=['clean']),
+    ]
+    for name, sql in load_queries(queries_path).items():
+        stages.append(Stage(name, ['-m', 'churn.queries', name],
+                            outputs=[EXPORT_DIR / f"{name}.csv"], code=['churn/queries.py'],
+                            deps=['store'], params=sql))
+    return {stage.name: stage for stage in stages}
+
+
+def _relative(path):
+    path = Path(path)
+    try:
+        return path.resolve().relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+class FileHasher:
+    """SHA-256 of files, re-read only when their size or mtime changed."""
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def __call__(self, path):
+        """Hex digest of `path`, or None if it does not exist."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = _relative(path)
+        cached = self.known.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.known[key] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Stage outputs stored by stage key, bounded by size with LRU eviction.
+
+    Each entry is a directory <root>/<key> holding copies of the outputs
+    at their project-relative paths; index.json records each entry's
+    size and last use.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        index_path = self.root / "index.json"
+        self.index = json.loads(index_path.read_text()) if index_path.exists() else {}
+
+    def __contains__(self, key):
+        return key in self.index and (self.root / key).is_dir()
+
+    def store(self, key, stage_name, outputs):
+        entry = self.root / key
+        tmp = self.root / f"{key}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        size = 0
+        for path in outputs:
+            target = tmp / _relative(path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, target)
+            size += target.stat().st_size
+        shutil.rmtree(entry, ignore_errors=True)
+        tmp.rename(entry)
+        with self._lock:
+            self.index[key] = {'stage': stage_name, 'bytes': size, 'used': time.time()}
+            self._evict()
+
+    def restore(self, key, outputs):
+        """Copy the cached outputs of `key` back into place."""
+        for path in outputs:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(self.root / key / _relative(path), path)
+        self.touch(key)
+
+    def touch(self, key):
+        with self._lock:
+            if key in self.index:
+                self.index[key]['used'] = time.time()
+
+    def size(self):
+        return sum(entry['bytes'] for entry in self.index.values())
+
+    def _evict(self):
+        total = self.size()
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]['used']):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            del self.index[key]
+            total -= entry['bytes']
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            (self.root / "index.json").write_text(json.dumps(self.index, indent=1))
+
+
+class Pipeline:
+    """Runs the stale stages of a stage graph, in parallel where possible."""
+
+    def __init__(self, stages, state_dir=STATE_DIR, cache_bytes=DEFAULT_CACHE_MB << 20):
+        self.stages = stages
+        self.state_dir = Path(state_dir)
+        state_path = self.state_dir / "state.json"
+        state = json.loads(state_path.read_text()) if state_path.exists() else {}
+        self.hasher = FileHasher(state.get('files'))
+        self.records = state.get('stages', {})
+        self.cache = ArtifactCache(self.state_dir / "artifacts", cache_bytes)
+
+    def select(self, targets=None):
+        """Names of `targets` and everything they depend on, in dependency order."""
+        if not targets:
+            return list(self.stages)
+        wanted, pending = set(), []
+        for target in targets:
+            if target == QUERY_GROUP:
+                pending.extend(name for name in self.stages if name.startswith('query_'))
+            elif target in self.stages:
+                pending.append(target)
+            else:
+                raise KeyError(f"Unknown stage '{target}'")
+        while pending:
+            name = pending.pop()
+            if name not in wanted:
+                wanted.add(name)
+                pending.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in wanted]
+
+    def key(self, stage):
+        """Content key of `stage` given the current state of its inputs."""
+        inputs = list(stage.inputs)
+        for dep in stage.deps:
+            inputs.extend(self.stages[dep].outputs)
+        payload = {
+            'command': stage.command,
+            'params': stage.params,
+            'code': {_relative(p): self.hasher(p) for p in stage.code},
+            'inputs': {_relative(p): self.hasher(p) for p in inputs},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def is_fresh(self, stage, key):
+        record = self.records.get(stage.name)
+        if not record or record['key'] != key:
+            return False
+        return all(self.hasher(path) == record['outputs'].get(_relative(path))
+                   for path in stage.outputs)
+
+    def _record(self, stage, key):
+        self.records[stage.name] = {
+            'key': key,
+            'outputs': {_relative(p): self.hasher(p) for p in stage.outputs},
+        }
+
+    def _execute(self, stage, force=False, dry_run=False):
+        """Bring one stage up to date. Returns (status, seconds)."""
+        start = time.perf_counter()
+        key = self.key(stage)
+        if not force and self.is_fresh(stage, key):
+            self.cache.touch(key)
+            return 'fresh', time.perf_counter() - start
+        if dry_run:
+            return 'stale', time.perf_counter() - start
+        if not force and key in self.cache:
+            self.cache.restore(key, stage.outputs)
+            self._record(stage, key)
+            return 'restored', time.perf_counter() - start
+
+        log_path = self.state_dir / "logs" / f"{stage.name}.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, 'w') as log:
+            result = subprocess.run([sys.executable, *stage.command], cwd=PROJECT_ROOT,
+                                    stdout=log, stderr=subprocess.STDOUT)
+        missing = [p for p in stage.outputs if not Path(p).exists()]
+        if result.returncode != 0 or missing:
+            return 'failed', time.perf_counter() - start
+
+        self._record(stage, key)
+        self.cache.store(key, stage.name, stage.outputs)
+        return 'ran', time.perf_counter() - start
+
+    def run(self, targets=None, jobs=None, force=False, dry_run=False, report=print):
+        """
+        Bring `targets` (default: every stage) up to date.
+
+        Each stage starts as soon as its dependencies are done. A failed
+        stage skips everything downstream of it. Returns {name: status}.
+        """
+        selected = self.select(targets)
+        status = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            while len(status) < len(selected):
+                for name in selected:
+                    if name in status or name in running:
+                        continue
+                    deps = self.stages[name].deps
+                    if any(status.get(dep) in ('failed', 'skipped') for dep in deps):
+                        status[name] = 'skipped'
+                        report(f"   {'[skipped]':<11}{name} (upstream failure)")
+                    elif dry_run and any(status.get(dep) == 'stale' for dep in deps):
+                        status[name] = 'stale'
+                        report(f"   {'[stale]':<11}{name} (upstream)")
+                    elif all(dep in status for dep in deps if dep in selected):
+                        running[name] = pool.submit(self._execute, self.stages[name],
+                                                    force, dry_run)
+                if not running:
+                    continue
+                done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name, future in list(running.items()):
+                    if future in done:
+                        del running[name]
+                        status[name], seconds = future.result()
+                        suffix = (f"; see {self.state_dir / 'logs' / (name + '.log')}"
+                                  if status[name] == 'failed' else '')
+                        label = f"[{status[name]}]"
+                        report(f"   {label:<11}{name} ({seconds:.2f}s{suffix})")
+        if not dry_run:
+            self.save()
+        return status
+
+    def save(self):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        state = {'files': self.hasher.known, 'stages': self.records}
+        tmp_path = self.state_dir / "state.json.tmp"
+        tmp_path.write_text(json.dumps(state, indent=1))
+        tmp_path.replace(self.state_dir / "state.json")
+        self.cache.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run the stale stages of the analysis pipeline.")
+    parser.add_argument("targets", nargs="*",
+                        help=f"Stages to bring up to date, or '{QUERY_GROUP}' (default: all)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Stages run in parallel (default: one per CPU)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-run the selected stages even if they are up to date")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report which stages are stale")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_MB,
+                        help="Artifact cache limit in MB (default: %(default)s)")
+    parser.add_argument("--list", action="store_true",
+                        help="List the stages and their dependencies")
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline(default_stages(), cache_bytes=args.cache_size << 20)
+    if args.list:
+        for stage in pipeline.stages.values():
+            print(f"   {stage.name:<40} <- {', '.join(stage.deps) or '(raw data)'}")
+        return
+
+    try:
+        selected = pipeline.select(args.targets)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    start = time.perf_counter()
+    status = pipeline.run(selected, args.jobs, args.force, args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for value in status.values():
+        counts[value] = counts.get(value, 0) + 1
+    summary = ", ".join(f"{n} {value}" for value, n in sorted(counts.items()))
+    print(f"\n{len(status)} stages: {summary} ({elapsed:.2f}s, "
+          f"cache {pipeline.cache.size() / (1 << 20):.1f} MB)")
+    raise SystemExit(1 if counts.get('failed') else 0)
+
+
+if __name__ == "__main__":
+    main()
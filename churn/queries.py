@@ -0,0 +1,276 @@
+"""
+Named queries from sql/churn_analysis_queries.sql.
+
+The .sql file is split into its statements. Each one is named after its
+position and the comment line just above it, e.g.
+``query_01_churn_rate_by_contract_type``. The notebook's ``Query NN:``
+prefixes are dropped from the names. Results are exported as one CSV per
+query, like 02_sql_analysis.ipynb does, from read-only connections to
+the churn.store database.
+
+Queries run concurrently on a small pool of read-only connections, one
+per worker thread (sqlite3 releases the GIL while a statement runs).
+Each result is cached under .cache/queries, keyed by the query text and
+the database's content version (the size and mtime of the database and
+its WAL), so an unchanged query on an unchanged database is copied from
+the cache instead of re-run. Every query is also run through EXPLAIN
+QUERY PLAN; plans that scan the customers table row by row instead of
+through an index are flagged.
+
+Usage:
+    python -m churn.queries                                   # export every query
+    python -m churn.queries query_01_churn_rate_by_contract_type
+    python -m churn.queries --explain --workers 4
+    python -m churn.queries --list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from churn.data import PROCESSED_DIR
+from churn.store import DB_PATH, TABLE, connect
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+QUERIES_PATH = PROJECT_ROOT / "sql" / "churn_analysis_queries.sql"
+EXPORT_DIR = PROCESSED_DIR / "sql"
+CACHE_DIR = PROJECT_ROOT / ".cache" / "queries"
+DEFAULT_WORKERS = 4
+
+# "SCAN customers" without "USING [COVERING] INDEX": every row is read
+_FULL_SCAN = re.compile(rf"^SCAN (TABLE )?{TABLE}\b(?!.*\bUSING\b)")
+
+_SEPARATOR = re.compile(r"^-{3,}\s*$")
+_QUERY_PREFIX = re.compile(r"^query\s+\d+\s*:\s*", re.IGNORECASE)
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", _QUERY_PREFIX.sub("", text).lower()).strip("_")
+
+
+def parse_queries(text):
+    """
+    Split SQL text into {name: statement}, in file order.
+
+    A statement runs until a line ending in ';'. Its name comes from the
+    last comment line before it, with separators skipped.
+    """
+    queries = {}
+    description, lines = "", []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not lines and stripped.startswith("--"):
+            if not _SEPARATOR.match(stripped):
+                description = stripped.lstrip("-").strip()
+            continue
+        if not lines and not stripped:
+            continue
+        lines.append(line.rstrip())
+        if stripped.endswith(";"):
+            name = f"query_{len(queries) + 1:02d}"
+            if _slug(description):
+                name += f"_{_slug(description)}"
+            queries[name] = "\n".join(lines).rstrip(";").strip()
+            description, lines = "", []
+    return queries
+
+
+def load_queries(path=QUERIES_PATH):
+    """Named queries of a .sql file; see parse_queries."""
+    return parse_queries(Path(path).read_text(encoding="utf-8"))
+
+
+def export_query(conn, name, sql, output_dir=EXPORT_DIR):
+    """Run one query and write its result to <output_dir>/<name>.csv."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{name}.csv"
+    pd.read_sql_query(sql, conn).to_csv(path, index=False)
+    return path
+
+
+def database_version(db_path=DB_PATH):
+    """
+    Content version of a database: changes whenever its data may have.
+
+    Built from the size and mtime of the database file and its WAL. A
+    checkpoint changes it without changing the data, which only costs a
+    cache miss.
+    """
+    parts = []
+    for path in (Path(db_path), Path(f"{db_path}-wal")):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            parts.append(None)
+            continue
+        parts.append([st.st_size, st.st_mtime_ns])
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:16]
+
+
+def query_plan(conn, sql):
+    """EXPLAIN QUERY PLAN detail lines of a statement."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def full_scans(plan):
+    """Plan lines that read the customers table without an index."""
+    return [line for line in plan if _FULL_SCAN.match(line)]
+
+
+class ResultCache:
+    """
+    Query results on disk, keyed by database version and query text.
+
+    Entries are <version>-<query hash>.csv with a .json sidecar holding
+    the row count and original run time. Entries of other database
+    versions can never be hit again and are removed by `prune`.
+    """
+
+    def __init__(self, root=CACHE_DIR, version=''):
+        self.root = Path(root)
+        self.version = version
+
+    def _path(self, sql, suffix):
+        digest = hashlib.sha256(sql.encode('utf-8')).hexdigest()[:32]
+        return self.root / f"{self.version}-{digest}{suffix}"
+
+    def get(self, sql):
+        """(CSV path, metadata) of a cached result, or None."""
+        csv_path, meta_path = self._path(sql, '.csv'), self._path(sql, '.json')
+        if not (csv_path.exists() and meta_path.exists()):
+            return None
+        with open(meta_path) as f:
+            return csv_path, json.load(f)
+
+    def put(self, sql, result_path, meta):
+        self.root.mkdir(parents=True, exist_ok=True)
+        csv_path, meta_path = self._path(sql, '.csv'), self._path(sql, '.json')
+        # Copy then rename, so a concurrent reader never sees half a file
+        tmp_path = csv_path.with_name(csv_path.name + '.tmp')
+        shutil.copyfile(result_path, tmp_path)
+        tmp_path.replace(csv_path)
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+
+    def prune(self):
+        if not self.root.exists():
+            return
+        for path in self.root.iterdir():
+            if not path.name.startswith(f"{self.version}-"):
+                path.unlink(missing_ok=True)
+
+
+def _run_one(connections, name, sql, output_dir, cache, explain):
+    """Worker: export one query (or copy it from the cache) on a pooled connection."""
+    conn = connections.get()
+    try:
+        start = time.perf_counter()
+        plan = query_plan(conn, sql) if explain else []
+        hit = cache.get(sql) if cache else None
+        path = Path(output_dir) / f"{name}.csv"
+        if hit:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(hit[0], path)
+            rows = hit[1]['rows']
+        else:
+            df = pd.read_sql_query(sql, conn)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_csv(path, index=False)
+            rows = len(df)
+        seconds = time.perf_counter() - start
+        if cache and not hit:
+            cache.put(sql, path, {'name': name, 'rows': rows, 'seconds': seconds})
+        return {'name': name, 'path': path, 'rows': rows, 'seconds': seconds,
+                'cached': bool(hit), 'plan': plan, 'full_scans': full_scans(plan)}
+    finally:
+        connections.put(conn)
+
+
+def run_queries(queries, db_path=DB_PATH, output_dir=EXPORT_DIR, workers=DEFAULT_WORKERS,
+                cache_dir=CACHE_DIR, explain=True):
+    """
+    Export `queries` ({name: sql}) concurrently; see the module docstring.
+
+    With cache_dir=None every query is run. Returns one dict per query,
+    in the order of `queries`, with name, path, rows, seconds, cached,
+    plan and full_scans.
+    """
+    workers = max(1, min(workers, len(queries)))
+    cache = ResultCache(cache_dir, database_version(db_path)) if cache_dir else None
+    connections = queue.Queue()
+    for _ in range(workers):
+        connections.put(connect(db_path, read_only=True, check_same_thread=False))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_one, connections, name, sql, output_dir, cache, explain)
+                       for name, sql in queries.items()]
+            results = [future.result() for future in futures]
+    finally:
+        while not connections.empty():
+            connections.get().close()
+    if cache:
+        cache.prune()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the analysis queries to CSV.")
+    parser.add_argument("names", nargs="*",
+                        help="Queries to run (default: all; see --list)")
+    parser.add_argument("--sql", type=Path, default=QUERIES_PATH,
+                        help="SQL file (default: %(default)s)")
+    parser.add_argument("--db", type=Path, default=DB_PATH,
+                        help="SQLite database (default: %(default)s)")
+    parser.add_argument("--output-dir", type=Path, default=EXPORT_DIR,
+                        help="Directory for the CSV results (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Concurrent read connections (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Run every query, ignoring and not updating the result cache")
+    parser.add_argument("--explain", action="store_true",
+                        help="Print each query's EXPLAIN QUERY PLAN")
+    parser.add_argument("--list", action="store_true",
+                        help="Only list the query names")
+    args = parser.parse_args(argv)
+
+    queries = load_queries(args.sql)
+    if args.list:
+        print("\n".join(queries))
+        return
+    unknown = [name for name in args.names if name not in queries]
+    if unknown:
+        parser.error(f"unknown queries: {', '.join(unknown)}")
+
+    selected = {name: queries[name] for name in args.names or queries}
+    start = time.perf_counter()
+    results = run_queries(selected, args.db, args.output_dir, args.workers,
+                          None if args.no_cache else CACHE_DIR)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        status = '[cached]' if result['cached'] else '[ran]'
+        print(f"   {status:<8} {result['name']}: {result['path']} "
+              f"({result['rows']:,} rows, {result['seconds']:.3f}s)")
+        for line in result['full_scans']:
+            print(f"            [FULL SCAN] {line}")
+        if args.explain:
+            for line in result['plan']:
+                print(f"            plan: {line}")
+    cached = sum(result['cached'] for result in results)
+    scans = sum(bool(result['full_scans']) for result in results)
+    print(f"{len(results)} queries: {len(results) - cached} ran, {cached} cached, "
+          f"{scans} with full scans of {TABLE} ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Customer Churn Analysis - Batch Scoring
+=======================================
+Scores a customer file of any size with a saved churn pipeline.
+
+The input (CSV or Parquet) is read in fixed-size chunks, each chunk gets
+one predict_proba call (the label is derived from the probability
+instead of a second predict pass), risk segments are assigned in one
+vectorized step and results are appended to the output as they arrive.
+Memory is bounded by the chunk size; --workers spreads chunks over a
+process pool.
+
+With --features the input is a churn.features store instead: rows are
+sliced from the memory-mapped encoded matrix and passed straight to a
+model trained with `python -m churn.train --features`, skipping the
+pandas encoding. The output then holds customerID and the prediction
+columns.
+
+Usage:
+    python -m churn.score data/processed/customers_cleaned.csv scored.csv
+    python -m churn.score customers.parquet scored.parquet --workers 8
+    python -m churn.score data/processed/features scored.csv --features \
+        --model models/random_forest_grid_features.joblib
+"""
+
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MODEL_PATH = PROJECT_ROOT / "models" / "logreg_baseline.joblib"
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_THRESHOLD = 0.5
+
+# Same cut-offs as assign_risk_segment in 04_dashboard_prep.ipynb
+RISK_BINS = [(0.70, 'High Risk'), (0.40, 'Medium Risk')]
+LOW_RISK = 'Low Risk'
+
+EXCLUDED_COLS = ('Churn', 'customerID')
+
+
+def assign_risk_segments(probabilities):
+    """Vectorized risk segment labels for an array of churn probabilities."""
+    probabilities = np.asarray(probabilities)
+    return np.select([probabilities >= cutoff for cutoff, _ in RISK_BINS],
+                     [label for _, label in RISK_BINS], default=LOW_RISK)
+
+
+def score_frame(model, df, threshold=DEFAULT_THRESHOLD):
+    """
+    Add prediction columns to one chunk of customers.
+
+    Adds ChurnProbability, ChurnProbability_Pct, ChurnPrediction and
+    RiskSegment, matching the columns exported by the dashboard notebook.
+    """
+    features = df.drop(columns=[c for c in EXCLUDED_COLS if c in df.columns])
+    return _add_predictions(df.copy(), model.predict_proba(features)[:, 1], threshold)
+
+
+def _add_predictions(scored, probabilities, threshold):
+    scored['ChurnPrediction'] = (probabilities >= threshold).astype('int8')
+    scored['ChurnProbability'] = probabilities
+    scored['ChurnProbability_Pct'] = (probabilities * 100).round(2)
+    scored['RiskSegment'] = assign_risk_segments(probabilities)
+    return scored
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most `chunk_size` rows from a CSV or Parquet file."""
+    path = Path(path)
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file as they are produced."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.parquet = self.path.suffix.lower() in ('.parquet', '.pq')
+        self._writer = None
+        self._started = False
+        self.rows = 0
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, mode='a' if self._started else 'w',
+                      header=not self._started, index=False)
+        self._started = True
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Per-process model, loaded once by the pool initializer
+_worker_model = None
+
+
+def _init_worker(model_path):
+    global _worker_model
+    _worker_model = joblib.load(model_path)
+
+
+def _score_in_worker(df, threshold):
+    return score_frame(_worker_model, df, threshold)
+
+
+def score_file(input_path, output_path, model_path=MODEL_PATH, chunk_size=DEFAULT_CHUNK_SIZE,
+               threshold=DEFAULT_THRESHOLD, workers=1):
+    """
+    Score `input_path` chunk by chunk and write the results to `output_path`.
+
+    With workers > 1 chunks are scored in a process pool. At most two
+    chunks per worker are in flight, and results are written in input
+    order, so memory stays bounded.
+
+    Returns the number of rows scored.
+    """
+    chunks = read_chunks(input_path, chunk_size)
+
+    with ChunkWriter(output_path) as writer:
+        if workers <= 1:
+            model = joblib.load(model_path)
+            for chunk in chunks:
+                writer.write(score_frame(model, chunk, threshold))
+            return writer.rows
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(model_path),)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_score_in_worker, chunk, threshold))
+                if len(pending) >= 2 * workers:
+                    writer.write(pending.popleft().result())
+            while pending:
+                writer.write(pending.popleft().result())
+        return writer.rows
+
+
+# ----------------------------------------------------------------------
+# Scoring from the feature store
+# ----------------------------------------------------------------------
+
+def check_feature_model(model, store):
+    """Raise ValueError unless `model` was trained on `store`'s feature schema."""
+    trained_on = getattr(model, 'feature_schema_', None)
+    current = store.meta['schema_version']
+    if trained_on != current:
+        raise ValueError(f"Model was trained on feature schema {trained_on}, "
+                         f"the store has {current}; retrain with churn.train --features")
+
+
+def score_rows(model, X, ids, start, stop, threshold=DEFAULT_THRESHOLD):
+    """Prediction columns for encoded rows start..stop-1 of a feature store."""
+    scored = pd.DataFrame({'customerID': ids[start:stop].astype(str)})
+    return _add_predictions(scored, model.predict_proba(X[start:stop])[:, 1], threshold)
+
+
+_worker_store = None
+
+
+def _init_store_worker(model_path, store_dir):
+    from churn.features import FeatureStore
+
+    global _worker_model, _worker_store
+    _worker_model = joblib.load(model_path)
+    _worker_store = FeatureStore(store_dir).load()
+
+
+def _score_rows_in_worker(start, stop, threshold):
+    X, _, ids = _worker_store
+    return score_rows(_worker_model, X, ids, start, stop, threshold)
+
+
+def score_features(store_dir, output_path, model_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                   threshold=DEFAULT_THRESHOLD, workers=1):
+    """
+    Score every customer in a feature store and write the results to `output_path`.
+
+    Same chunking and ordering as score_file; workers map the store
+    themselves, so only row ranges and results cross processes.
+
+    Returns the number of rows scored.
+    """
+    from churn.features import FeatureStore
+
+    store = FeatureStore(store_dir)
+    model = joblib.load(model_path)
+    check_feature_model(model, store)
+    X, _, ids = store.load()
+    ranges = [(start, min(start + chunk_size, X.shape[0]))
+              for start in range(0, X.shape[0], chunk_size)]
+
+    with ChunkWriter(output_path) as writer:
+        if workers <= 1:
+            for start, stop in ranges:
+                writer.write(score_rows(model, X, ids, start, stop, threshold))
+            return writer.rows
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_store_worker,
+                                 initargs=(str(model_path), str(store_dir))) as pool:
+            pending = deque()
+            for start, stop in ranges:
+                pending.append(pool.submit(_score_rows_in_worker, start, stop, threshold))
+                if len(pending) >= 2 * workers:
+                    writer.write(pending.popleft().result())
+            while pending:
+                writer.write(pending.popleft().result())
+        return writer.rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score customers with the saved churn model.")
+    parser.add_argument("input", type=Path,
+                        help="Customer file (.csv or .parquet), or a feature store with --features")
+    parser.add_argument("output", type=Path, help="Scored output file (.csv or .parquet)")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH,
+                        help="Saved sklearn pipeline (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per chunk (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Probability at or above which ChurnPrediction = 1 (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes scoring chunks in parallel (default: %(default)s)")
+    parser.add_argument("--features", action="store_true",
+                        help="Score the encoded rows of a churn.features store")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 70)
+    print("CUSTOMER CHURN - BATCH SCORING")
+    print("=" * 70)
+    print(f"Model:  {args.model}")
+    print(f"Input:  {args.input} ({args.chunk_size:,} rows per chunk, {args.workers} worker(s))")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    score = score_features if args.features else score_file
+    rows = score(args.input, args.output, args.model, args.chunk_size,
+                 args.threshold, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"Output: {args.output}")
+    print(f"\nScored {rows:,} customers in {elapsed:.2f}s "
+          f"({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
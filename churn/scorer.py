@@ -0,0 +1,259 @@
+"""
+Customer Churn Analysis - Low-Latency Scorer
+============================================
+In-process churn scoring for real-time use (e.g. retention offers).
+
+Sending one row through the sklearn Pipeline costs far more than the
+arithmetic involved because of DataFrame construction and per-call
+validation. ChurnScorer compiles the fitted logistic regression pipeline
+into flat arrays once:
+
+- numeric imputer medians, scaler means/scales and coefficients are
+  folded into one weight per numeric feature plus the intercept;
+- each one-hot encoded feature becomes a lookup table from category
+  value to its coefficient (unknown values contribute 0, as with
+  handle_unknown='ignore').
+
+score() and score_batch() then skip pandas entirely and match
+predict_proba to float tolerance.
+
+Usage:
+    python -m churn.scorer --benchmark
+"""
+
+import argparse
+import math
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from churn.data import load_customers, read_cleaned
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MODEL_PATH = PROJECT_ROOT / "models" / "logreg_baseline.joblib"
+
+
+def _steps(transformer):
+    """Flatten a transformer or Pipeline into its list of fitted steps."""
+    if hasattr(transformer, 'steps'):
+        return [step for _, step in transformer.steps]
+    return [transformer]
+
+
+class ChurnScorer:
+    """
+    Churn probability for one customer (a dict) or a batch of them.
+
+    Build it from a fitted Pipeline(preprocessor=ColumnTransformer,
+    classifier=LogisticRegression) with `from_pipeline`, or from a saved
+    model file with `load`.
+    """
+
+    def __init__(self, intercept, numeric_features, numeric_fill, numeric_center,
+                 numeric_weights, categorical_features, categorical_fill, category_weights):
+        self.intercept = float(intercept)
+        self.numeric_features = list(numeric_features)
+        self.numeric_fill = np.asarray(numeric_fill, dtype='float64')
+        self.numeric_center = np.asarray(numeric_center, dtype='float64')
+        self.numeric_weights = np.asarray(numeric_weights, dtype='float64')
+        self.categorical_features = list(categorical_features)
+        self.categorical_fill = list(categorical_fill)
+        self.category_weights = [dict(table) for table in category_weights]
+
+        # Plain-Python copies for the single-record path, where numpy
+        # scalar overhead would dominate
+        self._numeric = list(zip(self.numeric_features, self.numeric_fill.tolist(),
+                                 self.numeric_center.tolist(), self.numeric_weights.tolist()))
+        self._categorical = list(zip(self.categorical_features, self.categorical_fill,
+                                     self.category_weights))
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        return cls.from_pipeline(joblib.load(path))
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Compile a fitted preprocessing + logistic regression pipeline."""
+        preprocessor = pipeline.named_steps['preprocessor']
+        classifier = pipeline.named_steps['classifier']
+        if classifier.coef_.shape[0] != 1:
+            raise ValueError("ChurnScorer supports binary logistic regression only")
+        coef = classifier.coef_[0]
+        intercept = classifier.intercept_[0]
+
+        numeric_features, numeric_fill, numeric_center, numeric_weights = [], [], [], []
+        categorical_features, categorical_fill, category_weights = [], [], []
+
+        offset = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if isinstance(transformer, str):
+                if transformer == 'drop':
+                    continue
+                raise ValueError("ChurnScorer does not support passthrough columns")
+            columns = list(columns)
+            fill = [None] * len(columns)
+            center = np.zeros(len(columns))
+            scale = np.ones(len(columns))
+            encoder = None
+
+            for step in _steps(transformer):
+                kind = type(step).__name__
+                if kind == 'SimpleImputer':
+                    fill = list(step.statistics_)
+                elif kind == 'StandardScaler':
+                    # mean_ is set even with with_mean=False, so follow the flags
+                    if step.with_mean:
+                        center = step.mean_
+                    if step.with_std:
+                        scale = step.scale_
+                elif kind == 'OneHotEncoder':
+                    if step.drop_idx_ is not None or getattr(step, 'infrequent_categories_', None):
+                        raise ValueError("ChurnScorer needs OneHotEncoder(drop=None) without infrequent categories")
+                    encoder = step
+                else:
+                    raise ValueError(f"Unsupported preprocessing step: {kind}")
+
+            if encoder is None:
+                width = len(columns)
+                numeric_features += columns
+                numeric_fill += [float(v) if v is not None else np.nan for v in fill]
+                numeric_center += list(center)
+                # coef * (x - mean) / scale == (coef / scale) * (x - mean)
+                numeric_weights += list(coef[offset:offset + width] / scale)
+            else:
+                width = sum(len(c) for c in encoder.categories_)
+                pos = offset
+                for column, value, categories in zip(columns, fill, encoder.categories_):
+                    categorical_features.append(column)
+                    categorical_fill.append(value)
+                    category_weights.append(
+                        {category: float(w) for category, w in
+                         zip(categories.tolist(), coef[pos:pos + len(categories)])}
+                    )
+                    pos += len(categories)
+            offset += width
+
+        if offset != len(coef):
+            raise ValueError(f"Compiled {offset} features but the model has {len(coef)} coefficients")
+
+        return cls(intercept, numeric_features, numeric_fill, numeric_center, numeric_weights,
+                   categorical_features, categorical_fill, category_weights)
+
+    def score(self, record):
+        """Churn probability for one customer given as a dict."""
+        z = self.intercept
+        for column, fill, center, weight in self._numeric:
+            value = record.get(column)
+            if value is None or value == '':
+                value = fill
+            else:
+                value = float(value)
+                if value != value:
+                    value = fill
+            z += weight * (value - center)
+        for column, fill, table in self._categorical:
+            value = record.get(column)
+            if value is None or value != value:
+                value = fill
+            z += table.get(value, 0.0)
+        # Numerically stable logistic function
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def score_batch(self, records):
+        """Churn probabilities for a sequence of customer dicts, as an array."""
+        records = list(records)
+        n = len(records)
+        z = np.full(n, self.intercept)
+
+        if self.numeric_features:
+            values = np.array([[r.get(c) for c in self.numeric_features] for r in records],
+                              dtype='float64').reshape(n, len(self.numeric_features))
+            values = np.where(np.isnan(values), self.numeric_fill, values)
+            z += (values - self.numeric_center) @ self.numeric_weights
+
+        for column, fill, table in self._categorical:
+            get = table.get
+            z += np.fromiter(
+                (get(fill if (v := r.get(column)) is None or v != v else v, 0.0) for r in records),
+                dtype='float64', count=n,
+            )
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+def benchmark(model_path=MODEL_PATH, data_path=None, n_calls=2000):
+    """
+    Check ChurnScorer against predict_proba and time single-record calls.
+
+    Returns a dict with the maximum absolute difference and p50/p99
+    latencies (microseconds) for the scorer and the sklearn pipeline.
+    """
+    import pandas as pd
+
+    df = load_customers() if data_path is None else read_cleaned(data_path)
+    df = df.drop(columns=['Churn', 'customerID'], errors='ignore')
+    pipeline = joblib.load(model_path)
+    scorer = ChurnScorer.from_pipeline(pipeline)
+
+    records = df.to_dict('records')
+    expected = pipeline.predict_proba(df)[:, 1]
+    batch = scorer.score_batch(records)
+    single = np.array([scorer.score(r) for r in records])
+    max_diff = float(max(np.abs(batch - expected).max(), np.abs(single - expected).max()))
+
+    def latencies(fn, sample):
+        times = []
+        for record in sample:
+            start = time.perf_counter()
+            fn(record)
+            times.append(time.perf_counter() - start)
+        return np.percentile(np.array(times) * 1e6, [50, 99])
+
+    sample = [records[i % len(records)] for i in range(n_calls)]
+    scorer_p50, scorer_p99 = latencies(scorer.score, sample)
+    pipeline_p50, pipeline_p99 = latencies(
+        lambda r: pipeline.predict_proba(pd.DataFrame([r]))[:, 1], sample[:min(n_calls, 200)]
+    )
+    return {
+        'rows_checked': len(records),
+        'max_abs_diff': max_diff,
+        'scorer_p50_us': scorer_p50, 'scorer_p99_us': scorer_p99,
+        'pipeline_p50_us': pipeline_p50, 'pipeline_p99_us': pipeline_p99,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Low-latency churn scorer.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH,
+                        help="Saved sklearn pipeline (default: %(default)s)")
+    parser.add_argument("--data", type=Path, default=None,
+                        help="Customers used for the accuracy check (default: the churn.data cache)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare with predict_proba and report p50/p99 latency")
+    parser.add_argument("--calls", type=int, default=2000,
+                        help="Single-record calls timed in the benchmark (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if not args.benchmark:
+        scorer = ChurnScorer.load(args.model)
+        print(f"Compiled {len(scorer.numeric_features)} numeric and "
+              f"{len(scorer.categorical_features)} categorical features from {args.model}")
+        return
+
+    print("=" * 70)
+    print("CUSTOMER CHURN - SCORER BENCHMARK")
+    print("=" * 70)
+    result = benchmark(args.model, args.data, args.calls)
+    print(f"Rows checked:          {result['rows_checked']:,}")
+    print(f"Max |diff| vs sklearn: {result['max_abs_diff']:.2e}")
+    print(f"\n{'':<12}{'p50 (us)':>12}{'p99 (us)':>12}")
+    print(f"{'ChurnScorer':<12}{result['scorer_p50_us']:>12.1f}{result['scorer_p99_us']:>12.1f}")
+    print(f"{'Pipeline':<12}{result['pipeline_p50_us']:>12.1f}{result['pipeline_p99_us']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
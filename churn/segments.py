@@ -0,0 +1,232 @@
+"""
+Single-pass segment aggregation engine.
+
+Every churn-by-segment table in the project (Excel formula sheets, SQL
+summaries, dashboard exports) reduces to the same few numbers per segment:
+customers, churned, retained and MonthlyCharges sums. Instead of one
+groupby / GROUP BY / COUNTIFS scan per dimension, each dimension is
+encoded as integer codes and all dimensions are reduced together with
+``np.bincount`` over one flattened index.
+
+Example:
+    >>> summary = aggregate_segments(df)
+    >>> summary.table('Contract')
+    >>> summary.report('PaymentMethod')   # same columns as the SQL queries
+"""
+
+import numpy as np
+import pandas as pd
+
+CHURN_COL = 'Churn'
+CHARGES_COL = 'MonthlyCharges'
+TENURE_COL = 'tenure'
+
+TENURE_BUCKETS = [
+    ('0-12 months', 0, 12),
+    ('13-24 months', 13, 24),
+    ('25-36 months', 25, 36),
+    ('37-48 months', 37, 48),
+    ('49-60 months', 49, 60),
+    ('61-72 months', 61, 72),
+]
+
+SERVICE_COLUMNS = [
+    'OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
+    'TechSupport', 'StreamingTV', 'StreamingMovies',
+]
+
+# Dimensions aggregated by default. 'tenure_bucket' is derived from
+# TENURE_BUCKETS; every other name is a column of the customer table.
+DEFAULT_DIMENSIONS = [
+    'Contract', 'PaymentMethod', 'InternetService', 'SeniorCitizen',
+    TENURE_COL, 'tenure_bucket',
+] + SERVICE_COLUMNS
+
+MEASURES = ['customers', 'churned', 'retained', 'revenue', 'churned_revenue', 'retained_revenue']
+
+
+def flag_mask(series, positive=True):
+    """Boolean mask of a Yes/No flag stored either as 1/0 or as 'Yes'/'No'."""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return (series == (1 if positive else 0)).to_numpy()
+    return (series == ('Yes' if positive else 'No')).to_numpy()
+
+
+def tenure_bucket_codes(tenure, buckets=TENURE_BUCKETS):
+    """Bucket index of each tenure value; -1 outside every bucket or missing."""
+    tenure = pd.to_numeric(tenure, errors='coerce').to_numpy(dtype='float64')
+    lows = np.array([low for _, low, _ in buckets], dtype='float64')
+    highs = np.array([high for _, _, high in buckets], dtype='float64')
+
+    codes = np.searchsorted(lows, tenure, side='right') - 1
+    valid = (codes >= 0) & ~np.isnan(tenure)
+    valid[valid] &= tenure[valid] <= highs[codes[valid]]
+    return np.where(valid, codes, -1)
+
+
+def encode_dimension(df, dimension):
+    """
+    Encode one dimension as integer codes.
+
+    Returns (codes, categories); rows with a missing value get code -1.
+    """
+    if dimension == 'tenure_bucket':
+        labels = pd.Index([label for label, _, _ in TENURE_BUCKETS])
+        return tenure_bucket_codes(df[TENURE_COL]), labels
+    series = df[dimension]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Already encoded (columnar cache); reuse the codes instead of rehashing
+        series = series.cat.remove_unused_categories()
+        return series.cat.codes.to_numpy(dtype='int64'), pd.Index(series.cat.categories)
+    codes, categories = pd.factorize(series, sort=True)
+    return codes, categories
+
+
+class SegmentSummary:
+    """
+    Aggregates for every encoded dimension plus the overall totals.
+
+    `tables` maps each dimension to a DataFrame indexed by segment value
+    with one column per measure. Summaries of separate chunks of the
+    same data can be combined with `SegmentSummary.combine`.
+    """
+
+    def __init__(self, overall, tables):
+        self.overall = overall
+        self.tables = tables
+
+    @property
+    def dimensions(self):
+        return list(self.tables)
+
+    def table(self, dimension):
+        """Measures per segment of `dimension`."""
+        try:
+            return self.tables[dimension]
+        except KeyError:
+            raise KeyError(f"Dimension '{dimension}' was not aggregated") from None
+
+    def value(self, dimension, segment, measure):
+        """One measure for one segment (0 when the segment is absent)."""
+        column = self.table(dimension)[measure]
+        return column.get(segment, 0)
+
+    def between(self, dimension, low, high, measure):
+        """Sum of a measure over segments with low <= value <= high."""
+        table = self.table(dimension)
+        mask = (table.index >= low) & (table.index <= high)
+        return table.loc[mask, measure].sum()
+
+    def report(self, dimension):
+        """
+        Segment table in the shape of the SQL churn queries:
+        total_customers, churned_customers, retained_customers,
+        churn_rate_pct and avg_monthly_charge, sorted by churn rate.
+        """
+        table = self.table(dimension)
+        customers = table['customers']
+        report = pd.DataFrame({
+            'total_customers': customers,
+            'churned_customers': table['churned'],
+            'retained_customers': table['retained'],
+            'churn_rate_pct': (100.0 * table['churned'] / customers).round(2),
+            'avg_monthly_charge': (table['revenue'] / customers).round(2),
+        })
+        report.index.name = dimension
+        return report.sort_values('churn_rate_pct', ascending=False).reset_index()
+
+    @classmethod
+    def combine(cls, parts):
+        """Merge summaries computed on separate chunks of the same data."""
+        parts = list(parts)
+        overall = {key: sum(p.overall[key] for p in parts) for key in parts[0].overall}
+        tables = {}
+        for dimension in parts[0].tables:
+            frames = [p.tables[dimension] for p in parts]
+            combined = pd.concat(frames).groupby(level=0, sort=False).sum()
+            if dimension == 'tenure_bucket':
+                combined = combined.reindex(frames[0].index)
+            else:
+                combined = combined.sort_index()
+            combined.index.name = dimension
+            tables[dimension] = combined
+        return cls(overall, tables)
+
+
+def aggregate_segments(df, dimensions=None):
+    """
+    Aggregate churn measures for every dimension in one NumPy pass.
+
+    Each dimension is encoded as integer codes and shifted by an offset
+    so all dimensions share one code space. A single flattened index over
+    all (row, dimension) pairs then feeds one ``np.bincount`` per measure.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Customer table with Churn (1/0 or Yes/No) and MonthlyCharges.
+    dimensions : list of str, optional
+        Dimensions to aggregate; defaults to those present in `df`.
+
+    Returns
+    -------
+    SegmentSummary
+    """
+    if dimensions is None:
+        dimensions = [d for d in DEFAULT_DIMENSIONS
+                      if d in df.columns or (d == 'tenure_bucket' and TENURE_COL in df.columns)]
+
+    charges = pd.to_numeric(df[CHARGES_COL], errors='coerce').to_numpy(dtype='float64')
+    has_charge = ~np.isnan(charges)
+    charges = np.where(has_charge, charges, 0.0)
+    churned = flag_mask(df[CHURN_COL], True)
+    retained = flag_mask(df[CHURN_COL], False)
+
+    weights = {
+        'customers': None,
+        'churned': churned.astype('float64'),
+        'retained': retained.astype('float64'),
+        'revenue': charges,
+        'churned_revenue': charges * churned,
+        'retained_revenue': charges * retained,
+    }
+
+    overall = {
+        'customers': len(df),
+        'churned': int(churned.sum()),
+        'retained': int(retained.sum()),
+        'revenue': float(charges.sum()),
+        'churned_revenue': float(weights['churned_revenue'].sum()),
+        'retained_revenue': float(weights['retained_revenue'].sum()),
+        'charged': int(has_charge.sum()),
+    }
+
+    encoded = [encode_dimension(df, d) for d in dimensions]
+    sizes = [len(categories) for _, categories in encoded]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    n_codes = int(offsets[-1])
+
+    # (n_rows, n_dimensions) matrix of global codes, -1 where missing
+    codes = np.column_stack([
+        np.where(c >= 0, c + offsets[i], -1) for i, (c, _) in enumerate(encoded)
+    ]) if encoded else np.empty((len(df), 0), dtype='int64')
+    valid = codes >= 0
+    flat = codes[valid]
+    rows = np.nonzero(valid)[0]
+
+    sums = {}
+    for measure in MEASURES:
+        w = weights[measure]
+        sums[measure] = np.bincount(flat, weights=None if w is None else w[rows],
+                                    minlength=n_codes)
+
+    tables = {}
+    for i, (dimension, (_, categories)) in enumerate(zip(dimensions, encoded)):
+        lo, hi = offsets[i], offsets[i + 1]
+        table = pd.DataFrame({m: sums[m][lo:hi] for m in MEASURES}, index=categories)
+        for m in ('customers', 'churned', 'retained'):
+            table[m] = table[m].round().astype('int64')
+        table.index.name = dimension
+        tables[dimension] = table
+
+    return SegmentSummary(overall, tables)
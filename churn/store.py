@@ -0,0 +1,374 @@
+"""
+Persistent SQLite analytics store.
+
+01_data_exploration.ipynb writes the cleaned customers with
+``df.to_sql('customers', if_exists='replace')``: the whole table is
+rebuilt on every run, columns are untyped and there are no indexes, so
+each query in sql/churn_analysis_queries.sql scans every row.
+
+This module keeps the same ``customers`` table in
+data/processed/churn_analysis.db, but:
+
+- the schema is typed, with customerID as the primary key;
+- the segment columns have covering indexes of the form
+  (segment, Churn, MonthlyCharges), so the GROUP BY queries read only
+  the index;
+- loads are incremental. Each row carries a hash of its values, and
+  only new or changed customers are upserted, in batched transactions
+  via ``executemany``;
+- connections use WAL journaling and pragmas tuned for read-heavy
+  analytics;
+- per-segment summary tables (customers, churned, MonthlyCharges sum by
+  Contract, PaymentMethod and tenure) are kept up to date by triggers.
+  The segment queries therefore read O(#segments) rows instead of
+  aggregating every customer. ``check_summaries`` compares them with a
+  full recompute.
+
+Usage:
+    python -m churn.store                       # load the cleaned customers
+    python -m churn.store --input delta.csv     # apply a daily delta
+    python -m churn.store --check               # verify the summary tables
+"""
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from churn.data import PROCESSED_DIR, load_customers, read_cleaned
+
+DB_PATH = PROCESSED_DIR / "churn_analysis.db"
+TABLE = 'customers'
+ID_COL = 'customerID'
+HASH_COL = 'row_hash'
+
+# Bumped when the schema changes; older databases are rebuilt
+SCHEMA_VERSION = 1
+
+# Column order of customers_cleaned.csv with SQLite types
+CUSTOMER_SCHEMA = [
+    ('customerID', 'TEXT NOT NULL PRIMARY KEY'),
+    ('gender', 'TEXT'),
+    ('SeniorCitizen', 'INTEGER'),
+    ('Partner', 'INTEGER'),
+    ('Dependents', 'INTEGER'),
+    ('tenure', 'INTEGER'),
+    ('PhoneService', 'INTEGER'),
+    ('MultipleLines', 'TEXT'),
+    ('InternetService', 'TEXT'),
+    ('OnlineSecurity', 'TEXT'),
+    ('OnlineBackup', 'TEXT'),
+    ('DeviceProtection', 'TEXT'),
+    ('TechSupport', 'TEXT'),
+    ('StreamingTV', 'TEXT'),
+    ('StreamingMovies', 'TEXT'),
+    ('Contract', 'TEXT'),
+    ('PaperlessBilling', 'INTEGER'),
+    ('PaymentMethod', 'TEXT'),
+    ('MonthlyCharges', 'REAL'),
+    ('TotalCharges', 'REAL'),
+    ('Churn', 'INTEGER'),
+]
+COLUMNS = [name for name, _ in CUSTOMER_SCHEMA]
+
+# Segment columns the analysis queries group or filter by
+INDEXED_SEGMENTS = ['Contract', 'PaymentMethod', 'tenure', 'InternetService']
+
+# Materialized per-segment aggregates: dimension -> summary table
+SUMMARY_TABLES = {
+    'Contract': 'summary_contract',
+    'PaymentMethod': 'summary_payment_method',
+    'tenure': 'summary_tenure',
+}
+SUMMARY_MEASURES = ['customers', 'churned', 'monthly_charges']
+
+# Absolute tolerance for MonthlyCharges sums that have drifted through
+# many incremental float additions and subtractions
+SUMMARY_TOLERANCE = 1e-6
+
+DEFAULT_BATCH_SIZE = 10_000
+
+PRAGMAS = {
+    'journal_mode': 'WAL',       # readers never block the loader
+    'synchronous': 'NORMAL',     # safe with WAL, far fewer fsyncs
+    'temp_store': 'MEMORY',      # GROUP BY / ORDER BY scratch space
+    'cache_size': -64_000,       # ~64 MB page cache
+    'mmap_size': 256 * 1024 ** 2,
+}
+
+
+def connect(db_path=DB_PATH, read_only=False, check_same_thread=True):
+    """
+    Open the store with the analytics pragmas applied.
+
+    Pass check_same_thread=False for connections handed between threads
+    by a pool that guarantees one user at a time.
+    """
+    db_path = Path(db_path)
+    if read_only:
+        conn = sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True,
+                               check_same_thread=check_same_thread)
+    else:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    for pragma, value in PRAGMAS.items():
+        if read_only and pragma == 'journal_mode':
+            continue
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    return conn
+
+
+def create_schema(conn):
+    """
+    Create the typed customers table and its indexes.
+
+    A customers table from an older schema (e.g. the notebook's to_sql
+    dump, which has no primary key) is dropped and recreated, together
+    with the summary tables built from it (its triggers go with it).
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    existing = [row[1] for row in conn.execute(f"PRAGMA table_info({TABLE})")]
+    if existing and (version != SCHEMA_VERSION or HASH_COL not in existing):
+        with conn:
+            conn.execute(f"DROP TABLE {TABLE}")
+            for summary in SUMMARY_TABLES.values():
+                conn.execute(f"DROP TABLE IF EXISTS {summary}")
+
+    columns = ",\n    ".join(f"{name} {sql_type}" for name, sql_type in CUSTOMER_SCHEMA)
+    with conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} (\n    {columns},\n"
+                     f"    {HASH_COL} INTEGER NOT NULL\n)")
+        # Covering indexes: GROUP BY segment with COUNT/SUM(Churn)/AVG(MonthlyCharges)
+        # is answered from the index without touching the table
+        for column in INDEXED_SEGMENTS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_{column.lower()} "
+                         f"ON {TABLE} ({column}, Churn, MonthlyCharges)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_churn ON {TABLE} (Churn)")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _summary_upsert(summary, row):
+    """Trigger statement adding customer `row` (NEW or OLD) to a summary table."""
+    return (f"INSERT INTO {summary} (segment, customers, churned, monthly_charges) "
+            f"SELECT {{segment}}, 1, COALESCE({row}.Churn, 0), COALESCE({row}.MonthlyCharges, 0) "
+            f"WHERE {{segment}} IS NOT NULL "
+            f"ON CONFLICT(segment) DO UPDATE SET customers = customers + 1, "
+            f"churned = churned + excluded.churned, "
+            f"monthly_charges = monthly_charges + excluded.monthly_charges;")
+
+
+def _summary_remove(summary, row):
+    """Trigger statements taking customer `row` out of a summary table."""
+    return (f"UPDATE {summary} SET customers = customers - 1, "
+            f"churned = churned - COALESCE({row}.Churn, 0), "
+            f"monthly_charges = monthly_charges - COALESCE({row}.MonthlyCharges, 0) "
+            f"WHERE segment = {{segment}}; "
+            f"DELETE FROM {summary} WHERE segment = {{segment}} AND customers <= 0;")
+
+
+def create_summaries(conn, recompute=False):
+    """
+    Create the summary tables and the triggers that maintain them.
+
+    Tables that do not exist yet (every table, with `recompute`) are
+    filled with one GROUP BY over the customers table; from then on
+    every INSERT, UPDATE (including the upsert's DO UPDATE) and DELETE
+    on customers adjusts the affected segment rows.
+    """
+    with conn:
+        for column, summary in SUMMARY_TABLES.items():
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                  (summary,)).fetchone()
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {summary} ("
+                         f"segment PRIMARY KEY, customers INTEGER NOT NULL, "
+                         f"churned INTEGER NOT NULL, monthly_charges REAL NOT NULL)")
+            if recompute or not exists:
+                _recompute_into(conn, column, summary)
+
+            add_new = _summary_upsert(summary, 'NEW').format(segment=f"NEW.{column}")
+            remove_old = _summary_remove(summary, 'OLD').format(segment=f"OLD.{column}")
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{summary}_insert "
+                         f"AFTER INSERT ON {TABLE} BEGIN {add_new} END")
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{summary}_delete "
+                         f"AFTER DELETE ON {TABLE} BEGIN {remove_old} END")
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{summary}_update "
+                         f"AFTER UPDATE OF {column}, Churn, MonthlyCharges ON {TABLE} "
+                         f"BEGIN {remove_old} {add_new} END")
+
+
+def _recompute_query(column):
+    return (f"SELECT {column} AS segment, COUNT(*) AS customers, "
+            f"COALESCE(SUM(Churn), 0) AS churned, "
+            f"COALESCE(SUM(MonthlyCharges), 0.0) AS monthly_charges "
+            f"FROM {TABLE} WHERE {column} IS NOT NULL GROUP BY {column}")
+
+
+def _recompute_into(conn, column, summary):
+    conn.execute(f"DELETE FROM {summary}")
+    conn.execute(f"INSERT INTO {summary} (segment, customers, churned, monthly_charges) "
+                 f"{_recompute_query(column)}")
+
+
+def rebuild_summaries(conn):
+    """Recompute every summary table from the customers table."""
+    with conn:
+        for column, summary in SUMMARY_TABLES.items():
+            _recompute_into(conn, column, summary)
+
+
+def check_summaries(conn, tolerance=SUMMARY_TOLERANCE):
+    """
+    Compare each summary table with a full GROUP BY over customers.
+
+    Returns a list of (summary table, segment, measure, stored, expected)
+    for every disagreement; an empty list means the tables are consistent.
+    """
+    mismatches = []
+    for column, summary in SUMMARY_TABLES.items():
+        stored = {row[0]: row[1:] for row in conn.execute(
+            f"SELECT segment, {', '.join(SUMMARY_MEASURES)} FROM {summary}")}
+        expected = {row[0]: row[1:] for row in conn.execute(_recompute_query(column))}
+        for segment in stored.keys() | expected.keys():
+            have = stored.get(segment, (0, 0, 0.0))
+            want = expected.get(segment, (0, 0, 0.0))
+            for measure, a, b in zip(SUMMARY_MEASURES, have, want):
+                if abs(a - b) > tolerance:
+                    mismatches.append((summary, segment, measure, a, b))
+    return mismatches
+
+
+def segment_churn(conn, dimension):
+    """
+    Churn by segment from the summary tables, in the shape of the
+    segment queries in sql/churn_analysis_queries.sql (plus
+    avg_monthly_charge), sorted by churn rate.
+    """
+    summary = SUMMARY_TABLES[dimension]
+    return pd.read_sql_query(
+        f"SELECT segment AS {dimension}, customers AS total_customers, "
+        f"churned AS churned_customers, "
+        f"ROUND(100.0 * churned / customers, 2) AS churn_rate_pct, "
+        f"ROUND(monthly_charges / customers, 2) AS avg_monthly_charge "
+        f"FROM {summary} ORDER BY churn_rate_pct DESC", conn)
+
+
+def tenure_churn_trend(conn):
+    """Churn rate by tenure month with the previous month's rate (LAG)."""
+    return pd.read_sql_query(
+        f"SELECT segment AS tenure, "
+        f"ROUND(100.0 * churned / customers, 2) AS churn_rate_pct, "
+        f"LAG(ROUND(100.0 * churned / customers, 2)) OVER (ORDER BY segment) AS prev_churn "
+        f"FROM {SUMMARY_TABLES['tenure']} ORDER BY segment", conn)
+
+
+def row_hashes(df):
+    """Stable signed 64-bit hash of each row's values (fits SQLite INTEGER)."""
+    hashes = pd.util.hash_pandas_object(df[COLUMNS].astype(str), index=False)
+    return hashes.to_numpy().view('int64')
+
+
+def _records(df):
+    """Rows of `df` as tuples of plain Python values, NaN -> NULL."""
+    frame = df[COLUMNS + [HASH_COL]].astype(object)
+    frame = frame.where(frame.notna(), None)
+    return frame.itertuples(index=False, name=None)
+
+
+def upsert_customers(conn, df, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Insert new customers and update changed ones, keyed on customerID.
+
+    Rows whose hash matches the stored one are skipped before any write.
+    Each batch of `batch_size` rows is written in one transaction with
+    ``executemany``.
+
+    Returns a dict with inserted, updated and unchanged counts.
+    """
+    df = df.drop_duplicates(ID_COL, keep='last').copy()
+    df[HASH_COL] = row_hashes(df)
+
+    stored = dict(conn.execute(f"SELECT {ID_COL}, {HASH_COL} FROM {TABLE}"))
+    previous = df[ID_COL].map(stored)
+    is_new = previous.isna().to_numpy()
+    changed = df[~is_new & (previous.to_numpy() != df[HASH_COL].to_numpy())]
+    new = df[is_new]
+
+    placeholders = ", ".join("?" * (len(COLUMNS) + 1))
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:] + [HASH_COL])
+    sql = (f"INSERT INTO {TABLE} ({', '.join(COLUMNS + [HASH_COL])}) VALUES ({placeholders}) "
+           f"ON CONFLICT({ID_COL}) DO UPDATE SET {assignments}")
+
+    pending = pd.concat([new, changed])
+    for start in range(0, len(pending), batch_size):
+        with conn:
+            conn.executemany(sql, _records(pending.iloc[start:start + batch_size]))
+
+    if len(pending):
+        conn.execute("PRAGMA optimize")
+    return {'inserted': len(new), 'updated': len(changed),
+            'unchanged': len(df) - len(new) - len(changed)}
+
+
+def load_store(df, db_path=DB_PATH, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create the schema and summary tables if needed and upsert `df`.
+
+    Returns the upsert counts.
+    """
+    conn = connect(db_path)
+    try:
+        create_schema(conn)
+        # Into an empty table it is cheaper to bulk load first and build
+        # the summaries with one GROUP BY than to fire a trigger per row.
+        # Summaries kept from before the table was emptied are recomputed too
+        empty = conn.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {TABLE})").fetchone()[0]
+        if not empty:
+            create_summaries(conn)
+        counts = upsert_customers(conn, df, batch_size)
+        if empty:
+            create_summaries(conn, recompute=True)
+        # Planner statistics for the new indexes on first load
+        if counts['inserted'] == len(df) and len(df):
+            conn.execute("ANALYZE")
+        return counts
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load customers into the SQLite analytics store.")
+    parser.add_argument("--input", type=Path, default=None,
+                        help="Cleaned customer file or delta (default: the churn.data cache)")
+    parser.add_argument("--db", type=Path, default=DB_PATH,
+                        help="SQLite database (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Rows per transaction (default: %(default)s)")
+    parser.add_argument("--check", action="store_true",
+                        help="Only compare the summary tables with a full recompute")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        conn = connect(args.db, read_only=True)
+        try:
+            mismatches = check_summaries(conn)
+        finally:
+            conn.close()
+        for summary, segment, measure, stored, expected in mismatches:
+            print(f"   {summary} [{segment}] {measure}: stored {stored}, expected {expected}")
+        print(f"Summary tables: {'consistent' if not mismatches else f'{len(mismatches)} mismatches'}")
+        raise SystemExit(1 if mismatches else 0)
+
+    df = load_customers() if args.input is None else read_cleaned(args.input)
+    start = time.perf_counter()
+    counts = load_store(df, args.db, args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    print(f"Database: {args.db}")
+    print(f"Inserted {counts['inserted']:,}, updated {counts['updated']:,}, "
+          f"unchanged {counts['unchanged']:,} customers in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Synthetic telco customers at any scale, fitted to the real raw CSV.
+
+The generator learns empirical distributions from
+data/raw/telco_customer_churn.csv and samples new customers column by
+column:
+
+- (Contract, tenure, Churn) are drawn together from their joint
+  distribution, which carries most of the churn signal,
+- every other categorical column is drawn given a few parent columns
+  (CONDITIONALS), so structural combinations such as "No internet
+  service" add-ons or "No phone service" lines stay consistent,
+- MonthlyCharges is resampled from real customers with the same phone /
+  internet / add-on bundle, and TotalCharges is MonthlyCharges x tenure
+  times a resampled real ratio (blank for tenure 0, as in the raw file).
+
+The output has the raw file's schema and formatting, so every stage
+(cleaning, store, queries, scoring, Excel) can read it in place of the
+real data. Rows are generated and written in chunks with vectorized
+sampling; a chunk's values depend only on the seed and chunk index.
+
+Usage:
+    python -m churn.synth 1M                       # data/synthetic/telco_customer_churn_1M.csv
+    python -m churn.synth 100k -o /tmp/customers.csv --seed 7
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from churn.data import ID_COL, RAW_PATH
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SYNTHETIC_DIR = PROJECT_ROOT / "data" / "synthetic"
+DEFAULT_CHUNK_SIZE = 500_000
+
+# Drawn jointly; everything else is conditioned on these
+JOINT_COLUMNS = ['Contract', 'tenure', 'Churn']
+# Derived parent: tenure in years, capped at 5 (60+ months)
+TENURE_BAND = 'tenure_band'
+
+ADDON_COLUMNS = ['OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
+                 'TechSupport', 'StreamingTV', 'StreamingMovies']
+
+# (column, parent columns) in sampling order. Parents must be drawn
+# before their children.
+CONDITIONALS = [
+    ('InternetService', ['Contract', TENURE_BAND, 'Churn']),
+    ('PhoneService', ['InternetService']),
+    ('MultipleLines', ['PhoneService', TENURE_BAND, 'Churn']),
+] + [(column, ['InternetService', TENURE_BAND, 'Churn']) for column in ADDON_COLUMNS] + [
+    ('PaymentMethod', ['Contract', 'Churn']),
+    ('PaperlessBilling', ['InternetService', 'Churn']),
+    ('SeniorCitizen', ['Churn']),
+    ('Partner', ['Contract']),
+    ('Dependents', ['Partner']),
+    ('gender', []),
+]
+
+# Real customers with the same bundle share a MonthlyCharges pool
+CHARGE_KEY = ['InternetService', 'PhoneService', 'MultipleLines', 'addons']
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*$")
+
+
+def parse_size(text):
+    """Row count from '7043', '100k', '1M' or '2.5M'."""
+    match = _SIZE.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    number, suffix = match.groups()
+    return int(float(number) * {'': 1, 'k': 1_000, 'm': 1_000_000}[suffix.lower()])
+
+
+def size_label(n_rows):
+    """Short label for a row count: 100k, 1M, 7043."""
+    for factor, suffix in ((1_000_000, 'M'), (1_000, 'k')):
+        if n_rows >= factor and n_rows % factor == 0:
+            return f"{n_rows // factor}{suffix}"
+    return str(n_rows)
+
+
+def _addon_count(df):
+    return sum((df[column] == 'Yes').to_numpy(dtype='int64') for column in ADDON_COLUMNS)
+
+
+def _tenure_band(tenure):
+    return np.minimum(np.asarray(tenure) // 12, 5)
+
+
+def _encode(values):
+    """(codes, sorted distinct values) of an array."""
+    uniques, codes = np.unique(np.asarray(values), return_inverse=True)
+    return codes.astype('int64'), uniques
+
+
+class _Conditional:
+    """
+    Empirical distribution of one column for every combination of its parents.
+
+    Works on integer codes: `codes` maps each column name to the codes of
+    its values and `sizes` to its number of distinct values.
+    """
+
+    def __init__(self, column, parents, codes, sizes):
+        self.column = column
+        self.parents = parents
+        n_combos = int(np.prod([sizes[p] for p in parents], dtype='int64'))
+        counts = np.zeros((n_combos, sizes[column]))
+        np.add.at(counts, (self._parent_codes(codes, sizes), codes[column]), 1)
+        # Parent combinations never seen in the real data fall back to
+        # the marginal distribution
+        counts[counts.sum(axis=1) == 0] = counts.sum(axis=0)
+        self.cumulative = np.cumsum(counts / counts.sum(axis=1, keepdims=True), axis=1)
+
+    def _parent_codes(self, codes, sizes):
+        combined = 0
+        for parent in self.parents:
+            combined = combined * sizes[parent] + codes[parent]
+        return combined
+
+    def sample(self, codes, sizes, n_rows, rng):
+        cumulative = self.cumulative[self._parent_codes(codes, sizes)]
+        if cumulative.ndim == 1:
+            cumulative = np.broadcast_to(cumulative, (n_rows, len(cumulative)))
+        drawn = (rng.random(n_rows)[:, None] >= cumulative).sum(axis=1)
+        return np.minimum(drawn, cumulative.shape[1] - 1)
+
+
+class CustomerProfile:
+    """
+    Distributions fitted from a raw customer table; see the module docstring.
+
+    `sample(n, rng)` returns n synthetic rows with the source's columns,
+    in the source's column order. Sampling is done on integer codes; text
+    columns come back as categoricals.
+    """
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        total = pd.to_numeric(df['TotalCharges'], errors='coerce')
+
+        codes, self.values = {}, {}
+        for column in JOINT_COLUMNS + [column for column, _ in CONDITIONALS]:
+            codes[column], self.values[column] = _encode(df[column])
+        codes[TENURE_BAND], self.values[TENURE_BAND] = _encode(_tenure_band(df['tenure']))
+        self.sizes = {column: len(values) for column, values in self.values.items()}
+
+        joint = pd.DataFrame({column: codes[column] for column in JOINT_COLUMNS})
+        cells = joint.groupby(JOINT_COLUMNS).size()
+        self.joint_cells = {column: cells.index.get_level_values(column).to_numpy()
+                            for column in JOINT_COLUMNS}
+        self.joint_p = (cells / cells.sum()).to_numpy()
+        self.conditionals = [_Conditional(column, parents, codes, self.sizes)
+                             for column, parents in CONDITIONALS]
+
+        keys = df[CHARGE_KEY[:-1]].assign(addons=_addon_count(df))
+        self.charges = {key: df['MonthlyCharges'].to_numpy()[rows]
+                        for key, rows in keys.groupby(CHARGE_KEY).indices.items()}
+        self.charges_by_internet = {key: df['MonthlyCharges'].to_numpy()[rows]
+                                    for key, rows in df.groupby('InternetService').indices.items()}
+
+        billed = (df['tenure'] > 0) & total.notna()
+        self.total_ratios = (total[billed] / (df.loc[billed, 'MonthlyCharges']
+                                              * df.loc[billed, 'tenure'])).to_numpy()
+
+    @classmethod
+    def from_csv(cls, path=RAW_PATH):
+        return cls(pd.read_csv(path))
+
+    def sample(self, n_rows, rng):
+        cells = rng.choice(len(self.joint_p), size=n_rows, p=self.joint_p)
+        codes = {column: cell_codes[cells] for column, cell_codes in self.joint_cells.items()}
+        tenure = self.values['tenure'][codes['tenure']]
+        codes[TENURE_BAND] = np.searchsorted(self.values[TENURE_BAND], _tenure_band(tenure))
+        for conditional in self.conditionals:
+            codes[conditional.column] = conditional.sample(codes, self.sizes, n_rows, rng)
+
+        out = {}
+        for column, column_codes in codes.items():
+            values = self.values[column]
+            if values.dtype.kind in 'iuf':
+                out[column] = values[column_codes]
+            else:
+                out[column] = pd.Categorical.from_codes(column_codes, values)
+        out = pd.DataFrame(out)
+
+        charges = np.empty(n_rows)
+        keys = out[CHARGE_KEY[:-1]].assign(addons=_addon_count(out))
+        for key, rows in keys.groupby(CHARGE_KEY, observed=True).indices.items():
+            pool = self.charges.get(key)
+            if pool is None:
+                pool = self.charges_by_internet[key[0]]
+            charges[rows] = pool[rng.integers(len(pool), size=len(rows))]
+        out['MonthlyCharges'] = charges
+
+        ratios = self.total_ratios[rng.integers(len(self.total_ratios), size=n_rows)]
+        out['TotalCharges'] = np.where(tenure > 0, np.round(charges * tenure * ratios, 2), np.nan)
+        return out
+
+
+def customer_ids(start, n_rows):
+    """
+    Unique IDs in the raw file's NNNN-XXXXX format for rows start .. start+n-1.
+
+    The digits are the row number mod 10,000 and the letters the rest in
+    base 26, so IDs are unique for the first 26**5 * 10**4 rows.
+    """
+    numbers = np.arange(start, start + n_rows, dtype='int64')
+    chars = np.empty((n_rows, 10), dtype='uint8')
+    digits, letters = numbers % 10_000, numbers // 10_000
+    for position in range(3, -1, -1):
+        chars[:, position] = ord('0') + digits % 10
+        digits //= 10
+    chars[:, 4] = ord('-')
+    for position in range(9, 4, -1):
+        chars[:, position] = ord('A') + letters % 26
+        letters //= 26
+    return chars.view('S10').ravel().astype(str)
+
+
+def generate(profile, n_rows, seed=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most `chunk_size` synthetic customers, n_rows in total."""
+    for index, start in enumerate(range(0, n_rows, chunk_size)):
+        rng = np.random.default_rng([seed, index])
+        chunk = profile.sample(min(chunk_size, n_rows - start), rng)
+        chunk[ID_COL] = customer_ids(start, len(chunk))
+        yield chunk[profile.columns]
+
+
+def write_synthetic(path, n_rows, source=RAW_PATH, seed=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write `n_rows` synthetic customers fitted from `source` to a CSV. Returns the path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profile = CustomerProfile.from_csv(source)
+    with open(path, 'w', newline='') as f:
+        for index, chunk in enumerate(generate(profile, n_rows, seed, chunk_size)):
+            # Blank TotalCharges for tenure 0, like the raw export
+            chunk.to_csv(f, header=index == 0, index=False, na_rep=' ')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic telco customers.")
+    parser.add_argument("size", type=parse_size, help="Number of customers, e.g. 100k, 1M, 10M")
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="Output CSV (default: data/synthetic/telco_customer_churn_<size>.csv)")
+    parser.add_argument("--source", type=Path, default=RAW_PATH,
+                        help="Raw CSV to fit (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows generated per chunk (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    output = args.output or SYNTHETIC_DIR / f"telco_customer_churn_{size_label(args.size)}.csv"
+    start = time.perf_counter()
+    write_synthetic(output, args.size, args.source, args.seed, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.size:,} customers to {output} "
+          f"({elapsed:.2f}s, {args.size / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
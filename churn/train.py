@@ -0,0 +1,255 @@
+"""
+Customer Churn Analysis - Model Training
+========================================
+Scripted version of the hyperparameter search in 03_modeling.ipynb.
+
+The notebook runs GridSearchCV one model at a time on a single core and
+refits the ColumnTransformer for every fold and candidate. Here the
+preprocessor is fitted once per CV fold and cached on disk with joblib
+Memory, candidates run on all cores, and successive halving is available
+as a cheaper search strategy.
+
+With --features the search reads the encoded matrix of the churn.features
+store instead, so no preprocessing runs at all; the saved models take
+encoded rows and are tied to the store's schema version (see
+churn.score --features).
+
+Usage:
+    python -m churn.train                     # parallel cached grid search
+    python -m churn.train --search halving    # successive halving
+    python -m churn.train --baseline          # notebook behaviour, for timing
+    python -m churn.train --features --save   # search on the feature store
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.svm import SVC
+
+from churn.data import load_customers, read_cleaned
+
+# =============================================================================
+# PATHS & SETTINGS
+# =============================================================================
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = PROJECT_ROOT / "models"
+CACHE_DIR = PROJECT_ROOT / ".cache" / "preprocessing"
+
+RANDOM_STATE = 42
+TARGET_COL = 'Churn'
+ID_COL = 'customerID'
+NUMERIC_FEATURES = ['tenure', 'MonthlyCharges', 'TotalCharges']
+
+# Same grid as the models_grid cell in 03_modeling.ipynb
+MODELS_GRID = {
+    "Random Forest": (RandomForestClassifier(random_state=RANDOM_STATE), {
+        'classifier__n_estimators': [100, 200, 300],
+        'classifier__max_depth': [None, 10, 20]
+    }),
+    "SVM": (SVC(), {
+        'classifier__C': [0.1, 1, 10],
+        'classifier__gamma': [0.1, 0.01, 0.001],
+        'classifier__kernel': ['rbf', 'linear']
+    }),
+    "KNN": (KNeighborsClassifier(), {
+        'classifier__n_neighbors': [3, 5, 7],
+        'classifier__weights': ['uniform', 'distance']
+    })
+}
+
+
+def categorical_features(df):
+    """Text columns used as one-hot features (everything but id and target)."""
+    return [col for col in df.columns
+            if not pd.api.types.is_numeric_dtype(df[col]) and col not in (ID_COL, TARGET_COL)]
+
+
+def build_preprocessor(categorical):
+    """ColumnTransformer used by the modeling notebook for the cleaned data."""
+    numeric_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler())
+    ])
+    categorical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
+        ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
+    ])
+    return ColumnTransformer(transformers=[
+        ('num', numeric_transformer, NUMERIC_FEATURES),
+        ('cat', categorical_transformer, categorical)
+    ])
+
+
+def load_training_data(path=None):
+    """
+    Load the cleaned data and return the notebook's stratified split.
+
+    Reads `path` when given, otherwise the columnar cache from churn.data.
+    """
+    df = load_customers() if path is None else read_cleaned(path)
+    X = df.drop(columns=[TARGET_COL, ID_COL], errors='ignore')
+    y = df[TARGET_COL]
+    return train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE, stratify=y)
+
+
+def load_feature_data(store_dir=None):
+    """
+    The notebook's stratified split over the rows of a churn.features store.
+
+    The test rows are the ones the store's schema was not fitted on
+    (FeatureStore.split). The encoded matrix is memory-mapped; only the
+    selected rows are gathered for each side of the split. Returns the
+    split and the store's schema version.
+    """
+    from churn.features import FEATURES_DIR, FeatureStore
+
+    store = FeatureStore(store_dir or FEATURES_DIR)
+    X, y, _ = store.load()
+    train_rows, test_rows = store.split()
+    return (X[train_rows], X[test_rows], np.asarray(y[train_rows]), np.asarray(y[test_rows]),
+            store.meta['schema_version'])
+
+
+def make_search(model, param_grid, categorical, search='grid', n_jobs=-1,
+                memory=None, cv=5):
+    """
+    Build the search object for one model.
+
+    With `memory` set, the fitted preprocessor is cached per CV fold, so
+    every candidate on that fold reuses it instead of re-encoding. With
+    `categorical` None the input is already encoded and the pipeline
+    holds only the classifier.
+    """
+    steps = [('classifier', model)]
+    if categorical is not None:
+        steps.insert(0, ('preprocessor', build_preprocessor(categorical)))
+    clf = Pipeline(steps, memory=memory)
+
+    if search == 'halving':
+        # Successive halving is still experimental in scikit-learn
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+        return HalvingGridSearchCV(clf, param_grid, cv=cv, scoring='accuracy',
+                                   n_jobs=n_jobs, random_state=RANDOM_STATE)
+    return GridSearchCV(clf, param_grid, cv=cv, scoring='accuracy', n_jobs=n_jobs)
+
+
+def run_search(X_train, X_test, y_train, y_test, models=None, search='grid',
+               n_jobs=-1, cache_dir=CACHE_DIR, verbose=True):
+    """
+    Run the hyperparameter search for every model and time each one.
+
+    Returns a DataFrame with one row per model (best params, CV score,
+    test accuracy, wall-clock seconds) and a dict of fitted searches.
+    """
+    models = MODELS_GRID if models is None else models
+    encoded = not isinstance(X_train, pd.DataFrame)
+    categorical = None if encoded else categorical_features(X_train)
+    memory = Memory(str(cache_dir), verbose=0) if cache_dir and not encoded else None
+
+    rows, searches = [], {}
+    for name, (model, param_grid) in models.items():
+        grid = make_search(model, param_grid, categorical, search, n_jobs, memory)
+
+        start = time.perf_counter()
+        grid.fit(X_train, y_train)
+        elapsed = time.perf_counter() - start
+
+        accuracy = accuracy_score(y_test, grid.predict(X_test))
+        searches[name] = grid
+        rows.append({
+            'model': name,
+            'best_params': grid.best_params_,
+            'cv_accuracy': round(grid.best_score_, 4),
+            'test_accuracy': round(accuracy, 4),
+            'wall_seconds': round(elapsed, 2),
+        })
+        if verbose:
+            print(f"   {name:<15} {elapsed:8.2f}s  cv={grid.best_score_:.4f}  "
+                  f"test={accuracy:.4f}  {grid.best_params_}")
+
+    if memory is not None:
+        memory.clear(warn=False)
+    return pd.DataFrame(rows), searches
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hyperparameter search for the churn models.")
+    parser.add_argument("--input", type=Path, default=None,
+                        help="Cleaned customer file (default: the churn.data columnar cache)")
+    parser.add_argument("--search", choices=['grid', 'halving'], default='grid',
+                        help="Exhaustive grid or successive halving (default: %(default)s)")
+    parser.add_argument("--n-jobs", type=int, default=-1,
+                        help="Parallel workers for the search, -1 = all cores (default: %(default)s)")
+    parser.add_argument("--models", nargs='+', choices=list(MODELS_GRID), default=list(MODELS_GRID),
+                        help="Subset of models to search")
+    parser.add_argument("--baseline", action="store_true",
+                        help="Run like the notebook (single core, no preprocessing cache) for timing")
+    parser.add_argument("--features", nargs='?', type=Path, const=True, default=None,
+                        metavar="STORE",
+                        help="Train on a churn.features store (default store: data/processed/features)")
+    parser.add_argument("--save", action="store_true",
+                        help=f"Save each best pipeline to {MODELS_DIR}")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 70)
+    print("CUSTOMER CHURN - MODEL TRAINING")
+    print("=" * 70)
+
+    schema_version = None
+    if args.features:
+        store_dir = None if args.features is True else args.features
+        X_train, X_test, y_train, y_test, schema_version = load_feature_data(store_dir)
+        print(f"\nFeature store: schema {schema_version}, {X_train.shape[1]} encoded features")
+    else:
+        X_train, X_test, y_train, y_test = load_training_data(args.input)
+    print(f"\nTrain: {X_train.shape[0]:,} rows | Test: {X_test.shape[0]:,} rows")
+
+    models = {name: MODELS_GRID[name] for name in args.models}
+    if args.baseline:
+        mode, n_jobs, cache_dir = "baseline (1 core, no cache)", None, None
+    else:
+        mode, n_jobs, cache_dir = f"{args.search} (n_jobs={args.n_jobs}, cached preprocessing)", args.n_jobs, CACHE_DIR
+    print(f"Search: {mode}\n")
+
+    start = time.perf_counter()
+    results, searches = run_search(X_train, X_test, y_train, y_test, models,
+                                   args.search, n_jobs, cache_dir)
+    total = time.perf_counter() - start
+
+    if args.save:
+        MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        suffix = "_features" if schema_version else ""
+        for name, grid in searches.items():
+            path = MODELS_DIR / f"{name.lower().replace(' ', '_')}_{args.search}{suffix}.joblib"
+            if schema_version:
+                # Checked by churn.score before scoring a feature store
+                grid.best_estimator_.feature_schema_ = schema_version
+            joblib.dump(grid.best_estimator_, path)
+            print(f"   Saved: {path}")
+
+    print("\n" + "=" * 70)
+    print(results[['model', 'cv_accuracy', 'test_accuracy', 'wall_seconds']].to_string(index=False))
+    print("=" * 70)
+    print(f"Total wall-clock: {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
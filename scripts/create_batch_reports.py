@@ -0,0 +1,235 @@
+"""
+Batch Excel reporting: one churn workbook per segment value in a single run.
+
+The customer data is loaded and encoded once (the churn.data columnar
+cache, or --input), then partitioned with one groupby per --by column.
+The partitions are written, grouped, to an uncompressed Feather file
+that every worker process memory-maps read-only, so a worker only
+materializes the rows of the partition it is rendering. Each workbook
+is produced exactly like create_enhanced_excel.py --parallel would
+produce it for that subset of customers.
+
+Every partition's content hash is kept in a manifest next to the
+workbooks; partitions whose data (and output options) are unchanged
+since the last run are skipped. Throughput is reported in workbooks per
+minute.
+
+Usage:
+    python scripts/create_batch_reports.py --by Contract PaymentMethod
+    python scripts/create_batch_reports.py --by InternetService --workers 8 --force
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Make the shared churn package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from churn.data import load_customers, read_cleaned, to_columnar
+from create_enhanced_excel import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_WIDTH_SAMPLE, PROJECT_ROOT, create_assembled_workbook,
+)
+
+OUTPUT_DIR = PROJECT_ROOT / "excel" / "batch"
+MANIFEST_NAME = "batch_manifest.json"
+
+# Part of every partition hash; bump when the workbook layout changes so
+# all reports are regenerated
+REPORT_VERSION = 1
+
+# Set in each worker by _open_partitions
+_TABLE = None
+
+
+def partition_file_name(column, value):
+    """Workbook file name for the rows where `column` == `value`."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(value)).strip("_") or "blank"
+    return f"churn_analysis_{column}_{slug}.xlsx"
+
+
+def partition(df, column):
+    """
+    Group `df` by `column` with a single groupby.
+
+    Returns (frame with each group's rows contiguous, [(value, start,
+    stop)]), in sorted group order. Rows without a value are dropped.
+    """
+    groups = df.groupby(column, observed=True, sort=True).indices
+    bounds, start = [], 0
+    for value, positions in groups.items():
+        bounds.append((value, start, start + len(positions)))
+        start += len(positions)
+    order = np.concatenate(list(groups.values())) if groups else np.array([], dtype=int)
+    return df.take(order).reset_index(drop=True), bounds
+
+
+def partition_hashes(grouped, bounds, options):
+    """
+    Content hash of every partition, from one vectorized pass of row hashes.
+
+    The column names and dtypes, `options` (anything that changes the
+    output) and REPORT_VERSION are part of each hash.
+    """
+    row_hashes = pd.util.hash_pandas_object(grouped, index=False).to_numpy()
+    header = json.dumps([REPORT_VERSION, list(map(str, grouped.columns)),
+                         list(map(str, grouped.dtypes)), options]).encode()
+    hashes = []
+    for _, start, stop in bounds:
+        digest = hashlib.sha256(header)
+        digest.update(row_hashes[start:stop].tobytes())
+        hashes.append(digest.hexdigest())
+    return hashes
+
+
+def load_manifest(output_dir):
+    path = Path(output_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    path = Path(output_dir) / MANIFEST_NAME
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def _open_partitions(path):
+    """Worker initializer: memory-map the grouped partition table once."""
+    import pyarrow.feather as feather
+
+    global _TABLE
+    _TABLE = feather.read_table(path, memory_map=True)
+
+
+def _render_partition(start, stop, output_path, static_values, width_sample):
+    """Worker: build the workbook for rows [start, stop) of the shared table."""
+    started = time.perf_counter()
+    df = _TABLE.slice(start, stop - start).to_pandas()
+    create_assembled_workbook(df, output_path, chunk_size=max(len(df), DEFAULT_CHUNK_SIZE),
+                              static_values=static_values, width_sample=width_sample,
+                              verbose=False)
+    return output_path, time.perf_counter() - started
+
+
+def run_batch(df, columns, output_dir=OUTPUT_DIR, workers=None, static_values=False,
+              width_sample=DEFAULT_WIDTH_SAMPLE, force=False):
+    """
+    Write one workbook per value of each column in `columns`.
+
+    Returns (workbooks written, partitions skipped as unchanged).
+    """
+    import pyarrow.feather as feather
+
+    output_dir = Path(output_dir)
+    manifest = load_manifest(output_dir)
+    options = {'static_values': static_values, 'width_sample': width_sample}
+    written = skipped = 0
+
+    for column in columns:
+        if column not in df.columns:
+            raise KeyError(f"Column '{column}' not found in the customer data")
+        column_dir = output_dir / column
+        column_dir.mkdir(parents=True, exist_ok=True)
+
+        grouped, bounds = partition(df, column)
+        hashes = partition_hashes(grouped, bounds, options)
+        jobs = []
+        for (value, start, stop), digest in zip(bounds, hashes):
+            output_path = column_dir / partition_file_name(column, value)
+            key = str(output_path.relative_to(output_dir))
+            if not force and manifest.get(key) == digest and output_path.exists():
+                skipped += 1
+                continue
+            jobs.append((key, digest, start, stop, output_path))
+
+        print(f"\n{column}: {len(bounds)} partitions, {len(jobs)} to render, "
+              f"{len(bounds) - len(jobs)} unchanged")
+        if not jobs:
+            continue
+
+        with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+            table_path = Path(tmp_dir) / "partitions.feather"
+            # Uncompressed so the workers can memory-map it without decoding
+            feather.write_feather(grouped, table_path, compression='uncompressed')
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_open_partitions,
+                                     initargs=(str(table_path),)) as pool:
+                futures = {
+                    pool.submit(_render_partition, start, stop, output_path,
+                                static_values, width_sample): (key, digest, stop - start)
+                    for key, digest, start, stop, output_path in jobs
+                }
+                try:
+                    for future in as_completed(futures):
+                        key, digest, n_rows = futures[future]
+                        output_path, seconds = future.result()
+                        manifest[key] = digest
+                        written += 1
+                        print(f"   [OK] {key} ({n_rows:,} rows, {seconds:.2f}s)")
+                finally:
+                    # Keep the workbooks that did finish if one of them fails
+                    save_manifest(output_dir, manifest)
+
+    return written, skipped
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate one churn analysis workbook per value of one or more columns."
+    )
+    parser.add_argument("--by", nargs='+', required=True, metavar="COLUMN",
+                        help="Column(s) to partition by, e.g. Contract PaymentMethod")
+    parser.add_argument("--input", type=Path, default=None,
+                        help="Cleaned customer file (default: the churn.data columnar cache)")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR,
+                        help="Directory for the workbooks and manifest (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--static-values", action="store_true",
+                        help="Write precomputed results instead of formulas")
+    parser.add_argument("--width-sample", type=int, default=DEFAULT_WIDTH_SAMPLE,
+                        help="Size Raw_Data columns from a random sample of this many rows "
+                             "(0 = every row; default: %(default)s)")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate every workbook, even if its data is unchanged")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 70)
+    print("CUSTOMER CHURN - BATCH EXCEL REPORTS")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    df = load_customers() if args.input is None else to_columnar(read_cleaned(args.input))
+    print(f"\nLoaded {len(df):,} records ({time.perf_counter() - start:.2f}s)")
+
+    start = time.perf_counter()
+    written, skipped = run_batch(df, args.by, args.output_dir, args.workers,
+                                 args.static_values, args.width_sample, args.force)
+    elapsed = time.perf_counter() - start
+
+    print("\n" + "=" * 70)
+    print(f"Workbooks written: {written}, unchanged: {skipped}")
+    if written:
+        print(f"Throughput: {written / elapsed * 60:.1f} workbooks/min ({elapsed:.2f}s)")
+    print(f"Output: {args.output_dir}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
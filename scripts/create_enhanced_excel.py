@@ -3,28 +3,63 @@ Customer Churn Analysis - Enhanced Excel Workbook Generator
 ============================================================
 Creates a professional Excel workbook with DYNAMIC formulas.
 
+Usage:
+    python scripts/create_enhanced_excel.py
+    python scripts/create_enhanced_excel.py --streaming --chunk-size 50000
+    python scripts/create_enhanced_excel.py --parallel --workers 4
+    python scripts/create_enhanced_excel.py --static-values
+    python scripts/create_enhanced_excel.py --draws 50000 --simulation-workers 4
+
 Author: Md Imran Hossain
 Date: November 2025
 """
 
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment, NamedStyle
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fonts import DEFAULT_FONT
 from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import get_column_letter, quote_sheetname, range_boundaries
+from openpyxl.workbook.defined_name import DefinedName
 from openpyxl.formatting.rule import ColorScaleRule, DataBarRule
 from openpyxl.chart import BarChart, PieChart, LineChart, Reference
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from copy import copy
+from xml.etree import ElementTree
+
+# Make the shared churn package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from churn.data import CLEANED_CSV, load_customers, read_cleaned
+from churn.retention import (CONTRACT_COL, DEFAULT_DRAWS, PERCENTILES, RISK_COL, SCORED_CSV,
+                             load_scored, simulate_retention)
+from churn.segments import aggregate_segments, SegmentSummary, TENURE_BUCKETS
 
 # =============================================================================
 # PATHS
 # =============================================================================
 PROJECT_ROOT = Path(__file__).parent.parent
-DATA_PATH = PROJECT_ROOT / "data" / "processed" / "customers_cleaned.csv"
 OUTPUT_PATH = PROJECT_ROOT / "excel" / "churn_analysis_dynamic.xlsx"
 
+# Rows read from the CSV per batch in --streaming mode, and rows per
+# Raw_Data shard in --parallel mode
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Raw_Data column widths are measured on a sample of this many rows
+DEFAULT_WIDTH_SAMPLE = 100_000
+MAX_COLUMN_WIDTH = 40
+
 # =============================================================================
 # STYLES
 # =============================================================================
@@ -33,11 +68,16 @@ SUBHEADER_FILL = PatternFill(start_color="ED7D31", end_color="ED7D31", fill_type
 KPI_FILL = PatternFill(start_color="FBE5D6", end_color="FBE5D6", fill_type="solid")
 CHURN_FILL = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
 RETAIN_FILL = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+HIGHLIGHT_FILL = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
 
 HEADER_FONT = Font(name="Calibri", size=12, bold=True, color="FFFFFF")
 TITLE_FONT = Font(name="Calibri", size=16, bold=True, color="C65911")
+DASHBOARD_TITLE_FONT = Font(name="Calibri", size=24, bold=True, color="C65911")
+NOTE_FONT = Font(italic=True)
+INSIGHT_FONT = Font(bold=True, color="C65911")
 KPI_FONT = Font(name="Calibri", size=14, bold=True)
 MONEY_FONT = Font(name="Calibri", size=14, bold=True, color="006600")
+BOLD_FONT = Font(bold=True)
 
 THIN_BORDER = Border(
     left=Side(style='thin'),
@@ -48,143 +88,439 @@ THIN_BORDER = Border(
 
 CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
 
+PERCENT_FORMAT = '0.00%'
+MONEY_FORMAT = '$#,##0'
+CENTS_FORMAT = '$#,##0.00'
+
+# Cell looks, applied by name with set_style. Looks used by many cells
+# are registered once per workbook as a NamedStyle, so each is a single
+# shared xf that also shows in Excel's style gallery
+CELL_STYLES = {
+    'Churn Title': dict(font=TITLE_FONT),
+    'Churn Header': dict(font=HEADER_FONT, fill=HEADER_FILL, border=THIN_BORDER),
+    'Churn Data Header': dict(font=HEADER_FONT, fill=HEADER_FILL),
+    'Churn KPI Label': dict(font=HEADER_FONT, fill=SUBHEADER_FILL, border=THIN_BORDER),
+    'Churn KPI': dict(font=KPI_FONT, fill=KPI_FILL, border=THIN_BORDER, alignment=CENTER_ALIGN),
+    'Churn KPI Percent': dict(font=KPI_FONT, fill=KPI_FILL, border=THIN_BORDER,
+                              alignment=CENTER_ALIGN, number_format=PERCENT_FORMAT),
+    'Churn KPI Money': dict(font=KPI_FONT, fill=KPI_FILL, border=THIN_BORDER,
+                            alignment=CENTER_ALIGN, number_format=CENTS_FORMAT),
+    'Churn Cell': dict(border=THIN_BORDER),
+    'Churn Percent': dict(border=THIN_BORDER, number_format=PERCENT_FORMAT),
+    'Churn Money': dict(border=THIN_BORDER, number_format=MONEY_FORMAT),
+    'Churn Bold': dict(font=BOLD_FONT),
+    'Churn Total': dict(font=BOLD_FONT, border=THIN_BORDER),
+    'Churn Metric Money': dict(fill=KPI_FILL, border=THIN_BORDER, number_format=MONEY_FORMAT),
+    'Churn Metric Cents': dict(fill=KPI_FILL, border=THIN_BORDER, number_format=CENTS_FORMAT),
+}
+
+# Looks of a single cell per workbook. A named style would only add a
+# cellStyleXfs record, so these are set as plain attributes instead
+CELL_LOOKS = {
+    'Churn Dashboard Title': dict(font=DASHBOARD_TITLE_FONT),
+    'Churn Note': dict(font=NOTE_FONT),
+    'Churn Insight': dict(font=INSIGHT_FONT),
+    'Churn Total Percent': dict(font=BOLD_FONT, border=THIN_BORDER, number_format=PERCENT_FORMAT),
+    'Churn Total Money': dict(font=BOLD_FONT, border=THIN_BORDER, number_format=MONEY_FORMAT),
+    'Churn Highlight Money': dict(fill=HIGHLIGHT_FILL, border=THIN_BORDER,
+                                  number_format=MONEY_FORMAT),
+}
+
+
+def register_styles(wb):
+    """Add the CELL_STYLES named styles to `wb` (styles already present are kept)."""
+    existing = set(wb.named_styles)
+    for name, spec in CELL_STYLES.items():
+        if name not in existing:
+            # Unset parts fall back to the workbook defaults, not empty elements
+            spec = {'font': DEFAULT_FONT, 'border': DEFAULT_BORDER, **spec}
+            wb.add_named_style(NamedStyle(name=name, **spec))
+
+
+def set_style(cell, name):
+    """Give `cell` the look `name`: its named style, or the attributes of a CELL_LOOKS entry."""
+    look = CELL_LOOKS.get(name)
+    if look is None:
+        cell.style = name
+    else:
+        for attribute, value in look.items():
+            setattr(cell, attribute, value)
+    return cell
+
+
+def style_range(ws, cell_range, name):
+    """Apply the look `name` to every cell of `cell_range` (e.g. 'A3:F3')."""
+    min_col, min_row, max_col, max_row = range_boundaries(cell_range)
+    for row in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
+        for cell in row:
+            set_style(cell, name)
+
+# =============================================================================
+# RAW DATA LAYOUT
+# =============================================================================
+RAW_SHEET = "Raw_Data"
+ID_COL = "customerID"
+CHURN_COL = "Churn"
+CHARGES_COL = "MonthlyCharges"
+
+
+class RawDataLayout:
+    """
+    Where each customer column lives on the Raw_Data sheet.
+
+    Column letters come from the data header and the row bounds from the
+    number of records, so formulas cover exactly the populated rows for
+    any extract. Every column is published as a workbook defined name
+    (e.g. ``Raw_Churn`` -> ``Raw_Data!$U$2:$U$7033``) that the formula
+    sheets reference instead of literal ranges.
+    """
+
+    def __init__(self, columns, n_rows, numeric_columns=(), sheet=RAW_SHEET):
+        self.columns = list(columns)
+        self.n_rows = n_rows
+        self.numeric_columns = set(numeric_columns)
+        self.sheet = sheet
+        self._letters = {col: get_column_letter(i) for i, col in enumerate(self.columns, 1)}
+
+    @classmethod
+    def from_dataframe(cls, df, n_rows=None):
+        """Build a layout from a DataFrame (or the first chunk of a stream)."""
+        numeric = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        return cls(df.columns, len(df) if n_rows is None else n_rows, numeric)
+
+    @property
+    def first_row(self):
+        return 2
+
+    @property
+    def last_row(self):
+        # An empty extract still gets a valid (single, blank) row range
+        return self.first_row + max(self.n_rows, 1) - 1
+
+    def letter(self, column):
+        """Column letter of `column` on the Raw_Data sheet."""
+        try:
+            return self._letters[column]
+        except KeyError:
+            raise KeyError(f"Column '{column}' not found in Raw_Data header") from None
+
+    def ref(self, column):
+        """Absolute range covering the populated rows of `column`."""
+        letter = self.letter(column)
+        return (f"{quote_sheetname(self.sheet)}!"
+                f"${letter}${self.first_row}:${letter}${self.last_row}")
+
+    def name(self, column):
+        """Defined name published for `column`."""
+        self.letter(column)
+        return "Raw_" + re.sub(r"[^A-Za-z0-9_.]", "_", str(column))
+
+    def flag_value(self, column, positive=True):
+        """Stored value of a Yes/No flag (1/0 once cleaned, else "Yes"/"No")."""
+        if column in self.numeric_columns:
+            return 1 if positive else 0
+        return "Yes" if positive else "No"
+
+    def yes(self, column):
+        """Criterion matching a positive flag."""
+        value = self.flag_value(column, True)
+        return f'"{value}"' if isinstance(value, str) else str(value)
+
+    def no(self, column):
+        """Criterion matching a negative flag."""
+        value = self.flag_value(column, False)
+        return f'"{value}"' if isinstance(value, str) else str(value)
+
+    def add_defined_names(self, wb):
+        """Publish one workbook-scoped defined name per column."""
+        for column in self.columns:
+            wb.defined_names[self.name(column)] = DefinedName(
+                self.name(column), attr_text=self.ref(column)
+            )
+
+
+# =============================================================================
+# SEGMENT AGGREGATES
+# =============================================================================
+SEGMENT_COLUMNS = [
+    'Contract', 'PaymentMethod', 'tenure',
+    'OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV',
+]
+
+# Recent Excel calc engine id; files stamped with an older id are fully
+# recalculated on open, which would throw the cached results away
+CACHED_CALC_ID = 191029
+
+
+def _plain(value):
+    """Convert numpy scalars to Python numbers; NaN becomes None."""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator, or None where Excel would show #DIV/0!."""
+    return numerator / denominator if denominator else None
+
+
+class SegmentAggregates:
+    """
+    Every aggregate the formula sheets reference, computed once.
+
+    The numbers come from the shared single-pass engine in
+    churn.segments, so the workbook agrees with every other output.
+    Results from CSV chunks can be combined, so --streaming mode never
+    needs the whole table in memory.
+
+    The sheet builders record the result of each formula cell they write
+    in `results`, keyed by (sheet title, coordinate). Those values are
+    cached in the saved workbook, or written in place of the formulas
+    with --static-values.
+
+    `retention` holds the churn.retention simulation shown on
+    Revenue_Analysis, when scored customers were available.
+    """
+
+    def __init__(self, summary):
+        self.summary = summary
+        self.results = {}
+        self.retention = None
+
+    @classmethod
+    def from_dataframe(cls, df, columns=SEGMENT_COLUMNS):
+        return cls(aggregate_segments(df, [col for col in columns if col in df.columns]))
+
+    @classmethod
+    def combine(cls, parts):
+        """Merge aggregates computed on separate chunks of the same data."""
+        return cls(SegmentSummary.combine(p.summary for p in parts))
+
+    def total(self, field):
+        return _plain(self.summary.overall[field])
+
+    def get(self, column, value, field):
+        """Aggregate `field` for rows where `column` == `value`."""
+        return _plain(self.summary.value(column, value, field))
+
+    def between(self, column, low, high, field):
+        """Aggregate `field` for rows where low <= `column` <= high."""
+        return _plain(self.summary.between(column, low, high, field))
+
+    def cache(self, cell, value):
+        """Remember the precomputed result of a formula cell; returns the cell."""
+        value = _plain(value)
+        if value is not None:
+            self.results[(cell.parent.title, cell.coordinate)] = value
+        return cell
 
-def auto_adjust_columns(ws):
-    """Auto-adjust column widths."""
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            except:
-                pass
-        ws.column_dimensions[column_letter].width = min(max_length + 2, 40)
 
+def _display_text(value, number_format):
+    """Roughly how Excel shows `value` with the formats used in this workbook."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value)
+    if number_format in (None, 'General'):
+        return str(value)
+    decimals = len(number_format.split('.', 1)[1].rstrip('%')) if '.' in number_format else 0
+    percent = number_format.endswith('%')
+    grouping = ',' if ',' in number_format else ''
+    text = f"{value * 100 if percent else value:{grouping}.{decimals}f}"
+    return ('$' if number_format.startswith('$') else '') + text + ('%' if percent else '')
 
-def create_dashboard_sheet(wb, df):
+
+def _fit_width(length):
+    return min(length + 2, MAX_COLUMN_WIDTH)
+
+
+def auto_adjust_columns(ws, results=None):
+    """
+    Size the columns of a (small) formula sheet to their displayed text.
+
+    Formula cells are measured by their precomputed result from
+    `results` (SegmentAggregates.results) in the cell's number format,
+    not by the formula text. Raw_Data is sized with
+    dataframe_column_widths instead.
+    """
+    results = results or {}
+    widths = {}
+    for row in ws.iter_rows():
+        for cell in row:
+            value = cell.value
+            if isinstance(value, str) and value.startswith('='):
+                value = results.get((ws.title, cell.coordinate))
+                if value is None:
+                    continue
+            elif not value:
+                continue
+            length = len(_display_text(value, cell.number_format))
+            widths[cell.column] = max(widths.get(cell.column, 0), length)
+    for column, length in widths.items():
+        ws.column_dimensions[get_column_letter(column)].width = _fit_width(length)
+
+
+def dataframe_column_widths(df, sample_rows=DEFAULT_WIDTH_SAMPLE):
+    """
+    Raw_Data column widths from the frame itself, one vectorized pass per column.
+
+    Frames longer than `sample_rows` are measured on a fixed random
+    sample of that many rows (None or 0 measures every row). Categorical
+    columns only measure their categories. Returns a width per column.
+    """
+    if sample_rows and len(df) > sample_rows:
+        df = df.sample(n=sample_rows, random_state=0)
+    widths = []
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.cat.categories.to_series()
+        lengths = series.dropna().astype(str).str.len()
+        max_length = max(len(str(column)), int(lengths.max()) if len(lengths) else 0)
+        widths.append(_fit_width(max_length))
+    return widths
+
+
+def set_column_widths(ws, widths):
+    """Apply a width per column, starting at column A."""
+    for col_idx, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+
+def create_dashboard_sheet(wb, layout, agg):
     """Create executive dashboard with KPIs."""
     ws = wb.create_sheet("Dashboard", 0)
     
     # Title
     ws['A1'] = "CUSTOMER CHURN ANALYSIS DASHBOARD"
-    ws['A1'].font = Font(name="Calibri", size=24, bold=True, color="C65911")
+    set_style(ws['A1'], 'Churn Dashboard Title')
     ws.merge_cells('A1:G1')
     
     ws['A2'] = f"Analysis Date: {datetime.now().strftime('%B %d, %Y')}"
-    ws['A2'].font = Font(italic=True)
+    set_style(ws['A2'], 'Churn Note')
     
     # KPI Section - Using formulas referencing Raw_Data
     ws['A4'] = "KEY PERFORMANCE INDICATORS"
-    ws['A4'].font = TITLE_FONT
+    set_style(ws['A4'], 'Churn Title')
     
     # KPI Grid
+    churn = layout.name(CHURN_COL)
+    charges = layout.name(CHARGES_COL)
+    yes, no = layout.yes(CHURN_COL), layout.no(CHURN_COL)
+    total = agg.total('customers')
+    churned = agg.total('churned')
+    retained = agg.total('retained')
+    revenue_at_risk = agg.total('churned_revenue')
     kpis = [
-        ("A6", "Total Customers", "B6", "=COUNTA(Raw_Data!A2:A7044)"),
-        ("C6", "Churned", "D6", "=COUNTIF(Raw_Data!U2:U7044,\"Yes\")"),
-        ("E6", "Retained", "F6", "=COUNTIF(Raw_Data!U2:U7044,\"No\")"),
-        ("A8", "Churn Rate", "B8", "=D6/B6"),
-        ("C8", "Retention Rate", "D8", "=F6/B6"),
-        ("E8", "Avg Monthly Charges", "F8", "=AVERAGE(Raw_Data!S2:S7044)"),
-        ("A10", "Total Monthly Revenue", "B10", "=SUM(Raw_Data!S2:S7044)"),
-        ("C10", "Revenue at Risk", "D10", "=SUMIF(Raw_Data!U2:U7044,\"Yes\",Raw_Data!S2:S7044)"),
-        ("E10", "Annual Risk ($)", "F10", "=D10*12"),
+        ("A6", "Total Customers", "B6", f"=COUNTA({layout.name(ID_COL)})", total),
+        ("C6", "Churned", "D6", f"=COUNTIF({churn},{yes})", churned),
+        ("E6", "Retained", "F6", f"=COUNTIF({churn},{no})", retained),
+        ("A8", "Churn Rate", "B8", "=D6/B6", _ratio(churned, total)),
+        ("C8", "Retention Rate", "D8", "=F6/B6", _ratio(retained, total)),
+        ("E8", "Avg Monthly Charges", "F8", f"=AVERAGE({charges})",
+         _ratio(agg.total('revenue'), agg.total('charged'))),
+        ("A10", "Total Monthly Revenue", "B10", f"=SUM({charges})", agg.total('revenue')),
+        ("C10", "Revenue at Risk", "D10", f"=SUMIF({churn},{yes},{charges})", revenue_at_risk),
+        ("E10", "Annual Risk ($)", "F10", "=D10*12", revenue_at_risk * 12),
     ]
     
-    for label_cell, label, value_cell, formula in kpis:
+    for label_cell, label, value_cell, formula, value in kpis:
         ws[label_cell] = label
-        ws[label_cell].font = Font(bold=True, size=10)
-        ws[label_cell].fill = SUBHEADER_FILL
-        ws[label_cell].font = HEADER_FONT
-        ws[label_cell].border = THIN_BORDER
+        set_style(ws[label_cell], 'Churn KPI Label')
         
         ws[value_cell] = formula
-        ws[value_cell].font = KPI_FONT
-        ws[value_cell].fill = KPI_FILL
-        ws[value_cell].border = THIN_BORDER
-        ws[value_cell].alignment = CENTER_ALIGN
+        agg.cache(ws[value_cell], value)
         
         # Format percentages and currency
         if "Rate" in label:
-            ws[value_cell].number_format = '0.00%'
+            set_style(ws[value_cell], 'Churn KPI Percent')
         elif "Revenue" in label or "Risk" in label or "Charges" in label:
-            ws[value_cell].number_format = '$#,##0.00'
+            set_style(ws[value_cell], 'Churn KPI Money')
+        else:
+            set_style(ws[value_cell], 'Churn KPI')
     
     # Insight Box
     ws['A13'] = "KEY INSIGHT"
-    ws['A13'].font = TITLE_FONT
+    set_style(ws['A13'], 'Churn Title')
     
     ws['A14'] = "Revenue at Risk Formula: =SUMIF(Churn='Yes', MonthlyCharges) * 12"
     ws['A15'] = "This represents annual revenue that could be lost if all at-risk customers churn."
     
-    auto_adjust_columns(ws)
+    auto_adjust_columns(ws, agg.results)
     return ws
 
 
-def create_churn_by_contract_sheet(wb, df):
+def create_churn_by_contract_sheet(wb, layout, agg):
     """Churn analysis by contract type with formulas."""
     ws = wb.create_sheet("Churn_by_Contract")
     
     ws['A1'] = "CHURN ANALYSIS BY CONTRACT TYPE"
-    ws['A1'].font = TITLE_FONT
+    set_style(ws['A1'], 'Churn Title')
     ws.merge_cells('A1:F1')
     
     # Headers
     headers = ['Contract Type', 'Total', 'Churned', 'Retained', 'Churn Rate', 'Revenue at Risk']
     for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.fill = HEADER_FILL
-        cell.font = HEADER_FONT
-        cell.border = THIN_BORDER
+        ws.cell(row=3, column=col, value=header)
+    style_range(ws, 'A3:F3', 'Churn Header')
     
     # Contract types
     contracts = ['Month-to-month', 'One year', 'Two year']
+    contract_rng = layout.name('Contract')
+    churn = layout.name(CHURN_COL)
+    charges = layout.name(CHARGES_COL)
+    yes = layout.yes(CHURN_COL)
+    
+    totals = {'customers': 0, 'churned': 0, 'churned_revenue': 0}
     
     for i, contract in enumerate(contracts):
         row = i + 4
+        customers = agg.get('Contract', contract, 'customers')
+        churned = agg.get('Contract', contract, 'churned')
+        at_risk = agg.get('Contract', contract, 'churned_revenue')
+        totals['customers'] += customers
+        totals['churned'] += churned
+        totals['churned_revenue'] += at_risk
         
         # Contract Type
-        ws.cell(row=row, column=1, value=contract).border = THIN_BORDER
+        ws.cell(row=row, column=1, value=contract)
         
         # Total (COUNTIF)
-        ws.cell(row=row, column=2, 
-                value=f'=COUNTIF(Raw_Data!O2:O7044,"{contract}")').border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=2, 
+                value=f'=COUNTIF({contract_rng},"{contract}")'), customers)
         
         # Churned (COUNTIFS)
-        ws.cell(row=row, column=3,
-                value=f'=COUNTIFS(Raw_Data!O2:O7044,"{contract}",Raw_Data!U2:U7044,"Yes")').border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=3,
+                value=f'=COUNTIFS({contract_rng},"{contract}",{churn},{yes})'), churned)
         
         # Retained (formula)
-        ws.cell(row=row, column=4, value=f'=B{row}-C{row}').border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=4, value=f'=B{row}-C{row}'), customers - churned)
         
         # Churn Rate (formula)
-        churn_cell = ws.cell(row=row, column=5, value=f'=C{row}/B{row}')
-        churn_cell.number_format = '0.00%'
-        churn_cell.border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=5, value=f'=C{row}/B{row}'), _ratio(churned, customers))
         
         # Revenue at Risk (SUMIFS)
-        rev_cell = ws.cell(row=row, column=6,
-                          value=f'=SUMIFS(Raw_Data!S2:S7044,Raw_Data!O2:O7044,"{contract}",Raw_Data!U2:U7044,"Yes")*12')
-        rev_cell.number_format = '$#,##0'
-        rev_cell.border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=6,
+                value=f'=SUMIFS({charges},{contract_rng},"{contract}",{churn},{yes})*12'),
+                  at_risk * 12)
+    
+    style_range(ws, 'A4:D6', 'Churn Cell')
+    style_range(ws, 'E4:E6', 'Churn Percent')
+    style_range(ws, 'F4:F6', 'Churn Money')
     
     # Total row
     row = 7
-    ws.cell(row=row, column=1, value="TOTAL").font = Font(bold=True)
-    ws.cell(row=row, column=1).border = THIN_BORDER
-    ws.cell(row=row, column=2, value="=SUM(B4:B6)").border = THIN_BORDER
-    ws.cell(row=row, column=2).font = Font(bold=True)
-    ws.cell(row=row, column=3, value="=SUM(C4:C6)").border = THIN_BORDER
-    ws.cell(row=row, column=3).font = Font(bold=True)
-    ws.cell(row=row, column=4, value="=SUM(D4:D6)").border = THIN_BORDER
-    ws.cell(row=row, column=4).font = Font(bold=True)
-    ws.cell(row=row, column=5, value="=C7/B7").number_format = '0.00%'
-    ws.cell(row=row, column=5).border = THIN_BORDER
-    ws.cell(row=row, column=5).font = Font(bold=True)
-    ws.cell(row=row, column=6, value="=SUM(F4:F6)").number_format = '$#,##0'
-    ws.cell(row=row, column=6).border = THIN_BORDER
-    ws.cell(row=row, column=6).font = Font(bold=True)
+    ws.cell(row=row, column=1, value="TOTAL")
+    agg.cache(ws.cell(row=row, column=2, value="=SUM(B4:B6)"), totals['customers'])
+    agg.cache(ws.cell(row=row, column=3, value="=SUM(C4:C6)"), totals['churned'])
+    agg.cache(ws.cell(row=row, column=4, value="=SUM(D4:D6)"),
+              totals['customers'] - totals['churned'])
+    agg.cache(ws.cell(row=row, column=5, value="=C7/B7"),
+              _ratio(totals['churned'], totals['customers']))
+    agg.cache(ws.cell(row=row, column=6, value="=SUM(F4:F6)"), totals['churned_revenue'] * 12)
+    style_range(ws, 'A7:D7', 'Churn Total')
+    set_style(ws['E7'], 'Churn Total Percent')
+    set_style(ws['F7'], 'Churn Total Money')
     
     # Add color scale to churn rate
     ws.conditional_formatting.add(
@@ -209,45 +545,49 @@ def create_churn_by_contract_sheet(wb, df):
     
     ws.add_chart(chart, "H3")
     
-    auto_adjust_columns(ws)
+    auto_adjust_columns(ws, agg.results)
     return ws
 
 
-def create_churn_by_payment_sheet(wb, df):
+def create_churn_by_payment_sheet(wb, layout, agg):
     """Churn analysis by payment method."""
     ws = wb.create_sheet("Churn_by_Payment")
     
     ws['A1'] = "CHURN ANALYSIS BY PAYMENT METHOD"
-    ws['A1'].font = TITLE_FONT
+    set_style(ws['A1'], 'Churn Title')
     ws.merge_cells('A1:F1')
     
     headers = ['Payment Method', 'Total', 'Churned', 'Retained', 'Churn Rate', 'Revenue at Risk']
     for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.fill = HEADER_FILL
-        cell.font = HEADER_FONT
-        cell.border = THIN_BORDER
+        ws.cell(row=3, column=col, value=header)
+    style_range(ws, 'A3:F3', 'Churn Header')
     
     payments = ['Electronic check', 'Mailed check', 'Bank transfer (automatic)', 'Credit card (automatic)']
+    payment_rng = layout.name('PaymentMethod')
+    churn = layout.name(CHURN_COL)
+    charges = layout.name(CHARGES_COL)
+    yes = layout.yes(CHURN_COL)
     
     for i, payment in enumerate(payments):
         row = i + 4
+        customers = agg.get('PaymentMethod', payment, 'customers')
+        churned = agg.get('PaymentMethod', payment, 'churned')
+        at_risk = agg.get('PaymentMethod', payment, 'churned_revenue')
         
-        ws.cell(row=row, column=1, value=payment).border = THIN_BORDER
-        ws.cell(row=row, column=2,
-                value=f'=COUNTIF(Raw_Data!P2:P7044,"{payment}")').border = THIN_BORDER
-        ws.cell(row=row, column=3,
-                value=f'=COUNTIFS(Raw_Data!P2:P7044,"{payment}",Raw_Data!U2:U7044,"Yes")').border = THIN_BORDER
-        ws.cell(row=row, column=4, value=f'=B{row}-C{row}').border = THIN_BORDER
-        
-        churn_cell = ws.cell(row=row, column=5, value=f'=C{row}/B{row}')
-        churn_cell.number_format = '0.00%'
-        churn_cell.border = THIN_BORDER
-        
-        rev_cell = ws.cell(row=row, column=6,
-                          value=f'=SUMIFS(Raw_Data!S2:S7044,Raw_Data!P2:P7044,"{payment}",Raw_Data!U2:U7044,"Yes")*12')
-        rev_cell.number_format = '$#,##0'
-        rev_cell.border = THIN_BORDER
+        ws.cell(row=row, column=1, value=payment)
+        agg.cache(ws.cell(row=row, column=2,
+                value=f'=COUNTIF({payment_rng},"{payment}")'), customers)
+        agg.cache(ws.cell(row=row, column=3,
+                value=f'=COUNTIFS({payment_rng},"{payment}",{churn},{yes})'), churned)
+        agg.cache(ws.cell(row=row, column=4, value=f'=B{row}-C{row}'), customers - churned)
+        agg.cache(ws.cell(row=row, column=5, value=f'=C{row}/B{row}'), _ratio(churned, customers))
+        agg.cache(ws.cell(row=row, column=6,
+                value=f'=SUMIFS({charges},{payment_rng},"{payment}",{churn},{yes})*12'),
+                  at_risk * 12)
+    
+    style_range(ws, 'A4:D7', 'Churn Cell')
+    style_range(ws, 'E4:E7', 'Churn Percent')
+    style_range(ws, 'F4:F7', 'Churn Money')
     
     # Add color scale
     ws.conditional_formatting.add(
@@ -256,67 +596,70 @@ def create_churn_by_payment_sheet(wb, df):
                       end_type='max', end_color='F8696B')
     )
     
-    auto_adjust_columns(ws)
+    auto_adjust_columns(ws, agg.results)
     return ws
 
 
-def create_tenure_analysis_sheet(wb, df):
+def create_tenure_analysis_sheet(wb, layout, agg):
     """Churn analysis by tenure buckets."""
     ws = wb.create_sheet("Churn_by_Tenure")
     
     ws['A1'] = "CHURN ANALYSIS BY CUSTOMER TENURE"
-    ws['A1'].font = TITLE_FONT
+    set_style(ws['A1'], 'Churn Title')
     ws.merge_cells('A1:F1')
     
     headers = ['Tenure Bucket', 'Min Months', 'Max Months', 'Customers', 'Churned', 'Churn Rate']
     for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.fill = HEADER_FILL
-        cell.font = HEADER_FONT
-        cell.border = THIN_BORDER
+        ws.cell(row=3, column=col, value=header)
+    style_range(ws, 'A3:F3', 'Churn Header')
     
     # Tenure buckets
-    buckets = [
-        ('0-12 months', 0, 12),
-        ('13-24 months', 13, 24),
-        ('25-36 months', 25, 36),
-        ('37-48 months', 37, 48),
-        ('49-60 months', 49, 60),
-        ('61-72 months', 61, 72),
-    ]
+    buckets = TENURE_BUCKETS
+    tenure = layout.name('tenure')
+    churn = layout.name(CHURN_COL)
+    yes = layout.yes(CHURN_COL)
     
     for i, (label, min_m, max_m) in enumerate(buckets):
         row = i + 4
         
-        ws.cell(row=row, column=1, value=label).border = THIN_BORDER
-        ws.cell(row=row, column=2, value=min_m).border = THIN_BORDER
-        ws.cell(row=row, column=3, value=max_m).border = THIN_BORDER
+        customers = agg.between('tenure', min_m, max_m, 'customers')
+        churned = agg.between('tenure', min_m, max_m, 'churned')
+        
+        ws.cell(row=row, column=1, value=label)
+        ws.cell(row=row, column=2, value=min_m)
+        ws.cell(row=row, column=3, value=max_m)
         
         # Customers in range (COUNTIFS)
-        ws.cell(row=row, column=4,
-                value=f'=COUNTIFS(Raw_Data!F2:F7044,">="&B{row},Raw_Data!F2:F7044,"<="&C{row})').border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=4,
+                value=f'=COUNTIFS({tenure},">="&B{row},{tenure},"<="&C{row})'), customers)
         
         # Churned in range
-        ws.cell(row=row, column=5,
-                value=f'=COUNTIFS(Raw_Data!F2:F7044,">="&B{row},Raw_Data!F2:F7044,"<="&C{row},Raw_Data!U2:U7044,"Yes")').border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=5,
+                value=f'=COUNTIFS({tenure},">="&B{row},{tenure},"<="&C{row},{churn},{yes})'),
+                  churned)
         
         # Churn Rate
-        churn_cell = ws.cell(row=row, column=6, value=f'=IF(D{row}=0,0,E{row}/D{row})')
-        churn_cell.number_format = '0.00%'
-        churn_cell.border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=6, value=f'=IF(D{row}=0,0,E{row}/D{row})'),
+                  _ratio(churned, customers) or 0)
+    
+    last_row = 3 + len(buckets)
+    style_range(ws, f'A4:E{last_row}', 'Churn Cell')
+    style_range(ws, f'F4:F{last_row}', 'Churn Percent')
     
     # Color scale
     ws.conditional_formatting.add(
-        'F4:F9',
+        f'F4:F{last_row}',
         ColorScaleRule(start_type='min', start_color='63BE7B',
                       end_type='max', end_color='F8696B')
     )
     
     # Key insight
-    ws['A11'] = "KEY INSIGHT:"
-    ws['A11'].font = Font(bold=True)
-    ws['A12'] = "New customers (0-12 months) have the highest churn risk."
-    ws['A13'] = "Focus retention efforts on the first year of customer relationship."
+    insight_row = last_row + 2
+    set_style(ws.cell(row=insight_row, column=1, value="KEY INSIGHT:"), 'Churn Bold')
+    ws.cell(row=insight_row + 1, column=1,
+            value="New customers (0-12 months) have the highest churn risk.")
+    ws.cell(row=insight_row + 2, column=1,
+            value="Focus retention efforts on the first year of customer relationship.")
     
     # Add line chart
     chart = LineChart()
@@ -325,8 +668,8 @@ def create_tenure_analysis_sheet(wb, df):
     chart.y_axis.title = "Churn Rate"
     chart.x_axis.title = "Tenure Bucket"
     
-    data = Reference(ws, min_col=6, min_row=3, max_row=9)
-    cats = Reference(ws, min_col=1, min_row=4, max_row=9)
+    data = Reference(ws, min_col=6, min_row=3, max_row=last_row)
+    cats = Reference(ws, min_col=1, min_row=4, max_row=last_row)
     chart.add_data(data, titles_from_data=True)
     chart.set_categories(cats)
     chart.width = 14
@@ -334,200 +677,729 @@ def create_tenure_analysis_sheet(wb, df):
     
     ws.add_chart(chart, "H3")
     
-    auto_adjust_columns(ws)
+    auto_adjust_columns(ws, agg.results)
     return ws
 
 
-def create_service_impact_sheet(wb, df):
+def create_service_impact_sheet(wb, layout, agg):
     """Analyze churn by service subscriptions."""
     ws = wb.create_sheet("Service_Impact")
     
     ws['A1'] = "CHURN IMPACT BY SERVICE SUBSCRIPTIONS"
-    ws['A1'].font = TITLE_FONT
+    set_style(ws['A1'], 'Churn Title')
     ws.merge_cells('A1:F1')
     
     headers = ['Service', 'Has Service', 'Churned', 'Churn Rate', 'Without Service', 'Churn Rate (No)']
     for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.fill = HEADER_FILL
-        cell.font = HEADER_FONT
-        cell.border = THIN_BORDER
+        ws.cell(row=3, column=col, value=header)
+    style_range(ws, 'A3:F3', 'Churn Header')
     
-    # Services with their column letters in Raw_Data
+    # Services with their Raw_Data column names
     services = [
-        ('Online Security', 'J'),
-        ('Online Backup', 'K'),
-        ('Device Protection', 'L'),
-        ('Tech Support', 'M'),
-        ('Streaming TV', 'N'),
+        ('Online Security', 'OnlineSecurity'),
+        ('Online Backup', 'OnlineBackup'),
+        ('Device Protection', 'DeviceProtection'),
+        ('Tech Support', 'TechSupport'),
+        ('Streaming TV', 'StreamingTV'),
     ]
+    churn = layout.name(CHURN_COL)
+    churn_yes = layout.yes(CHURN_COL)
     
-    for i, (service, col_letter) in enumerate(services):
+    for i, (service, column) in enumerate(services):
         row = i + 4
+        service_rng = layout.name(column)
+        yes, no = layout.yes(column), layout.no(column)
+        has_value = layout.flag_value(column, True)
+        without_value = layout.flag_value(column, False)
+        has_service = agg.get(column, has_value, 'customers')
+        has_churned = agg.get(column, has_value, 'churned')
+        without_service = agg.get(column, without_value, 'customers')
+        without_churned = agg.get(column, without_value, 'churned')
         
-        ws.cell(row=row, column=1, value=service).border = THIN_BORDER
+        ws.cell(row=row, column=1, value=service)
         
         # Has Service
-        ws.cell(row=row, column=2,
-                value=f'=COUNTIF(Raw_Data!{col_letter}2:{col_letter}7044,"Yes")').border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=2,
+                value=f'=COUNTIF({service_rng},{yes})'), has_service)
         
         # Churned with service
-        ws.cell(row=row, column=3,
-                value=f'=COUNTIFS(Raw_Data!{col_letter}2:{col_letter}7044,"Yes",Raw_Data!U2:U7044,"Yes")').border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=3,
+                value=f'=COUNTIFS({service_rng},{yes},{churn},{churn_yes})'), has_churned)
         
         # Churn Rate with service
-        churn1 = ws.cell(row=row, column=4, value=f'=IF(B{row}=0,0,C{row}/B{row})')
-        churn1.number_format = '0.00%'
-        churn1.border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=4, value=f'=IF(B{row}=0,0,C{row}/B{row})'),
+                  _ratio(has_churned, has_service) or 0)
         
         # Without Service
-        ws.cell(row=row, column=5,
-                value=f'=COUNTIF(Raw_Data!{col_letter}2:{col_letter}7044,"No")').border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=5,
+                value=f'=COUNTIF({service_rng},{no})'), without_service)
         
         # Churn Rate without service
-        ws.cell(row=row, column=6,
-                value=f'=COUNTIFS(Raw_Data!{col_letter}2:{col_letter}7044,"No",Raw_Data!U2:U7044,"Yes")/E{row}')
-        ws.cell(row=row, column=6).number_format = '0.00%'
-        ws.cell(row=row, column=6).border = THIN_BORDER
+        agg.cache(ws.cell(row=row, column=6,
+                value=f'=COUNTIFS({service_rng},{no},{churn},{churn_yes})/E{row}'),
+                  _ratio(without_churned, without_service))
+    
+    last_row = 3 + len(services)
+    style_range(ws, f'A4:C{last_row}', 'Churn Cell')
+    style_range(ws, f'D4:D{last_row}', 'Churn Percent')
+    style_range(ws, f'E4:E{last_row}', 'Churn Cell')
+    style_range(ws, f'F4:F{last_row}', 'Churn Percent')
     
     # Key insight
     ws['A10'] = "INSIGHT: Customers WITHOUT these services have higher churn rates."
-    ws['A10'].font = Font(bold=True, color="C65911")
+    set_style(ws['A10'], 'Churn Insight')
     ws['A11'] = "Recommendation: Upsell protective services to reduce churn risk."
     
-    auto_adjust_columns(ws)
+    auto_adjust_columns(ws, agg.results)
     return ws
 
 
-def create_revenue_analysis_sheet(wb, df):
+def create_revenue_analysis_sheet(wb, layout, agg):
     """Revenue analysis and projections."""
     ws = wb.create_sheet("Revenue_Analysis")
     
     ws['A1'] = "REVENUE AT RISK ANALYSIS"
-    ws['A1'].font = TITLE_FONT
+    set_style(ws['A1'], 'Churn Title')
     ws.merge_cells('A1:D1')
     
     # Revenue metrics
+    churn = layout.name(CHURN_COL)
+    charges = layout.name(CHARGES_COL)
+    yes, no = layout.yes(CHURN_COL), layout.no(CHURN_COL)
+    churned_revenue = agg.total('churned_revenue')
+    retained_revenue = agg.total('retained_revenue')
+    annual_at_risk = churned_revenue * 12
     metrics = [
-        ('Total Monthly Revenue', '=SUM(Raw_Data!S2:S7044)', '$#,##0'),
-        ('Revenue from Churned', '=SUMIF(Raw_Data!U2:U7044,"Yes",Raw_Data!S2:S7044)', '$#,##0'),
-        ('Revenue from Retained', '=SUMIF(Raw_Data!U2:U7044,"No",Raw_Data!S2:S7044)', '$#,##0'),
-        ('Monthly Revenue at Risk', '=B5', '$#,##0'),
-        ('Annual Revenue at Risk', '=B7*12', '$#,##0'),
-        ('Avg Charges (Churned)', '=AVERAGEIF(Raw_Data!U2:U7044,"Yes",Raw_Data!S2:S7044)', '$#,##0.00'),
-        ('Avg Charges (Retained)', '=AVERAGEIF(Raw_Data!U2:U7044,"No",Raw_Data!S2:S7044)', '$#,##0.00'),
+        ('Total Monthly Revenue', f'=SUM({charges})', 'Churn Metric Money', agg.total('revenue')),
+        ('Revenue from Churned', f'=SUMIF({churn},{yes},{charges})', 'Churn Metric Money',
+         churned_revenue),
+        ('Revenue from Retained', f'=SUMIF({churn},{no},{charges})', 'Churn Metric Money',
+         retained_revenue),
+        ('Monthly Revenue at Risk', '=B5', 'Churn Metric Money', churned_revenue),
+        ('Annual Revenue at Risk', '=B7*12', 'Churn Metric Money', annual_at_risk),
+        ('Avg Charges (Churned)', f'=AVERAGEIF({churn},{yes},{charges})', 'Churn Metric Cents',
+         _ratio(churned_revenue, agg.total('churned'))),
+        ('Avg Charges (Retained)', f'=AVERAGEIF({churn},{no},{charges})', 'Churn Metric Cents',
+         _ratio(retained_revenue, agg.total('retained'))),
     ]
     
-    for i, (label, formula, fmt) in enumerate(metrics):
+    for i, (label, formula, style, value) in enumerate(metrics):
         row = i + 4
-        ws.cell(row=row, column=1, value=label).border = THIN_BORDER
-        ws.cell(row=row, column=1).font = Font(bold=True)
-        
-        val_cell = ws.cell(row=row, column=2, value=formula)
-        val_cell.number_format = fmt
-        val_cell.border = THIN_BORDER
-        val_cell.fill = KPI_FILL
+        ws.cell(row=row, column=1, value=label)
+        set_style(agg.cache(ws.cell(row=row, column=2, value=formula), value), style)
+    style_range(ws, f'A4:A{3 + len(metrics)}', 'Churn Total')
     
     # Retention scenarios
     ws['A13'] = "RETENTION SCENARIO ANALYSIS"
-    ws['A13'].font = TITLE_FONT
+    set_style(ws['A13'], 'Churn Title')
     
     ws['A15'] = "If we retain"
     ws['B15'] = "We save annually"
-    ws['A15'].font = Font(bold=True)
-    ws['B15'].font = Font(bold=True)
+    style_range(ws, 'A15:B15', 'Churn Bold')
     
     scenarios = [10, 25, 50, 75, 100]
     for i, pct in enumerate(scenarios):
         row = 16 + i
-        ws.cell(row=row, column=1, value=f'{pct}% of at-risk').border = THIN_BORDER
+        set_style(ws.cell(row=row, column=1, value=f'{pct}% of at-risk'), 'Churn Cell')
         
-        save_cell = ws.cell(row=row, column=2, value=f'=B8*{pct/100}')
-        save_cell.number_format = '$#,##0'
-        save_cell.border = THIN_BORDER
-        if pct == 50:
-            save_cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+        save_cell = agg.cache(ws.cell(row=row, column=2, value=f'=B8*{pct/100}'),
+                              annual_at_risk * pct / 100)
+        set_style(save_cell, 'Churn Highlight Money' if pct == 50 else 'Churn Money')
+
+    if agg.retention is not None:
+        write_retention_simulation(ws, agg.retention, first_row=23)
     
-    auto_adjust_columns(ws)
+    auto_adjust_columns(ws, agg.results)
+    return ws
+
+
+def _write_table(ws, first_row, table):
+    """Write a DataFrame with a header row; numeric columns as money. Returns the next free row."""
+    for c_idx, column in enumerate(table.columns, 1):
+        set_style(ws.cell(row=first_row, column=c_idx, value=column), 'Churn Header')
+    for r_idx, row in enumerate(table.itertuples(index=False), first_row + 1):
+        for c_idx, value in enumerate(row, 1):
+            cell = ws.cell(row=r_idx, column=c_idx, value=_plain(value))
+            set_style(cell, 'Churn Cell' if isinstance(value, str) else 'Churn Money')
+    return first_row + len(table) + 1
+
+
+def write_retention_simulation(ws, results, first_row):
+    """
+    Monte Carlo retention results (churn.retention) below the fixed scenarios.
+
+    Plain values, not formulas: expected saved revenue and percentile
+    bands per policy, then by contract and by risk segment.
+    """
+    bands = [f"P{p}" for p in PERCENTILES]
+    customers = int(results.cells.size.sum())
+
+    title_cell = ws.cell(row=first_row, column=1, value="MONTE CARLO RETENTION SIMULATION")
+    set_style(title_cell, 'Churn Title')
+    ws.cell(row=first_row + 1, column=1,
+            value=f"Annual revenue saved over {results.n_draws:,} simulated years; each of "
+                  f"{customers:,} scored customers churns with its own ChurnProbability")
+    row = _write_table(ws, first_row + 3, results.summary()[['Policy', 'Expected'] + bands])
+
+    for title, by in (("BY CONTRACT", CONTRACT_COL), ("BY RISK SEGMENT", RISK_COL)):
+        set_style(ws.cell(row=row + 1, column=1, value=title), 'Churn Bold')
+        table = results.summary(by)[['Policy', by, 'Expected', 'P5', 'P50', 'P95']]
+        row = _write_table(ws, row + 2, table)
     return ws
 
 
-def create_raw_data_sheet(wb, df):
-    """Create raw data sheet."""
-    ws = wb.create_sheet("Raw_Data")
+def create_raw_data_sheet(wb, df, width_sample=DEFAULT_WIDTH_SAMPLE, with_rows=True):
+    """
+    Create raw data sheet.
+
+    Without `with_rows` only the header row and column widths are
+    written; --parallel mode splices the data rows in when assembling.
+    """
+    ws = wb.create_sheet(RAW_SHEET)
     
     # Write data
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
+    rows = dataframe_to_rows(df if with_rows else df.iloc[:0], index=False, header=True)
+    for r_idx, row in enumerate(rows, 1):
         for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            if r_idx == 1:
-                cell.fill = HEADER_FILL
-                cell.font = HEADER_FONT
+            ws.cell(row=r_idx, column=c_idx, value=value)
+    register_styles(wb)
+    style_range(ws, f'A1:{get_column_letter(len(df.columns))}1', 'Churn Data Header')
     
-    auto_adjust_columns(ws)
+    set_column_widths(ws, dataframe_column_widths(df, width_sample))
     return ws
 
 
-def main():
-    print("=" * 70)
-    print("CUSTOMER CHURN - ENHANCED EXCEL WORKBOOK GENERATOR")
-    print("=" * 70)
-    
-    # Load data
-    print("\nLoading data...")
-    df = pd.read_csv(DATA_PATH)
-    print(f"   Loaded {len(df):,} records")
-    
-    # Create output directory
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Create workbook
-    print("\nCreating Excel workbook with DYNAMIC formulas...")
-    wb = Workbook()
-    
-    if 'Sheet' in wb.sheetnames:
-        del wb['Sheet']
-    
-    print("   -> Dashboard (KPI formulas)")
-    create_dashboard_sheet(wb, df)
-    
-    print("   -> Churn by Contract (COUNTIFS, SUMIFS)")
-    create_churn_by_contract_sheet(wb, df)
-    
-    print("   -> Churn by Payment (COUNTIFS, SUMIFS)")
-    create_churn_by_payment_sheet(wb, df)
-    
-    print("   -> Churn by Tenure (range formulas)")
-    create_tenure_analysis_sheet(wb, df)
-    
-    print("   -> Service Impact (cross-analysis)")
-    create_service_impact_sheet(wb, df)
-    
-    print("   -> Revenue Analysis (scenarios)")
-    create_revenue_analysis_sheet(wb, df)
-    
-    print("   -> Raw Data")
-    create_raw_data_sheet(wb, df)
-    
-    # Save
-    print(f"\nSaving to: {OUTPUT_PATH}")
-    wb.save(OUTPUT_PATH)
-    
-    # Count formulas
+def build_formula_sheets(wb, layout, agg, verbose=True):
+    """Create all formula sheets (everything except Raw_Data) in order."""
+    builders = [
+        ("Dashboard (KPI formulas)", create_dashboard_sheet),
+        ("Churn by Contract (COUNTIFS, SUMIFS)", create_churn_by_contract_sheet),
+        ("Churn by Payment (COUNTIFS, SUMIFS)", create_churn_by_payment_sheet),
+        ("Churn by Tenure (range formulas)", create_tenure_analysis_sheet),
+        ("Service Impact (cross-analysis)", create_service_impact_sheet),
+        ("Revenue Analysis (scenarios)", create_revenue_analysis_sheet),
+    ]
+    register_styles(wb)
+    for description, builder in builders:
+        if verbose:
+            print(f"   -> {description}")
+        builder(wb, layout, agg)
+
+
+def count_formulas(wb):
+    """
+    Count formula cells across the formula sheets of an in-memory workbook.
+
+    Raw_Data only holds values, so it is skipped instead of scanned cell
+    by cell; use scripts/verify_excel_formulas.py to check a saved file.
+    """
     total_formulas = 0
-    for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
+    for ws in wb.worksheets:
+        if ws.title == RAW_SHEET:
+            continue
         for row in ws.iter_rows():
             for cell in row:
                 if cell.value and str(cell.value).startswith('='):
                     total_formulas += 1
+    return total_formulas
+
+
+# =============================================================================
+# CACHED RESULTS
+# =============================================================================
+_FORMULA_CELL = re.compile(
+    r'(<c r="(?P<ref>[A-Z]+[0-9]+)"[^>]*>)(<f>[^<]*</f>)(?:<v\s*/>|<v></v>)(</c>)'
+)
+
+
+def apply_static_values(wb, results):
+    """Replace every formula that has a precomputed result with its value."""
+    for (sheet, coordinate), value in results.items():
+        wb[sheet][coordinate].value = value
+
+
+def prepare_cached_calculation(wb):
+    """Tell Excel to trust the cached results instead of recalculating on open."""
+    wb.calculation.fullCalcOnLoad = False
+    wb.calculation.calcId = CACHED_CALC_ID
+
+
+def _sheet_parts(archive):
+    """Map sheet titles to their XML part names inside an .xlsx archive."""
+    ns = {
+        'm': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+        'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+        'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    }
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.findall('rel:Relationship', ns)}
+
+    parts = {}
+    for sheet in workbook.find('m:sheets', ns):
+        target = targets[sheet.get(f"{{{ns['r']}}}id")]
+        parts[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    return parts
+
+
+def _cached_values_by_part(archive, results):
+    """Group `results` by the XML part of their sheet inside `archive`."""
+    by_sheet = {}
+    for (sheet, coordinate), value in results.items():
+        by_sheet.setdefault(sheet, {})[coordinate] = value
+    return {part: by_sheet[title] for title, part in _sheet_parts(archive).items()
+            if title in by_sheet}
+
+
+def _fill_cached_values(xml, values):
+    """Put the cached `values` (coordinate -> result) into a sheet's formula cells."""
+    def fill(match):
+        value = values.get(match.group('ref'))
+        if value is None or isinstance(value, str):
+            return match.group(0)
+        return f"{match.group(1)}{match.group(3)}<v>{value!r}</v>{match.group(4)}"
+
+    return _FORMULA_CELL.sub(fill, xml)
+
+
+def write_cached_values(path, results):
+    """
+    Store precomputed formula results as cached values in a saved workbook.
+
+    openpyxl always writes formulas with an empty <v/>, so the formula
+    sheets' XML is patched after saving. Other parts, including a
+    multi-million-row Raw_Data sheet, are copied through unchanged as
+    streams rather than loaded.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with zipfile.ZipFile(path) as src, \
+            zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        patched = _cached_values_by_part(src, results)
+        for item in src.infolist():
+            if item.filename in patched:
+                xml = _fill_cached_values(src.read(item).decode('utf-8'), patched[item.filename])
+                dst.writestr(item, xml)
+            else:
+                with src.open(item) as fin, dst.open(item, 'w') as fout:
+                    shutil.copyfileobj(fin, fout)
+    os.replace(tmp_path, path)
+
+
+# =============================================================================
+# STREAMING (WRITE-ONLY) MODE
+# =============================================================================
+
+def copy_sheet_to_write_only(src_ws, dst_wb, index=None):
+    """
+    Copy a small in-memory sheet into a write-only workbook.
+
+    Values, cell styles, column widths, merged ranges, conditional
+    formatting and charts are carried over so the sheet renders exactly
+    as it does in the regular workbook.
+    """
+    ws = dst_wb.create_sheet(src_ws.title, index)
+
+    # Column widths must be set before the first row is written
+    for key, dim in src_ws.column_dimensions.items():
+        if dim.width:
+            ws.column_dimensions[key].width = dim.width
+
+    for merged in src_ws.merged_cells.ranges:
+        ws.merged_cells.add(merged.coord)
+
+    for cf in src_ws.conditional_formatting:
+        for rule in cf.rules:
+            ws.conditional_formatting.add(str(cf.sqref), rule)
+
+    for chart in src_ws._charts:
+        ws.add_chart(chart)
+
+    for src_row in src_ws.iter_rows():
+        row = []
+        for src_cell in src_row:
+            if src_cell.value is None and not src_cell.has_style:
+                row.append(None)
+                continue
+            cell = WriteOnlyCell(ws, value=src_cell.value)
+            if src_cell.has_style:
+                # Keep the named style; explicit attributes on top of it
+                # resolve to the same ids, so copying them is harmless
+                cell.style = src_cell.style
+                cell.font = copy(src_cell.font)
+                cell.fill = copy(src_cell.fill)
+                cell.border = copy(src_cell.border)
+                cell.alignment = copy(src_cell.alignment)
+                cell.number_format = src_cell.number_format
+            row.append(cell)
+        ws.append(row)
+    return ws
+
+
+def stream_raw_data_sheet(wb, data_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                          width_sample=DEFAULT_WIDTH_SAMPLE):
+    """
+    Append Raw_Data to a write-only workbook straight from a chunked CSV reader.
+
+    Only one chunk is held in memory at a time. Column widths are sized
+    from the header and (a sample of) the first chunk, since a write-only
+    sheet needs them before any row is written.
+
+    Segment aggregates are computed per chunk along the way and combined
+    at the end. Returns (RawDataLayout, SegmentAggregates); raises
+    ValueError when the file has a header but no rows.
+    """
+    ws = wb.create_sheet(RAW_SHEET)
+    layout = None
+    partials = []
+    n_rows = 0
+
+    for chunk in pd.read_csv(data_path, chunksize=chunk_size):
+        if layout is None:
+            layout = RawDataLayout.from_dataframe(chunk)
+        partials.append(SegmentAggregates.from_dataframe(chunk))
+
+        if n_rows == 0:
+            set_column_widths(ws, dataframe_column_widths(chunk, width_sample))
+
+        # NaN is not a valid cell value; write empty cells instead
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+
+        if n_rows == 0:
+            header = []
+            for column in chunk.columns:
+                cell = WriteOnlyCell(ws, value=column)
+                set_style(cell, 'Churn Data Header')
+                header.append(cell)
+            ws.append(header)
+
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append(row)
+        n_rows += len(chunk)
+
+    if not n_rows:
+        raise ValueError(f"{data_path} has no rows")
+    layout.n_rows = n_rows
+    return layout, SegmentAggregates.combine(partials)
+
+
+def create_streaming_workbook(data_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                              static_values=False, width_sample=DEFAULT_WIDTH_SAMPLE,
+                              retention=None):
+    """
+    Generate the workbook in write-only mode with bounded memory.
+
+    Raw_Data is streamed first, in batches of `chunk_size` rows, so the
+    row count is known before any formula range is written. The formula
+    sheets are tiny, so they are built with the regular builders in a
+    scratch workbook and copied in ahead of Raw_Data.
+
+    Returns (sheet names, formula count, data rows written).
+    """
+    wb = Workbook(write_only=True)
+    register_styles(wb)
+
+    print("   -> Raw Data (streamed)")
+    layout, agg = stream_raw_data_sheet(wb, data_path, chunk_size, width_sample)
+    agg.retention = retention
+
+    scratch = Workbook()
+    del scratch['Sheet']
+    build_formula_sheets(scratch, layout, agg)
+    if static_values:
+        apply_static_values(scratch, agg.results)
+    total_formulas = count_formulas(scratch)
+
+    for index, ws in enumerate(scratch.worksheets):
+        copy_sheet_to_write_only(ws, wb, index)
+    layout.add_defined_names(wb)
+    prepare_cached_calculation(wb)
+
+    print(f"\nSaving to: {output_path}")
+    wb.save(output_path)
+    if not static_values:
+        write_cached_values(output_path, agg.results)
+
+    sheetnames = scratch.sheetnames + [RAW_SHEET]
+    return sheetnames, total_formulas, layout.n_rows
+
+
+# =============================================================================
+# PARALLEL (PER-PART) MODE
+# =============================================================================
+_EMPTY_NUMBER = '" t="n"><v /></c>'
+
+
+def _cell_tail(value):
+    """Everything after the cell reference of a <c> element, as openpyxl writes it."""
+    if isinstance(value, (bool, np.bool_)):
+        return f'" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, np.number)):
+        if not np.isfinite(value):
+            return _EMPTY_NUMBER
+        return f'" t="n"><v>{"%.16g" % value}</v></c>'
+    text = str(value)
+    if not text:
+        return '" t="inlineStr" />'
+    escaped = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    space = ' xml:space="preserve"' if text.strip() != text else ''
+    return f'" t="inlineStr"><is><t{space}>{escaped}</t></is></c>'
+
+
+def render_raw_rows(df, first_row):
+    """
+    Raw_Data <row> elements for `df`, numbered from `first_row`.
+
+    The output is byte-for-byte what openpyxl writes for the same values
+    (inline strings, %.16g numbers, empty <v /> for missing values), but
+    each distinct value of a column is formatted once and the rows are
+    put together with vectorized string concatenation.
+    """
+    n = len(df)
+    refs = np.arange(first_row, first_row + n).astype(str).astype(object)
+    parts = np.empty((n, 2 * len(df.columns) + 2), dtype=object)
+    parts[:, 0] = '<row r="' + refs + '">'
+    for col_idx, column in enumerate(df.columns):
+        codes, uniques = pd.factorize(df[column])
+        # Missing values get code -1, i.e. the last tail
+        tails = np.array([_cell_tail(value) for value in uniques] + [_EMPTY_NUMBER], dtype=object)
+        parts[:, 2 * col_idx + 1] = f'<c r="{get_column_letter(col_idx + 1)}' + refs
+        parts[:, 2 * col_idx + 2] = tails[codes]
+    parts[:, -1] = '</row>'
+    return ''.join(parts.ravel())
+
+
+def _render_shard(df, first_row, path):
+    """Worker: write the <row> XML of one Raw_Data shard to `path`."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_raw_rows(df, first_row))
+    return path
+
+
+def assemble_workbook(skeleton_path, shard_paths, output_path, dimension, results=None):
+    """
+    Combine a saved skeleton workbook and rendered Raw_Data shards into one .xlsx.
+
+    The skeleton holds every part of the final package (styles, defined
+    names, formula sheets, charts) and a Raw_Data sheet with only its
+    header row. The shards are streamed into that sheet's <sheetData>
+    in order, its <dimension> is set to `dimension`, and `results` are
+    filled in as cached formula values.
+    """
+    with zipfile.ZipFile(skeleton_path) as src, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        raw_part = _sheet_parts(src)[RAW_SHEET]
+        patched = _cached_values_by_part(src, results or {})
+        large = sum(os.path.getsize(path) for path in shard_paths) > zipfile.ZIP64_LIMIT // 2
+        for item in src.infolist():
+            if item.filename == raw_part:
+                head, tail = src.read(item).decode('utf-8').split('</sheetData>', 1)
+                head = re.sub(r'<dimension ref="[^"]*"', f'<dimension ref="{dimension}"', head, count=1)
+                with dst.open(item, 'w', force_zip64=large) as fout:
+                    fout.write(head.encode('utf-8'))
+                    for path in shard_paths:
+                        with open(path, 'rb') as fin:
+                            shutil.copyfileobj(fin, fout)
+                    fout.write(('</sheetData>' + tail).encode('utf-8'))
+            elif item.filename in patched:
+                xml = _fill_cached_values(src.read(item).decode('utf-8'), patched[item.filename])
+                dst.writestr(item, xml)
+            else:
+                with src.open(item) as fin, dst.open(item, 'w') as fout:
+                    shutil.copyfileobj(fin, fout)
+
+
+def create_assembled_workbook(df, output_path, pool=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                              static_values=False, width_sample=DEFAULT_WIDTH_SAMPLE,
+                              verbose=True, retention=None):
+    """
+    Generate the workbook from a rendered Raw_Data and a skeleton.
+
+    Raw_Data is cut into shards of `chunk_size` rows whose XML is
+    rendered by the worker processes of `pool` (or in this process when
+    no pool is given). Meanwhile the formula sheets and a header-only
+    Raw_Data are built and saved as a skeleton workbook here;
+    assemble_workbook then splices the shards in. The result opens
+    exactly like the serial output.
+
+    Returns (sheet names, formula count, data rows written).
+    """
+    output_path = Path(output_path)
+    layout = RawDataLayout.from_dataframe(df)
+    agg = SegmentAggregates.from_dataframe(df)
+    agg.retention = retention
+
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as tmp_dir:
+        shards = [(df.iloc[start:start + chunk_size], layout.first_row + start,
+                   Path(tmp_dir) / f"rows_{start:012d}.xml")
+                  for start in range(0, len(df), chunk_size)]
+        if verbose:
+            where = "in parallel" if pool else "in process"
+            print(f"   -> Raw Data ({len(shards)} shards {where})")
+        futures = [pool.submit(_render_shard, *shard) for shard in shards] if pool else []
+
+        wb = Workbook()
+        del wb['Sheet']
+        build_formula_sheets(wb, layout, agg, verbose)
+        create_raw_data_sheet(wb, df, width_sample, with_rows=False)
+        layout.add_defined_names(wb)
+        if static_values:
+            apply_static_values(wb, agg.results)
+        prepare_cached_calculation(wb)
+        skeleton_path = Path(tmp_dir) / "skeleton.xlsx"
+        wb.save(skeleton_path)
+
+        if pool:
+            shard_paths = [future.result() for future in futures]
+        else:
+            shard_paths = [_render_shard(*shard) for shard in shards]
+        if verbose:
+            print(f"\nSaving to: {output_path}")
+        last_column = get_column_letter(max(len(df.columns), 1))
+        dimension = f"A1:{last_column}{len(df) + 1}"
+        assemble_workbook(skeleton_path, shard_paths, output_path, dimension,
+                          None if static_values else agg.results)
+
+    return wb.sheetnames, count_formulas(wb), len(df)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate the dynamic churn analysis Excel workbook."
+    )
+    parser.add_argument("--input", type=Path, default=None,
+                        help="Cleaned customer file (default: the churn.data columnar cache, "
+                             "or the cleaned CSV in --streaming mode)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH,
+                        help="Workbook to write (default: %(default)s)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--streaming", action="store_true",
+                      help="Write-only mode: stream Raw_Data from the CSV in "
+                           "chunks so memory stays flat for any row count")
+    mode.add_argument("--parallel", action="store_true",
+                      help="Render Raw_Data in a process pool while the formula sheets "
+                           "are built, then assemble the parts into one file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per CSV batch in --streaming mode, or per Raw_Data "
+                             "shard in --parallel mode (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes in --parallel mode (default: one per CPU)")
+    parser.add_argument("--static-values", action="store_true",
+                        help="Write the precomputed results as plain values instead of "
+                             "formulas (no recalculation at all when the file is opened)")
+    parser.add_argument("--width-sample", type=int, default=DEFAULT_WIDTH_SAMPLE,
+                        help="Size Raw_Data columns from a random sample of this many rows "
+                             "(0 = every row; default: %(default)s)")
+    parser.add_argument("--scored", type=Path, default=None,
+                        help="Scored customers (churn.score output) for the retention "
+                             f"simulation on Revenue_Analysis (default: {SCORED_CSV}; "
+                             "required with --input, else the simulation is skipped)")
+    parser.add_argument("--draws", type=int, default=DEFAULT_DRAWS,
+                        help="Monte Carlo draws of the retention simulation, 0 = skip it "
+                             "(default: %(default)s)")
+    parser.add_argument("--simulation-workers", type=int, default=1,
+                        help="Processes for the retention simulation (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def run_retention_simulation(args):
+    """The retention simulation for Revenue_Analysis, or None without scored customers."""
+    if not args.draws:
+        return None
+    scored = args.scored
+    if scored is None:
+        if args.input is not None:
+            # The default scores describe the default customers, not --input's
+            print(f"\n--input given without --scored; skipping the retention simulation "
+                  f"(pass --scored with the scores of {args.input})")
+            return None
+        scored = SCORED_CSV
+    if not scored.exists():
+        print(f"\nNo scored customers at {scored}; skipping the retention simulation "
+              f"(run python -m churn.score first)")
+        return None
+    print(f"\nSimulating retention policies ({args.draws:,} draws)...")
+    return simulate_retention(load_scored(scored), draws=args.draws,
+                              workers=args.simulation_workers)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 70)
+    print("CUSTOMER CHURN - ENHANCED EXCEL WORKBOOK GENERATOR")
+    print("=" * 70)
+    
+    # Create output directory
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    retention = run_retention_simulation(args)
+    contents = "static values" if args.static_values else "DYNAMIC formulas"
+
+    if args.streaming:
+        args.input = args.input or CLEANED_CSV
+        print(f"\nStreaming data from: {args.input} ({args.chunk_size:,} rows per batch)")
+        print(f"\nCreating Excel workbook with {contents} (write-only mode)...")
+        sheetnames, total_formulas, n_rows = create_streaming_workbook(
+            args.input, args.output, args.chunk_size, args.static_values, args.width_sample,
+            retention
+        )
+        print(f"   Streamed {n_rows:,} records")
+    elif args.parallel:
+        print("\nLoading data...")
+        df = load_customers() if args.input is None else read_cleaned(args.input)
+        print(f"   Loaded {len(df):,} records")
+
+        print(f"\nCreating Excel workbook with {contents} (parallel mode)...")
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            sheetnames, total_formulas, n_rows = create_assembled_workbook(
+                df, args.output, pool, args.chunk_size, args.static_values, args.width_sample,
+                retention=retention
+            )
+    else:
+        # Load data
+        print("\nLoading data...")
+        df = load_customers() if args.input is None else read_cleaned(args.input)
+        print(f"   Loaded {len(df):,} records")
+
+        # Create workbook
+        print(f"\nCreating Excel workbook with {contents}...")
+        wb = Workbook()
+
+        if 'Sheet' in wb.sheetnames:
+            del wb['Sheet']
+
+        layout = RawDataLayout.from_dataframe(df)
+        agg = SegmentAggregates.from_dataframe(df)
+        agg.retention = retention
+        build_formula_sheets(wb, layout, agg)
+
+        print("   -> Raw Data")
+        create_raw_data_sheet(wb, df, args.width_sample)
+        layout.add_defined_names(wb)
+
+        if args.static_values:
+            apply_static_values(wb, agg.results)
+        prepare_cached_calculation(wb)
+
+        # Save
+        print(f"\nSaving to: {args.output}")
+        wb.save(args.output)
+        if not args.static_values:
+            write_cached_values(args.output, agg.results)
+
+        sheetnames = wb.sheetnames
+        total_formulas = count_formulas(wb)
     
     print("\n" + "=" * 70)
     print("SUCCESS!")
     print("=" * 70)
-    print(f"File: {OUTPUT_PATH}")
-    print(f"Sheets: {', '.join(wb.sheetnames)}")
+    print(f"File: {args.output}")
+    print(f"Sheets: {', '.join(sheetnames)}")
+    if args.static_values:
+        print("Mode: static values (precomputed results, no formulas)")
+        return
     print(f"Total Dynamic Formulas: {total_formulas}")
+    print("Mode: formulas with cached results")
     print("\nFormula Types Used:")
     print("   - COUNTIF / COUNTIFS (segmentation)")
     print("   - SUMIF / SUMIFS (revenue calculations)")
@@ -0,0 +1,824 @@
+"""
+Evaluate the formulas of the Customer Churn workbook without Excel.
+
+A small evaluator for the formula subset create_enhanced_excel.py
+writes: cell references and ranges, the Raw_* defined names, arithmetic,
+comparisons, & concatenation, IF, SUM, AVERAGE, COUNTA, COUNTIF(S),
+SUMIF(S) and AVERAGEIF(S).
+
+Criteria are evaluated as NumPy masks over whole Raw_Data columns and
+memoized, so COUNTIFS(Raw_Contract,"Month-to-month",Raw_Churn,1) costs
+two cached vector comparisons rather than a cell-by-cell walk. Only the
+Raw_Data columns that formulas actually reference are read, either
+from a cleaned data file (mapped through the Raw_Data header row) or
+from the sheet XML (one regex pass, ~40us per row, so minutes for a
+multi-million-row workbook).
+
+The data file is the one given with --data. For the default workbook it
+defaults to the churn.data columnar cache the generator built it from,
+so the standard check finishes in seconds at any size; if the cache's
+row count no longer matches Raw_Data, the sheet XML is read instead.
+Other workbooks are read from their sheet XML unless --data is given,
+and --no-data forces the sheet XML.
+
+--check compares every formula with the cached result stored in the
+file (the generator computes those with pandas) and reports mismatches.
+
+Usage:
+    python scripts/evaluate_excel_formulas.py --check
+    python scripts/evaluate_excel_formulas.py --check --no-data
+    python scripts/evaluate_excel_formulas.py excel/churn_analysis_dynamic.xlsx --check --data data/processed/customers_cleaned.feather
+"""
+import argparse
+import fnmatch
+import html
+import math
+import re
+import sys
+import time
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter, range_boundaries
+
+# Make the shared churn package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from churn.data import CLEANED_FEATHER, read_cleaned
+from verify_excel_formulas import WORKBOOK_PATH, sheet_parts
+
+DEFAULT_TOLERANCE = 1e-9
+
+_NS = {'m': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+class FormulaError(ValueError):
+    """Formula outside the supported subset."""
+
+
+class DataMismatch(ValueError):
+    """Data file whose row count does not match the workbook's data ranges."""
+
+
+class ExcelError:
+    """An Excel error value such as #DIV/0!; propagates through arithmetic."""
+
+    def __init__(self, code):
+        self.code = code
+
+    def __eq__(self, other):
+        return isinstance(other, ExcelError) and other.code == self.code
+
+    def __repr__(self):
+        return self.code
+
+
+DIV0 = ExcelError('#DIV/0!')
+VALUE = ExcelError('#VALUE!')
+
+
+# =============================================================================
+# COLUMNS & CRITERIA
+# =============================================================================
+
+class Column:
+    """
+    One range of cells as arrays: numeric values (NaN for text/blank),
+    text values encoded as lower-case category codes (-1 for numbers or
+    blank) and a blank mask. Criteria masks are memoized per column.
+    """
+
+    def __init__(self, values):
+        series = pd.Series(values, dtype=object)
+        blank = series.isna() | (series == '')
+        is_text = series.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool) & ~blank.to_numpy()
+        numeric = pd.to_numeric(series.where(~is_text & ~blank), errors='coerce')
+        codes, categories = pd.factorize(series.where(is_text).str.lower())
+        self._init(numeric.to_numpy(dtype='float64'), codes, categories, blank.to_numpy())
+
+    @classmethod
+    def from_series(cls, series, length=None):
+        """Column from a DataFrame column, padded with blanks to `length`."""
+        length = len(series) if length is None else length
+        pad = length - len(series)
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            numeric = np.append(series.to_numpy(dtype='float64', na_value=np.nan), np.full(pad, np.nan))
+            codes, categories = np.full(length, -1), []
+        else:
+            numeric = np.full(length, np.nan)
+            text = series.astype(object).where(series.notna())
+            codes, categories = pd.factorize(text.map(lambda v: str(v).lower(), na_action='ignore'))
+            codes = np.append(codes, np.full(pad, -1))
+        return cls.from_arrays(numeric, codes, categories, np.isnan(numeric) & (codes < 0))
+
+    @classmethod
+    def from_arrays(cls, numeric, codes, categories, blank):
+        column = cls.__new__(cls)
+        column._init(numeric, codes, categories, blank)
+        return column
+
+    def _init(self, numeric, codes, categories, blank):
+        self.numeric = numeric
+        self.codes = codes
+        self.categories = pd.Index(categories)
+        self.blank = blank
+        self._masks = {}
+
+    def __len__(self):
+        return len(self.numeric)
+
+    def mask(self, criterion):
+        """Boolean mask of the cells matching an Excel criterion."""
+        key = (type(criterion).__name__, criterion)
+        if key not in self._masks:
+            self._masks[key] = self._match(*parse_criterion(criterion))
+        return self._masks[key]
+
+    def _match(self, op, operand):
+        if operand is None:                       # "=" / "<>" against blank
+            return self.blank if op == '=' else ~self.blank
+        if isinstance(operand, float):
+            with np.errstate(invalid='ignore'):
+                hit = {'=': np.equal, '<>': np.equal, '<': np.less, '>': np.greater,
+                       '<=': np.less_equal, '>=': np.greater_equal}[op](self.numeric, operand)
+            return ~hit if op == '<>' else hit
+        if op not in ('=', '<>'):
+            raise FormulaError(f"Text criterion with '{op}' is not supported")
+        if any(ch in operand for ch in '*?'):
+            pattern = re.compile(fnmatch.translate(operand.lower()))
+            matched = [i for i, c in enumerate(self.categories) if pattern.match(c)]
+        else:
+            matched = [i for i, c in enumerate(self.categories) if c == operand.lower()]
+        hit = np.isin(self.codes, matched)
+        return ~hit if op == '<>' else hit
+
+
+_CRITERION = re.compile(r'^(<=|>=|<>|<|>|=)?(.*)$', re.S)
+
+
+def parse_criterion(criterion):
+    """(operator, operand) of an Excel criterion; operand is a float, text or None (blank)."""
+    if isinstance(criterion, bool):
+        return '=', float(criterion)
+    if isinstance(criterion, (int, float)):
+        return '=', float(criterion)
+    op, operand = _CRITERION.match(str(criterion)).groups()
+    op = op or '='
+    if operand == '':
+        return op, None
+    try:
+        return op, float(operand)
+    except ValueError:
+        return op, operand
+
+
+# =============================================================================
+# PARSER
+# =============================================================================
+
+_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?\$?[A-Z]{1,3}\$?[0-9]+(?::\$?[A-Z]{1,3}\$?[0-9]+)?)(?![\w(])
+  | (?P<number>[0-9]+(?:\.[0-9]*)?(?:[eE][+-]?[0-9]+)?)
+  | (?P<func>[A-Za-z][A-Za-z0-9.]*)(?=\()
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<op><=|>=|<>|[-+*/^&=<>(),])
+""", re.X)
+
+
+def tokenize(formula):
+    tokens, pos = [], 0
+    while pos < len(formula):
+        match = _TOKEN.match(formula, pos)
+        if not match:
+            raise FormulaError(f"Cannot parse {formula!r} at position {pos}")
+        pos = match.end()
+        if match.lastgroup != 'ws':
+            tokens.append((match.lastgroup, match.group()))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing a small tuple AST."""
+
+    _LEVELS = [('=', '<>', '<', '>', '<=', '>='), ('&',), ('+', '-'), ('*', '/'), ('^',)]
+
+    def __init__(self, formula):
+        self.tokens = tokenize(formula)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if value is not None and token[1] != value:
+            raise FormulaError(f"Expected {value!r}, found {token[1]!r}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.binary(0)
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"Unexpected token {self.peek()[1]!r}")
+        return node
+
+    def binary(self, level):
+        if level == len(self._LEVELS):
+            return self.unary()
+        node = self.binary(level + 1)
+        while self.peek()[0] == 'op' and self.peek()[1] in self._LEVELS[level]:
+            op = self.take()[1]
+            node = ('binop', op, node, self.binary(level + 1))
+        return node
+
+    def unary(self):
+        if self.peek() in (('op', '-'), ('op', '+')):
+            op = self.take()[1]
+            return ('neg', self.unary()) if op == '-' else self.unary()
+        return self.primary()
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == 'number':
+            return ('value', float(text))
+        if kind == 'string':
+            return ('value', text[1:-1].replace('""', '"'))
+        if kind == 'ref':
+            return ('ref', text)
+        if kind == 'name':
+            if text.upper() in ('TRUE', 'FALSE'):
+                return ('value', text.upper() == 'TRUE')
+            return ('name', text)
+        if kind == 'func':
+            self.take('(')
+            args = []
+            if self.peek()[1] != ')':
+                args.append(self.binary(0))
+                while self.peek()[1] == ',':
+                    self.take()
+                    args.append(self.binary(0))
+            self.take(')')
+            return ('call', text.upper(), args)
+        if text == '(':
+            node = self.binary(0)
+            self.take(')')
+            return node
+        raise FormulaError(f"Unexpected token {text!r}")
+
+
+def parse_formula(formula):
+    """AST of a formula string (with or without the leading '=')."""
+    return _Parser(formula[1:] if formula.startswith('=') else formula).parse()
+
+
+# =============================================================================
+# WORKBOOK
+# =============================================================================
+
+def _split_ref(ref, default_sheet):
+    if '!' in ref:
+        sheet, ref = ref.rsplit('!', 1)
+        sheet = sheet[1:-1].replace("''", "'") if sheet.startswith("'") else sheet
+    else:
+        sheet = default_sheet
+    return sheet, ref.replace('$', '')
+
+
+def _defined_names(archive):
+    """Workbook-level defined names as {name: (sheet, range)}."""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    names = {}
+    container = workbook.find('m:definedNames', _NS)
+    for defined in (container if container is not None else []):
+        if defined.get('localSheetId') is None and '!' in (defined.text or ''):
+            names[defined.get('name')] = _split_ref(defined.text, None)
+    return names
+
+
+def _shared_strings(archive):
+    try:
+        root = ElementTree.fromstring(archive.read('xl/sharedStrings.xml'))
+    except KeyError:
+        return []
+    tag = f"{{{_NS['m']}}}t"
+    return [''.join(t.text or '' for t in si.iter(tag)) for si in root]
+
+
+def _column_pattern(letters):
+    alternatives = b'|'.join(sorted({l.encode() for l in letters}, key=len, reverse=True))
+    return re.compile(
+        rb'<c r="(' + alternatives + rb')([0-9]+)"([^>]*?)(?:/>|>(?:<f[^>]*>[^<]*</f>|<f[^>]*/>)?'
+        rb'(?:<v>([^<]*)</v>|<is>(?:<r>)?<t[^>]*>([^<]*)</t>)?)'
+    )
+
+
+def _text_codes(raw, shared_strings=()):
+    """
+    Lower-case category codes for an object array of raw XML text bytes
+    (None where the cell has no text). Decoding, unescaping and case
+    folding run once per distinct value, not once per cell.
+    """
+    codes, uniques = pd.factorize(raw)
+    labels = [html.unescape(u.decode('utf-8')).lower() for u in uniques]
+    folded, categories = pd.factorize(pd.Index(labels, dtype=object))
+    remap = np.append(folded, -1)               # code -1 (no text) stays -1
+    return remap[codes], categories
+
+
+def read_xml_columns(archive, part, letters, first_row, last_row, shared_strings=()):
+    """
+    Columns `letters` (rows first_row..last_row) of a sheet, parsed from
+    its XML with one regex pass and converted with NumPy.
+
+    Returns {letter: Column}.
+    """
+    xml = archive.read(part)
+    n = last_row - first_row + 1
+    matches = _column_pattern(letters).findall(xml)
+    del xml
+    fields = list(zip(*matches)) or [()] * 5
+    del matches
+    cell_letters = np.array(fields[0], dtype='S3')
+    all_rows = np.array(fields[1], dtype='S10').astype('int64') - first_row
+    all_attrs = np.array(fields[2], dtype='S')
+    all_values = np.array(fields[3], dtype=object)
+    all_inline = np.array(fields[4], dtype=object)
+    shared = np.array([s.encode('utf-8') for s in shared_strings] + [b''], dtype=object)
+
+    columns = {}
+    for letter in letters:
+        keep = (cell_letters == letter.encode()) & (all_rows >= 0) & (all_rows < n)
+        rows, attrs = all_rows[keep], all_attrs[keep]
+        values, inline = all_values[keep], all_inline[keep]
+
+        is_shared = np.char.find(attrs, b't="s"') >= 0
+        is_string = (np.char.find(attrs, b't="inlineStr"') >= 0) | (inline != b'') | \
+            (np.char.find(attrs, b't="str"') >= 0) | (np.char.find(attrs, b't="e"') >= 0)
+        is_number = ~is_shared & ~is_string & (values != b'')
+
+        numeric = np.full(n, np.nan)
+        numeric[rows[is_number]] = np.asarray(values[is_number], dtype='S').astype('float64')
+
+        raw_text = np.full(n, None, dtype=object)
+        raw_text[rows[is_string]] = np.where(inline[is_string] != b'', inline[is_string],
+                                             values[is_string])
+        if is_shared.any():
+            index = np.asarray(values[is_shared], dtype='S').astype('int64')
+            raw_text[rows[is_shared]] = shared[index]
+        raw_text[raw_text == b''] = None
+
+        codes, categories = _text_codes(raw_text)
+        blank = np.isnan(numeric) & (codes < 0)
+        columns[letter] = Column.from_arrays(numeric, codes, categories, blank)
+    return columns
+
+
+def _cell_value(cell, shared_strings):
+    """(value, formula) of one <c> element of a small sheet."""
+    m = f"{{{_NS['m']}}}"
+    kind = cell.get('t', 'n')
+    formula = cell.find(f'{m}f')
+    v = cell.find(f'{m}v')
+    text = v.text if v is not None else None
+    if kind == 'inlineStr':
+        value = ''.join(t.text or '' for t in cell.iter(f'{m}t'))
+    elif text is None:
+        value = None
+    elif kind == 's':
+        value = shared_strings[int(text)]
+    elif kind == 'b':
+        value = text == '1'
+    elif kind in ('str', 'e'):
+        value = text
+    else:
+        value = float(text)
+        value = int(value) if value.is_integer() and 'E' not in text.upper() and '.' not in text else value
+    if formula is not None and formula.text:
+        return value, '=' + formula.text
+    return value, None
+
+
+class WorkbookModel:
+    """
+    The formula sheets of a saved workbook plus lazy access to the
+    data ranges behind its defined names.
+
+    Formula sheets are every sheet not targeted by a defined name; they
+    are small and parsed directly from their XML. Data sheets (Raw_Data)
+    are never loaded cell by cell: only the columns behind names that a
+    formula references are extracted.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = Path(path)
+        self.data = data
+        self.parts = dict(sheet_parts(self.path))
+        self.cells, self.cached = {}, {}
+        self._columns = {}
+
+        with zipfile.ZipFile(self.path) as archive:
+            self.names = _defined_names(archive)
+            self._shared_strings = _shared_strings(archive)
+            data_sheets = {sheet for sheet, _ in self.names.values()}
+            self.formula_sheets = [title for title in self.parts if title not in data_sheets]
+
+            m = f"{{{_NS['m']}}}"
+            for title in self.formula_sheets:
+                root = ElementTree.fromstring(archive.read(self.parts[title]))
+                for cell in root.iter(f'{m}c'):
+                    value, formula = _cell_value(cell, self._shared_strings)
+                    key = (title, cell.get('r'))
+                    if formula is not None:
+                        self.cells[key] = formula
+                        self.cached[key] = value
+                    elif value is not None:
+                        self.cells[key] = value
+
+        # Defined names used by at least one formula; only their columns are read
+        self.referenced = {text for formula in self.formula_texts()
+                           for kind, text in tokenize(formula[1:])
+                           if kind == 'name' and text in self.names}
+        if data is not None:
+            self._check_data_rows()
+
+    def _check_data_rows(self):
+        """Raise DataMismatch unless `data` has one row per data-range row."""
+        for name in sorted(self.referenced):
+            sheet, ref = self.names[name]
+            _, min_row, _, max_row = range_boundaries(ref)
+            rows = max_row - min_row + 1
+            # An empty extract still gets a single blank row in its ranges
+            if len(self.data) != rows and not (len(self.data) == 0 and rows == 1):
+                raise DataMismatch(f"data file has {len(self.data):,} rows but {name} "
+                                   f"spans {rows:,} rows of {sheet}")
+
+    def formula_texts(self):
+        return [value for value in self.cells.values()
+                if isinstance(value, str) and value.startswith('=')]
+
+    def formula_cells(self):
+        return [key for key, value in self.cells.items()
+                if isinstance(value, str) and value.startswith('=')]
+
+    def column(self, sheet, ref):
+        """Column object for a single-column range on a data sheet."""
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        if min_col != max_col:
+            raise FormulaError(f"Multi-column data range {sheet}!{ref} is not supported")
+        key = (sheet, ref)
+        if key not in self._columns:
+            self._load_columns(sheet, ref, min_row, max_row)
+        return self._columns[key]
+
+    def _load_columns(self, sheet, ref, min_row, max_row):
+        """Read every referenced column of `sheet` spanning these rows in one pass."""
+        refs = {ref} | {r for name, (s, r) in self.names.items()
+                        if name in self.referenced and s == sheet
+                        and range_boundaries(r)[1::2] == (min_row, max_row)}
+        letters = {get_column_letter(range_boundaries(r)[0]): r for r in refs}
+
+        if self.data is not None:
+            header = self._header(sheet)
+            for letter, r in letters.items():
+                name = header.get(letter)
+                if name not in self.data.columns:
+                    raise FormulaError(f"{sheet}!{letter}1 header {name!r} is not in the data file")
+                self._columns[(sheet, r)] = Column.from_series(
+                    self.data[name].iloc[min_row - 2:max_row - 1], max_row - min_row + 1)
+            return
+
+        with zipfile.ZipFile(self.path) as archive:
+            columns = read_xml_columns(archive, self.parts[sheet], letters, min_row, max_row,
+                                       self._shared_strings)
+        for letter, r in letters.items():
+            self._columns[(sheet, r)] = columns[letter]
+
+    def _header(self, sheet):
+        """First row of a data sheet as {column letter: header}."""
+        with zipfile.ZipFile(self.path) as archive, archive.open(self.parts[sheet]) as stream:
+            head = stream.read(1 << 16)
+        row = re.search(rb'<row r="1"[^>]*>(.*?)</row>', head, re.S)
+        header = {}
+        for letter, attrs, body in re.findall(rb'<c r="([A-Z]+)1"([^>]*)>(.*?)</c>',
+                                              row.group(1) if row else b''):
+            text = re.search(rb'<t[^>]*>([^<]*)</t>|<v>([^<]*)</v>', body)
+            if text:
+                value = html.unescape((text.group(1) or text.group(2)).decode('utf-8'))
+                if b't="s"' in attrs:
+                    value = self._shared_strings[int(value)]
+                header[letter.decode()] = value
+        return header
+
+
+# =============================================================================
+# EVALUATION
+# =============================================================================
+
+def _to_number(value):
+    if isinstance(value, ExcelError):
+        return value
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return VALUE
+
+
+def _to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _compare(op, a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        a, b = _to_text(a).lower(), _to_text(b).lower()
+    else:
+        a, b = _to_number(a), _to_number(b)
+    return {'=': a == b, '<>': a != b, '<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}[op]
+
+
+class Evaluator:
+    """Evaluates formula cells of a WorkbookModel, memoizing every cell."""
+
+    def __init__(self, model):
+        self.model = model
+        self._values = {}
+        self._asts = {}
+
+    def value(self, sheet, coordinate):
+        key = (sheet, coordinate)
+        if key not in self._values:
+            raw = self.model.cells.get(key)
+            if isinstance(raw, str) and raw.startswith('='):
+                if key not in self._asts:
+                    self._asts[key] = parse_formula(raw)
+                self._values[key] = self.eval(self._asts[key], sheet)
+            else:
+                self._values[key] = raw
+        return self._values[key]
+
+    def evaluate(self, formula, sheet):
+        """Evaluate a formula string as if it were on `sheet`."""
+        return self.eval(parse_formula(formula), sheet)
+
+    # --- references -------------------------------------------------------
+
+    def _range(self, node, sheet):
+        """Column object for a range or defined-name argument."""
+        kind = node[0]
+        if kind == 'name':
+            if node[1] not in self.model.names:
+                raise FormulaError(f"Unknown name {node[1]}")
+            return self.model.column(*self.model.names[node[1]])
+        if kind == 'ref':
+            target, ref = _split_ref(node[1], sheet)
+            if target in self.model.formula_sheets:
+                return Column(self._local_values(target, ref))
+            return self.model.column(target, ref)
+        return Column([self.eval(node, sheet)])
+
+    def _local_values(self, sheet, ref):
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        return [self.value(sheet, f"{get_column_letter(c)}{r}")
+                for r in range(min_row, max_row + 1) for c in range(min_col, max_col + 1)]
+
+    # --- expressions ------------------------------------------------------
+
+    def eval(self, node, sheet):
+        kind = node[0]
+        if kind == 'value':
+            return node[1]
+        if kind == 'ref':
+            target, ref = _split_ref(node[1], sheet)
+            if ':' in ref:
+                raise FormulaError(f"Range {node[1]} used as a single value")
+            return self.value(target, ref)
+        if kind == 'name':
+            raise FormulaError(f"Name {node[1]} used as a single value")
+        if kind == 'neg':
+            value = _to_number(self.eval(node[1], sheet))
+            return value if isinstance(value, ExcelError) else -value
+        if kind == 'binop':
+            return self._binop(node[1], self.eval(node[2], sheet), self.eval(node[3], sheet))
+        if kind == 'call':
+            return self._call(node[1], node[2], sheet)
+        raise FormulaError(f"Unknown node {kind}")
+
+    def _binop(self, op, a, b):
+        for value in (a, b):
+            if isinstance(value, ExcelError):
+                return value
+        if op == '&':
+            return _to_text(a) + _to_text(b)
+        if op in ('=', '<>', '<', '>', '<=', '>='):
+            return _compare(op, a, b)
+        a, b = _to_number(a), _to_number(b)
+        for value in (a, b):
+            if isinstance(value, ExcelError):
+                return value
+        if op == '+':
+            return a + b
+        if op == '-':
+            return a - b
+        if op == '*':
+            return a * b
+        if op == '/':
+            return DIV0 if b == 0 else a / b
+        if op == '^':
+            return a ** b
+        raise FormulaError(f"Unknown operator {op}")
+
+    def _criteria_mask(self, args, sheet):
+        if len(args) % 2:
+            raise FormulaError("Criteria arguments must come in range/criterion pairs")
+        mask = None
+        for range_node, criterion_node in zip(args[::2], args[1::2]):
+            column = self._range(range_node, sheet)
+            criterion = self.eval(criterion_node, sheet)
+            if isinstance(criterion, ExcelError):
+                return criterion
+            hit = column.mask(criterion)
+            if mask is not None and len(hit) != len(mask):
+                return VALUE
+            mask = hit if mask is None else mask & hit
+        return mask
+
+    def _call(self, name, args, sheet):
+        if name == 'IF':
+            condition = self.eval(args[0], sheet)
+            if isinstance(condition, ExcelError):
+                return condition
+            if _to_number(condition):
+                return self.eval(args[1], sheet) if len(args) > 1 else True
+            return self.eval(args[2], sheet) if len(args) > 2 else False
+
+        if name in ('SUM', 'AVERAGE', 'COUNTA'):
+            total, count = 0.0, 0
+            for arg in args:
+                if arg[0] in ('ref', 'name') and (arg[0] == 'name' or ':' in arg[1]):
+                    column = self._range(arg, sheet)
+                    if name == 'COUNTA':
+                        count += int((~column.blank).sum())
+                        continue
+                    numbers = column.numeric[~np.isnan(column.numeric)]
+                    total += float(numbers.sum())
+                    count += len(numbers)
+                else:
+                    value = self.eval(arg, sheet)
+                    if isinstance(value, ExcelError):
+                        return value
+                    if name == 'COUNTA':
+                        count += value is not None
+                        continue
+                    number = _to_number(value)
+                    if isinstance(number, ExcelError):
+                        return number
+                    total += number
+                    count += 1
+            if name == 'SUM':
+                return total
+            if name == 'COUNTA':
+                return count
+            return DIV0 if count == 0 else total / count
+
+        if name in ('COUNTIF', 'COUNTIFS'):
+            mask = self._criteria_mask(args, sheet)
+            return mask if isinstance(mask, ExcelError) else int(mask.sum())
+
+        if name in ('SUMIF', 'AVERAGEIF'):
+            mask = self._criteria_mask(args[:2], sheet)
+            target = self._range(args[2] if len(args) > 2 else args[0], sheet)
+            return self._masked_total(name == 'AVERAGEIF', mask, target)
+
+        if name in ('SUMIFS', 'AVERAGEIFS'):
+            mask = self._criteria_mask(args[1:], sheet)
+            return self._masked_total(name == 'AVERAGEIFS', mask, self._range(args[0], sheet))
+
+        raise FormulaError(f"Function {name} is not supported")
+
+    @staticmethod
+    def _masked_total(average, mask, target):
+        if isinstance(mask, ExcelError):
+            return mask
+        if len(mask) != len(target):
+            return VALUE
+        values = target.numeric[mask]
+        values = values[~np.isnan(values)]
+        if average:
+            return DIV0 if len(values) == 0 else float(values.mean())
+        return float(values.sum())
+
+
+# =============================================================================
+# CHECK
+# =============================================================================
+
+def _matches(actual, expected, tolerance):
+    if isinstance(actual, ExcelError):
+        return isinstance(expected, str) and expected == actual.code
+    if isinstance(actual, bool) or isinstance(expected, bool):
+        return bool(actual) == bool(expected)
+    if isinstance(actual, (int, float)) and isinstance(expected, (int, float)):
+        return math.isclose(actual, expected, rel_tol=tolerance, abs_tol=tolerance)
+    return actual == expected
+
+
+def check_workbook(path, data=None, tolerance=DEFAULT_TOLERANCE):
+    """
+    Evaluate every formula of the workbook and compare it with the
+    cached result stored in the file.
+
+    Returns (results, mismatches, missing): results maps (sheet, cell)
+    to the evaluated value; mismatches is a list of (sheet, cell,
+    formula, evaluated, cached); missing lists cells without a cached
+    value to compare against.
+    """
+    model = WorkbookModel(path, data)
+    evaluator = Evaluator(model)
+    results, mismatches, missing = {}, [], []
+    for sheet, coordinate in model.formula_cells():
+        value = evaluator.value(sheet, coordinate)
+        results[(sheet, coordinate)] = value
+        cached = model.cached.get((sheet, coordinate))
+        if cached is None:
+            missing.append((sheet, coordinate))
+        elif not _matches(value, cached, tolerance):
+            mismatches.append((sheet, coordinate, model.cells[(sheet, coordinate)], value, cached))
+    return results, mismatches, missing
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the churn workbook's formulas without Excel.")
+    parser.add_argument("workbook", type=Path, nargs='?', default=WORKBOOK_PATH,
+                        help="Workbook to evaluate (default: %(default)s)")
+    parser.add_argument("--check", action="store_true",
+                        help="Compare every formula with its cached result and exit 1 on mismatch")
+    parser.add_argument("--data", type=Path, default=None,
+                        help="Read Raw_Data columns from this cleaned data file instead of the "
+                             "sheet XML (default for the default workbook: the churn.data cache)")
+    parser.add_argument("--no-data", action="store_true",
+                        help="Always read Raw_Data columns from the sheet XML")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative/absolute tolerance for numbers (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print('=' * 70)
+    print('EXCEL FORMULA EVALUATION - Customer Churn Analysis')
+    print('=' * 70)
+    print(f'\nWorkbook: {args.workbook}')
+
+    data_path, default_data = args.data, False
+    if (data_path is None and not args.no_data and CLEANED_FEATHER.exists()
+            and args.workbook.resolve() == WORKBOOK_PATH.resolve()):
+        data_path, default_data = CLEANED_FEATHER, True
+
+    start = time.perf_counter()
+    try:
+        data = read_cleaned(data_path) if data_path and not args.no_data else None
+        print(f'Raw_Data columns from: {data_path if data is not None else "the sheet XML"}')
+        results, mismatches, missing = check_workbook(args.workbook, data, args.tolerance)
+    except DataMismatch as error:
+        if not default_data:
+            raise
+        print(f'   {error}; reading the sheet XML instead')
+        results, mismatches, missing = check_workbook(args.workbook, None, args.tolerance)
+    elapsed = time.perf_counter() - start
+
+    if not args.check:
+        for (sheet, coordinate), value in results.items():
+            print(f'   {sheet}!{coordinate} = {value!r}')
+
+    print('\n' + '=' * 70)
+    print(f'Evaluated {len(results)} formulas in {elapsed:.2f}s')
+    if args.check:
+        for sheet, coordinate, formula, value, cached in mismatches:
+            print(f'   [MISMATCH] {sheet}!{coordinate} {formula}: evaluated {value!r}, cached {cached!r}')
+        if missing:
+            print(f'   {len(missing)} formulas have no cached value to compare')
+        checked = len(results) - len(missing)
+        print(f'Checked {checked}: {checked - len(mismatches)} match, {len(mismatches)} mismatch')
+    print('=' * 70)
+    if args.check and mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
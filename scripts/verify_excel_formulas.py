@@ -1,43 +1,190 @@
 """
 Verify Excel formulas in the Customer Churn workbook.
+
+Counts formula cells per sheet without loading the workbook into memory.
+By default the sheet XML is streamed straight out of the .xlsx archive
+and <f> elements are counted on the raw bytes, so a sheet costs one
+decompression pass and no parsing. --mode read-only uses openpyxl's
+read-only reader instead. Sheets are checked in parallel.
+
+Data sheets (Raw_Data), found as the sheets targeted by the workbook's
+defined names like the evaluator does, hold no formulas and are skipped
+unless --all-sheets is given.
+
+Usage:
+    python scripts/verify_excel_formulas.py
+    python scripts/verify_excel_formulas.py excel/churn_analysis_dynamic.xlsx --mode read-only
+    python scripts/verify_excel_formulas.py --all-sheets
 """
-import openpyxl
-
-wb = openpyxl.load_workbook('excel/churn_analysis_summary.xlsx')
-
-print('=' * 70)
-print('EXCEL FORMULA VERIFICATION - Customer Churn Analysis')
-print('=' * 70)
-
-print(f'\nSheets: {wb.sheetnames}')
-
-# Count formulas per sheet
-print('\n[FORMULA COUNT PER SHEET]')
-for sheet_name in wb.sheetnames:
-    ws = wb[sheet_name]
-    formula_count = 0
-    sample_formulas = []
-    for row in ws.iter_rows():
-        for cell in row:
-            if cell.value and str(cell.value).startswith('='):
-                formula_count += 1
-                if len(sample_formulas) < 2:
-                    sample_formulas.append(f'{cell.coordinate}: {cell.value}')
-    
-    status = '[OK]' if formula_count > 0 else '[--]'
-    print(f'   {status} {sheet_name}: {formula_count} formulas')
-    for f in sample_formulas:
-        print(f'       Example: {f}')
-
-# Total
-total_formulas = 0
-for sheet_name in wb.sheetnames:
-    ws = wb[sheet_name]
-    for row in ws.iter_rows():
-        for cell in row:
-            if cell.value and str(cell.value).startswith('='):
-                total_formulas += 1
-
-print('\n' + '=' * 70)
-print(f'Total formulas in workbook: {total_formulas}')
-print('=' * 70)
+import argparse
+import html
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from xml.etree import ElementTree
+
+PROJECT_ROOT = Path(__file__).parent.parent
+WORKBOOK_PATH = PROJECT_ROOT / "excel" / "churn_analysis_dynamic.xlsx"
+
+SAMPLES_PER_SHEET = 2
+_READ_SIZE = 1 << 20
+
+# <f>...</f> or <f t="shared" ...>; the trailing character keeps other
+# tags starting with "f" (filterColumn, firstFooter, ...) out of the count
+_FORMULA_TAGS = (b'<f>', b'<f ')
+_SAMPLE = re.compile(rb'<c r="([A-Z]+[0-9]+)"[^>]*><f[^>]*>([^<]*)</f>')
+
+_NS = {
+    'm': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+
+
+def sheet_parts(path):
+    """Ordered (sheet title, XML part name) pairs of an .xlsx file."""
+    with zipfile.ZipFile(path) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.findall('rel:Relationship', _NS)}
+
+    parts = []
+    for sheet in workbook.find('m:sheets', _NS):
+        target = targets[sheet.get(f"{{{_NS['r']}}}id")]
+        parts.append((sheet.get('name'),
+                      target.lstrip('/') if target.startswith('/') else f"xl/{target}"))
+    return parts
+
+
+def data_sheets(path):
+    """Titles of the sheets targeted by workbook-level defined names."""
+    with zipfile.ZipFile(path) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    container = workbook.find('m:definedNames', _NS)
+    sheets = set()
+    for defined in (container if container is not None else []):
+        text = defined.text or ''
+        if defined.get('localSheetId') is None and '!' in text:
+            sheet = text.rsplit('!', 1)[0]
+            sheets.add(sheet[1:-1].replace("''", "'") if sheet.startswith("'") else sheet)
+    return sheets
+
+
+def scan_sheet_xml(path, title, part, samples=SAMPLES_PER_SHEET):
+    """
+    Count the formulas of one sheet from its XML part.
+
+    The part is decompressed in blocks and the tags are counted with
+    bytes.count; the first few formulas are regex-matched for the
+    report, in blocks that contain formulas only. Returns (title, count,
+    sample formulas, seconds).
+    """
+    start = time.perf_counter()
+    count, found, tail = 0, [], b''
+    with zipfile.ZipFile(path) as archive, archive.open(part) as stream:
+        while True:
+            block = stream.read(_READ_SIZE)
+            if not block:
+                break
+            # Keep a short overlap so tags split across blocks are counted once
+            data = tail + block
+            block_count = (sum(data.count(tag) for tag in _FORMULA_TAGS)
+                           - sum(tail.count(tag) for tag in _FORMULA_TAGS))
+            count += block_count
+            if block_count and len(found) < samples:
+                for ref, formula in _SAMPLE.findall(data)[:samples - len(found)]:
+                    found.append(f"{ref.decode()}: ={html.unescape(formula.decode('utf-8'))}")
+            tail = data[-3:]
+    return title, count, found, time.perf_counter() - start
+
+
+def scan_sheet_read_only(path, title, samples=SAMPLES_PER_SHEET):
+    """Count the formulas of one sheet with openpyxl's read-only reader."""
+    from openpyxl import load_workbook
+
+    start = time.perf_counter()
+    wb = load_workbook(path, read_only=True)
+    count, found = 0, []
+    try:
+        for row in wb[title].iter_rows():
+            for cell in row:
+                value = cell.value
+                if isinstance(value, str) and value.startswith('='):
+                    count += 1
+                    if len(found) < samples:
+                        found.append(f"{cell.coordinate}: {value}")
+    finally:
+        wb.close()
+    return title, count, found, time.perf_counter() - start
+
+
+def count_workbook_formulas(path, mode='xml', workers=None, all_sheets=False):
+    """
+    Formula counts for the formula sheets of the workbook at `path`.
+
+    Data sheets (see `data_sheets`) are skipped unless `all_sheets`.
+    Returns a list of (title, count, sample formulas, seconds) in sheet
+    order. XML scans run in threads (decompression releases the GIL);
+    read-only scans are pure Python, so they run in processes.
+    """
+    parts = sheet_parts(path)
+    if not all_sheets:
+        skipped = data_sheets(path)
+        parts = [(title, part) for title, part in parts if title not in skipped]
+    if mode == 'xml':
+        executor, jobs = ThreadPoolExecutor, [(scan_sheet_xml, path, t, p) for t, p in parts]
+    else:
+        executor, jobs = ProcessPoolExecutor, [(scan_sheet_read_only, path, t) for t, _ in parts]
+
+    with executor(max_workers=workers) as pool:
+        futures = [pool.submit(*job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Count formulas per sheet of an Excel workbook.")
+    parser.add_argument("workbook", type=Path, nargs='?', default=WORKBOOK_PATH,
+                        help="Workbook to verify (default: %(default)s)")
+    parser.add_argument("--mode", choices=['xml', 'read-only'], default='xml',
+                        help="Scan raw sheet XML or use openpyxl read-only mode (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Sheets scanned in parallel (default: one per CPU)")
+    parser.add_argument("--all-sheets", action="store_true",
+                        help="Also scan the data sheets behind the defined names (Raw_Data)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print('=' * 70)
+    print('EXCEL FORMULA VERIFICATION - Customer Churn Analysis')
+    print('=' * 70)
+    print(f'\nWorkbook: {args.workbook} ({args.mode} mode)')
+
+    start = time.perf_counter()
+    results = count_workbook_formulas(args.workbook, args.mode, args.workers, args.all_sheets)
+    elapsed = time.perf_counter() - start
+
+    print('\n[FORMULA COUNT PER SHEET]')
+    scanned = {title for title, _, _, _ in results}
+    for title, _ in sheet_parts(args.workbook):
+        if title not in scanned:
+            print(f'   [skip] {title}: data sheet')
+    for title, count, samples, seconds in results:
+        status = '[OK]' if count > 0 else '[--]'
+        print(f'   {status} {title}: {count} formulas ({seconds:.3f}s)')
+        for sample in samples:
+            print(f'       Example: {sample}')
+
+    total_formulas = sum(count for _, count, _, _ in results)
+    print('\n' + '=' * 70)
+    print(f'Total formulas in workbook: {total_formulas}')
+    print(f'Verified in {elapsed:.2f}s')
+    print('=' * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
--- Customer Churn Analysis
--- SQLite queries from notebook analysis
+-- Customer Churn Analysis SQL Queries
+-- Generated from 02_sql_analysis.ipynb
 
--- Churn rate by contract type
+-- Query 01
+-- Query 01: Churn rate by contract type
 SELECT Contract,
        COUNT(*) AS total_customers,
        SUM(CASE WHEN Churn=1 THEN 1 ELSE 0 END) AS churned_customers,
@@ -35,3 +36,37 @@ ORDER BY tenure;
 
 ----------------------------------------------------------------------
 
+-- Query 04
+-- Summary-table versions (tables maintained by triggers, see churn/store.py)
+-- Each reads one row per segment instead of scanning customers
+-- Summary: Churn rate by contract type
+SELECT segment AS Contract,
+       customers AS total_customers,
+       churned AS churned_customers,
+       ROUND(100.0 * churned / customers, 2) AS churn_rate_pct
+FROM summary_contract
+ORDER BY churn_rate_pct DESC;
+
+----------------------------------------------------------------------
+
+-- Query 05
+-- Summary: Churn rate by PaymentMethod
+SELECT segment AS PaymentMethod,
+       customers AS total_customers,
+       churned AS churned_customers,
+       ROUND(100.0 * churned / customers, 2) AS churn_rate_pct
+FROM summary_payment_method
+ORDER BY churn_rate_pct DESC;
+
+----------------------------------------------------------------------
+
+-- Query 06
+-- Summary: churn by tenure (trend)
+SELECT segment AS tenure,
+       ROUND(100.0 * churned / customers, 2) AS churn_rate_pct,
+       LAG(ROUND(100.0 * churned / customers, 2)) OVER (ORDER BY segment) AS prev_churn
+FROM summary_tenure
+ORDER BY segment;
+
+----------------------------------------------------------------------
+
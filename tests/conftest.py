@@ -0,0 +1,20 @@
+"""Shared fixtures: a small sample of the raw telco extract."""
+
+import pandas as pd
+import pytest
+
+from churn.data import RAW_PATH, clean_data
+
+SAMPLE_ROWS = 600
+
+
+@pytest.fixture(scope='session')
+def raw_sample():
+    """The first SAMPLE_ROWS rows of the raw extract, as read by the notebook."""
+    return pd.read_csv(RAW_PATH, nrows=SAMPLE_ROWS)
+
+
+@pytest.fixture(scope='session')
+def customers(raw_sample):
+    """`raw_sample` cleaned in memory."""
+    return clean_data(raw_sample)
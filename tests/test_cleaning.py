@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from churn.cleaning import MAX_DROPPED_TOTALCHARGES, clean_chunk, read_raw_chunks
+from churn.data import RAW_PATH, clean_data, clean_file, read_cleaned
+
+
+@pytest.fixture(scope='module')
+def raw():
+    return pd.read_csv(RAW_PATH)
+
+
+def _clean_file(tmp_path, raw_path, chunk_size):
+    csv_path, feather_path = tmp_path / "cleaned.csv", tmp_path / "cleaned.feather"
+    report = clean_file(raw_path, csv_path, feather_path, chunk_size=chunk_size,
+                        report_path=tmp_path / "report.json")
+    return csv_path, feather_path, report
+
+
+@pytest.mark.parametrize('chunk_size', [250, 1000, 10_000])
+def test_chunked_file_matches_in_memory(tmp_path, raw, chunk_size):
+    csv_path, feather_path, report = _clean_file(tmp_path, RAW_PATH, chunk_size)
+    expected = clean_data(raw)
+
+    assert csv_path.read_text() == expected.to_csv(index=False)
+    cached = read_cleaned(feather_path)
+    pd.testing.assert_frame_equal(cached, expected, check_dtype=False, check_categorical=False)
+    assert report.rows_read == len(raw)
+    assert report.rows_written == len(expected)
+    assert report.passed
+
+
+def test_totalcharges_policy_uses_the_whole_file(tmp_path, raw):
+    # Blanks spread so that every chunk has fewer than the threshold but
+    # the file has more: the whole file is zero-filled, as in memory
+    raw = raw.iloc[:2000].copy()
+    raw.loc[raw.index[::20], 'TotalCharges'] = ' '
+    raw_path = tmp_path / "raw.csv"
+    raw.to_csv(raw_path, index=False)
+
+    csv_path, _, report = _clean_file(tmp_path, raw_path, chunk_size=300)
+    assert report.totalcharges_missing >= MAX_DROPPED_TOTALCHARGES
+    assert report.policy == 'fill'
+    assert report.rows_written == len(raw)
+    assert csv_path.read_text() == clean_data(raw).to_csv(index=False)
+
+
+def test_few_missing_totalcharges_are_dropped(tmp_path, raw):
+    raw = raw.iloc[:2000].copy()
+    raw.loc[raw.index[::200], 'TotalCharges'] = ' '
+    raw_path = tmp_path / "raw.csv"
+    raw.to_csv(raw_path, index=False)
+
+    csv_path, _, report = _clean_file(tmp_path, raw_path, chunk_size=300)
+    assert report.policy == 'drop'
+    assert report.rows_written == len(raw) - report.totalcharges_missing
+    assert csv_path.read_text() == clean_data(raw).to_csv(index=False)
+
+
+def test_chunks_match_whole_table(raw):
+    chunks = [clean_chunk(chunk) for chunk in read_raw_chunks(RAW_PATH, chunk_size=700)]
+    whole = pd.concat(chunks, ignore_index=True)
+    expected = clean_chunk(raw)
+    pd.testing.assert_frame_equal(whole, expected, check_dtype=False, check_categorical=False)
+
+
+def test_unexpected_flag_value_raises(raw):
+    raw = raw.head(10).copy()
+    raw.loc[raw.index[3], 'Partner'] = 'Maybe'
+    with pytest.raises(ValueError, match="Partner"):
+        clean_chunk(raw.astype({'Partner': 'category'}))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from sklearn.model_selection import train_test_split
+
+from churn.features import FeatureSchema, FeatureStore, split_rows
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureStore(tmp_path / "features")
+
+
+def test_schema_is_fitted_on_training_rows_only(store, customers):
+    store.build(customers)
+    train_rows, test_rows = split_rows(customers['Churn'].to_numpy())
+    assert store.schema.to_dict() == FeatureSchema.fit(customers.iloc[train_rows]).to_dict()
+    assert store.schema.to_dict() != FeatureSchema.fit(customers).to_dict()
+
+
+def test_split_matches_notebook(store, customers):
+    store.build(customers)
+    train_rows, test_rows = store.split()
+    X = customers.drop(columns=['Churn', 'customerID'])
+    X_train, X_test, _, _ = train_test_split(X, customers['Churn'], test_size=0.2,
+                                             random_state=42, stratify=customers['Churn'])
+    assert np.array_equal(customers.index[train_rows], X_train.index)
+    assert np.array_equal(customers.index[test_rows], X_test.index)
+
+
+def test_appended_rows_only_join_training_side(store, customers):
+    store.build(customers.iloc[:400])
+    _, test_before = store.split()
+    store.append(customers)
+    train_rows, test_rows = store.split()
+    assert np.array_equal(test_rows, test_before)
+    assert set(range(400, len(customers))) <= set(train_rows.tolist())
@@ -0,0 +1,27 @@
+import sqlite3
+
+import pandas as pd
+
+from churn.queries import load_queries
+from churn.store import load_store
+
+
+def test_summary_queries_match_customer_queries(tmp_path, customers):
+    db_path = tmp_path / "churn_analysis.db"
+    load_store(customers, db_path)
+    queries = list(load_queries().items())
+    plain = [(name, sql) for name, sql in queries if '_summary_' not in name]
+    summary = [(name, sql) for name, sql in queries if '_summary_' in name]
+    assert len(plain) == len(summary)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for (name, sql), (summary_name, summary_sql) in zip(plain, summary):
+            assert summary_name.endswith(name.split('_', 2)[2])
+            expected = pd.read_sql_query(sql, conn)
+            result = pd.read_sql_query(summary_sql, conn)
+            key = expected.columns[0]
+            pd.testing.assert_frame_equal(result.sort_values(key, ignore_index=True),
+                                          expected.sort_values(key, ignore_index=True))
+    finally:
+        conn.close()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from churn.scorer import ChurnScorer
+from churn.train import build_preprocessor, categorical_features
+
+
+@pytest.fixture(scope='module')
+def fitted(customers):
+    X = customers.drop(columns=['Churn', 'customerID'])
+    pipeline = Pipeline([
+        ('preprocessor', build_preprocessor(categorical_features(X))),
+        ('classifier', LogisticRegression(max_iter=1000)),
+    ]).fit(X, customers['Churn'])
+    return pipeline, X
+
+
+def test_score_batch_matches_predict_proba(fitted):
+    pipeline, X = fitted
+    scorer = ChurnScorer.from_pipeline(pipeline)
+    expected = pipeline.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(scorer.score_batch(X.to_dict('records')), expected,
+                               rtol=0, atol=1e-12)
+
+
+def test_score_matches_predict_proba(fitted):
+    pipeline, X = fitted
+    scorer = ChurnScorer.from_pipeline(pipeline)
+    expected = pipeline.predict_proba(X)[:, 1]
+    single = np.array([scorer.score(record) for record in X.to_dict('records')])
+    np.testing.assert_allclose(single, expected, rtol=0, atol=1e-12)
+
+
+def test_missing_and_unknown_values_match_predict_proba(fitted):
+    pipeline, X = fitted
+    scorer = ChurnScorer.from_pipeline(pipeline)
+    X = X.head(20).astype({'Contract': object}).copy()
+    X.loc[X.index[:5], 'TotalCharges'] = np.nan
+    X.loc[X.index[5:10], 'Contract'] = 'Five year'
+    expected = pipeline.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(scorer.score_batch(X.to_dict('records')), expected,
+                               rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('with_mean, with_std', [(False, True), (True, False), (False, False)])
+def test_scaler_options_match_predict_proba(customers, with_mean, with_std):
+    X = customers.drop(columns=['Churn', 'customerID'])
+    preprocessor = build_preprocessor(categorical_features(X))
+    preprocessor.transformers[0][1].set_params(scaler__with_mean=with_mean,
+                                               scaler__with_std=with_std)
+    pipeline = Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', LogisticRegression(max_iter=5000)),
+    ]).fit(X, customers['Churn'])
+    scorer = ChurnScorer.from_pipeline(pipeline)
+    expected = pipeline.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(scorer.score_batch(X.to_dict('records')), expected,
+                               rtol=0, atol=1e-12)
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from churn.store import (SUMMARY_TABLES, TABLE, check_summaries, connect, load_store,
+                         segment_churn)
+
+
+def _check(db_path):
+    conn = connect(db_path, read_only=True)
+    try:
+        return check_summaries(conn)
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "churn_analysis.db"
+
+
+def test_first_load_builds_consistent_summaries(db_path, customers):
+    counts = load_store(customers, db_path)
+    assert counts['inserted'] == len(customers)
+    assert _check(db_path) == []
+
+
+def test_delta_keeps_summaries_consistent(db_path, customers):
+    load_store(customers.iloc[:400], db_path)
+    delta = customers.iloc[300:].copy()
+    delta.loc[delta.index[:50], 'Contract'] = 'Two year'
+    delta.loc[delta.index[:50], 'Churn'] = 1 - delta.loc[delta.index[:50], 'Churn']
+    delta.loc[delta.index[:50], 'MonthlyCharges'] += 10.5
+    counts = load_store(delta, db_path)
+    assert counts['inserted'] == len(customers) - 400
+    assert counts['updated'] == 50
+    assert _check(db_path) == []
+
+
+def test_schema_rebuild_resets_summaries(db_path, customers):
+    load_store(customers.iloc[:200], db_path)
+    # An older schema version forces the customers table to be rebuilt
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA user_version = 0")
+    conn.close()
+
+    load_store(customers.iloc[100:], db_path)
+    assert _check(db_path) == []
+    load_store(customers, db_path)
+    assert _check(db_path) == []
+
+
+def test_notebook_dump_is_replaced_with_consistent_summaries(db_path, customers):
+    load_store(customers.iloc[:200], db_path)
+    # The notebook's to_sql dump replaces customers but leaves the summaries
+    conn = sqlite3.connect(db_path)
+    customers.to_sql(TABLE, conn, if_exists='replace', index=False)
+    conn.close()
+
+    load_store(customers, db_path)
+    assert _check(db_path) == []
+
+
+def test_segment_churn_matches_customers(db_path, customers):
+    load_store(customers, db_path)
+    conn = connect(db_path, read_only=True)
+    try:
+        for dimension in SUMMARY_TABLES:
+            result = segment_churn(conn, dimension)
+            grouped = customers.groupby(dimension, observed=True)['Churn'].agg(['size', 'sum'])
+            assert dict(zip(result[dimension], result['total_customers'])) == grouped['size'].to_dict()
+            assert dict(zip(result[dimension], result['churned_customers'])) == grouped['sum'].to_dict()
+    finally:
+        conn.close()